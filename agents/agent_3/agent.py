@@ -4,13 +4,34 @@ Monitors RSS feeds for technical debt signals and companies seeking help
 """
 
 import os
-
+from functools import partial
+
+from shared.analysis import AnalysisPool, BatchAnalyzer
+from shared.checkpoint import Checkpoint, Deadline, prioritize
+from shared.enrichment import ArticleEnricher, ContentCache
+from shared.gazetteer import Gazetteer, load_seed_companies
+from shared.memo import memo_from_env
+from shared.profiles import DEFAULT_PROFILE, ProfileRouter
+from shared.recency import DEFAULT_MAX_AGE_HOURS, LastSeen, RecencyWindow, entry_timestamp
+from shared.records import FeedEntry, Signal
+from shared.relevance import RelevanceEngine
+from shared.run_state import build_state_store
+from shared.scoring import MAX_SCORE, BatchScorer, keyword_categories
 from shared.sheets_client import SheetsClient
-from shared.utils import load_json_config, setup_logging, sanitize_text, get_timestamp, get_date
+from shared.sharding import ShardCoordinator, get_shard_config, select_shard
+from shared.sinks import build_sinks
+from shared.snapshots import SnapshotStore
+from shared.utils import (
+    LogSampler, load_json_config, setup_logging, sanitize_text, get_timestamp, get_date, get_state_dir, send_alert
+)
+from shared.websub import SheetSubscriptionStore, WebSubSubscriber, discover_hub
 
 import sys
+import time
 import feedparser
-from typing import List, Dict, Optional
+import numpy as np
+import requests
+from typing import List, Dict, Mapping, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # Add parent directory to path
@@ -18,36 +39,188 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 logger = setup_logging("agent_3")
 
+FEED_TIMEOUT_SECONDS = 30
+USER_AGENT = "ResultsCTO-Agent3/1.0"
+
+
+def extract_company(gazetteer: Gazetteer, text: str) -> Optional[str]:
+    """
+    Attempt to extract company name from text
+    This is a simple implementation - can be enhanced with NLP
+
+    Args:
+        gazetteer: Known companies
+        text: Text to extract from
+
+    Returns:
+        Company name or None
+    """
+    # Known companies first (seed list and past Automation Queue rows)
+    known = gazetteer.first(text)
+    if known:
+        return known
+
+    # Common patterns: "Company X announced...", "At Company Y, we..."
+    patterns = [" at ", " for ", " with ", " announced ", " launched ", " raised ", " founded "]
+
+    words = text.split()
+    for i, word in enumerate(words):
+        if word.lower() in patterns and i + 1 < len(words):
+            potential_company = words[i + 1].strip(".,;:")
+            if potential_company and potential_company[0].isupper() and len(potential_company) > 2:
+                return potential_company
+
+    return None
+
 
 class TechnicalDebtScanner:
     """Scans RSS feeds for technical debt signals"""
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(
+        self,
+        config_dir: str = "config",
+        shard_index: int = None,
+        num_shards: int = None,
+        sheets_client: SheetsClient = None,
+        deadline_seconds: float = None
+    ):
         """
         Initialize scanner
 
         Args:
             config_dir: Directory containing configuration files
+            shard_index: This instance's shard (defaults to SHARD_INDEX env var)
+            num_shards: Total shard count (defaults to SHARD_COUNT env var)
+            sheets_client: Existing Sheets client to use (defaults to a new one)
+            deadline_seconds: Per-run time budget (defaults to RUN_DEADLINE_SECONDS / FUNCTION_TIMEOUT_SEC)
         """
         self.config_dir = config_dir
+        self.shard_index, self.num_shards = get_shard_config(shard_index, num_shards)
+        self.metrics = {}
 
         # Initialize Sheets client
-        self.sheets_client = SheetsClient()
+        self.sheets_client = sheets_client or SheetsClient()
+
+        # Output sinks (Sheets and/or local bulk backends, see OUTPUT_SINKS)
+        self.sink = build_sinks("agent_3", self.sheets_client, Signal.to_agent_3_row, "K")
+
+        # HTTP session (kept alive across feeds and runs)
+        self.http = requests.Session()
+        self.http.headers["User-Agent"] = USER_AGENT
+
+        # Raw snapshot archive (optional, for offline replay)
+        self.snapshots = None
+        self._fetched_snapshots: Dict[str, Tuple[str, float]] = {}
+        if os.getenv("SNAPSHOTS_ENABLED", "false").lower() == "true":
+            self.snapshots = SnapshotStore(get_state_dir("snapshots", "agent_3"))
 
         # Load configuration
         self.sources = load_json_config(f"{config_dir}/agent_3_sources.json")
         self.keywords = load_json_config(f"{config_dir}/agent_3_keywords.json")
 
+        # Keep only the feeds this shard owns
+        if self.num_shards > 1:
+            self.sources["rss_feeds"] = select_shard(
+                self.sources["rss_feeds"], self.shard_index, self.num_shards, key=lambda feed: feed["url"]
+            )
+            logger.info(f"Shard {self.shard_index + 1}/{self.num_shards}")
+
         # Combine all keyword categories
         self.all_keywords = []
-        for category in self.keywords.values():
-            self.all_keywords.extend([kw.lower() for kw in category])
+        for category in keyword_categories(self.keywords).values():
+            self.all_keywords.extend(category)
+
+        # Run deadline; with one, covered feeds are checkpointed so long lists finish over several runs
+        self.deadline_seconds = deadline_seconds
+        self.deadline = Deadline.from_env(deadline_seconds)
+        self.checkpoint = None
+        if self.deadline.enabled:
+            self.checkpoint = Checkpoint(
+                build_state_store(self.sheets_client, "checkpoints"),
+                f"agent_3_shard{self.shard_index}of{self.num_shards}",
+            )
+
+        # Newest entry processed per feed; with max_age_hours, bounds which entries reach analysis
+        self.last_seen = LastSeen(
+            build_state_store(self.sheets_client, "recency"), f"agent_3_shard{self.shard_index}of{self.num_shards}"
+        )
+
+        # Optional full-text enrichment of entries whose feed teaser did not match
+        self.enrichment = self.sources.get("enrichment", {})
+        self.enricher = None
+        if self.enrichment.get("enabled"):
+            cache = ContentCache(
+                get_state_dir("articles"),
+                max_entries=self.enrichment.get("cache_max_entries", 5000),
+                ttl_seconds=self.enrichment.get("cache_ttl_hours", 168) * 3600,
+            )
+            self.enricher = ArticleEnricher(
+                cache,
+                max_workers=self.enrichment.get("max_workers", 4),
+                max_bytes=self.enrichment.get("max_bytes", 20_000_000),
+                time_budget_seconds=self.enrichment.get("time_budget_seconds", 45),
+                max_article_bytes=self.enrichment.get("max_article_bytes", 2_000_000),
+            )
+
+        # Optional WebSub push delivery for feeds with a hub (callback: main.websub_handler or the worker)
+        self.websub_config = self.sources.get("websub", {})
+        self.websub = None
+        if self.websub_config.get("enabled"):
+            callback_url, secret_key = os.getenv("WEBSUB_CALLBACK_URL"), os.getenv("WEBSUB_SECRET")
+            if callback_url and secret_key:
+                self.websub = WebSubSubscriber(
+                    SheetSubscriptionStore(self.sheets_client),
+                    callback_url,
+                    secret_key,
+                    session=self.http,
+                    lease_seconds=int(self.websub_config.get("lease_hours", 24) * 3600),
+                    renew_before_seconds=self.websub_config.get("renew_before_hours", 6) * 3600,
+                    denied_backoff_seconds=self.websub_config.get("denied_backoff_hours", 24) * 3600,
+                )
+            else:
+                logger.warning("WebSub enabled but WEBSUB_CALLBACK_URL or WEBSUB_SECRET is not set; polling every feed")
+
+        # Known companies: local seed list plus names already in the Automation Queue
+        self.gazetteer = Gazetteer.load(os.path.join(get_state_dir(), "gazetteer.json"))
+        self.gazetteer.add_many(load_seed_companies(f"{config_dir}/company_seeds.json"))
+
+        # Vectorized scorer (applies per-keyword/category weights from the keyword file)
+        self.scorer = BatchScorer(self.keywords)
+
+        # Extra keyword profiles (config/profiles.json), matched in the same pass as the default keywords
+        self.profiles = ProfileRouter.from_config(
+            config_dir, "agent_3", self.scorer, self.sheets_client, Signal.to_agent_3_row, "K"
+        )
+
+        # Matching and company extraction, across worker processes for large batches (ANALYSIS_WORKERS)
+        self.analysis = AnalysisPool.from_env(BatchAnalyzer(
+            self.profiles.union if self.profiles is not None else self.scorer,
+            partial(extract_company, self.gazetteer),
+        ))
+
+        # Relevance model: "count" (capped weighted keyword count) or "bm25"
+        self.relevance = None
+        if os.getenv("RELEVANCE_MODEL", "count").lower() == "bm25":
+            self.relevance = RelevanceEngine(
+                self.all_keywords,
+                self.scorer.keyword_weights,
+                path=os.path.join(get_state_dir(), "relevance_agent_3.npz"),
+                matcher=self.scorer.matcher,
+            )
+
+        # Per-item analysis results keyed by content and keyword version (ANALYSIS_MEMO_ENABLED)
+        self.profile_names = [DEFAULT_PROFILE]
+        if self.profiles is not None:
+            self.profile_names += [profile.name for profile in self.profiles.profiles]
+        self.memo = memo_from_env(
+            f"agent_3_shard{self.shard_index}of{self.num_shards}", self.scorer, self.profiles
+        )
 
         logger.info(f"Initialized with {len(self.sources['rss_feeds'])} feeds")
         logger.info(f"Monitoring {len(self.all_keywords)} keywords")
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
-    def fetch_feed(self, feed_config: Dict) -> List[Dict]:
+    def fetch_feed(self, feed_config: Dict) -> List[FeedEntry]:
         """
         Fetch and parse an RSS feed with retry logic
 
@@ -55,35 +228,74 @@ class TechnicalDebtScanner:
             feed_config: Feed configuration dict
 
         Returns:
-            List of entry dicts
+            List of entries
         """
         try:
             logger.info(f"Fetching feed: {feed_config['name']}")
-            feed = feedparser.parse(feed_config["url"])
-
-            if feed.bozo:  # Feed parsing error
-                logger.warning(f"Feed parsing error for {feed_config['name']}: {feed.bozo_exception}")
-                return []
-
-            entries = []
-            for entry in feed.entries[:20]:  # Limit to last 20 entries
-                entries.append(
-                    {
-                        "title": entry.get("title", ""),
-                        "link": entry.get("link", ""),
-                        "summary": entry.get("summary", ""),
-                        "published": entry.get("published", ""),
-                        "source": feed_config["name"],
-                    }
-                )
+            response = self.http.get(feed_config["url"], timeout=FEED_TIMEOUT_SECONDS)
+            response.raise_for_status()
+
+            digest = self.snapshots.put(response.content) if self.snapshots is not None else None
+
+            if self.websub is not None:
+                self.websub.ensure(feed_config, *discover_hub(response.content, response.links))
+
+            max_age = feed_config.get("max_age_hours", self.sources.get("max_age_hours", DEFAULT_MAX_AGE_HOURS))
+            window = self.last_seen.window(feed_config["url"], max_age)
+            if digest is not None:
+                self._fetched_snapshots[feed_config["name"]] = (digest, window.cutoff)
+            entries = self.parse_feed(
+                response.content, feed_config["name"], window, ordered=feed_config.get("time_ordered", True)
+            )
+            self.last_seen.observe(feed_config["url"], window)
 
             logger.info(f"Retrieved {len(entries)} entries from {feed_config['name']}")
             return entries
 
         except Exception as e:
             logger.error(f"Error fetching feed {feed_config['name']}: {e}")
+            send_alert(f"Agent 3: feed {feed_config['name']} failing", str(e), key=f"feed:{feed_config['url']}")
+            return []
+
+    def parse_feed(
+        self, content: bytes, source: str, window: Optional[RecencyWindow] = None, ordered: bool = True
+    ) -> List[FeedEntry]:
+        """
+        Parse a raw RSS/Atom document into entries
+
+        Args:
+            content: Raw feed document
+            source: Feed name
+            window: Recency window (None keeps every entry, e.g. for replay)
+            ordered: Feed lists newest first, so stop at the first entry outside the window
+
+        Returns:
+            List of entries
+        """
+        feed = feedparser.parse(content)
+
+        if feed.bozo:  # Feed parsing error
+            logger.warning(f"Feed parsing error for {source}: {feed.bozo_exception}")
             return []
 
+        items = feed.entries[:20]  # Limit to last 20 entries
+        if window is not None:
+            items = window.take(items, entry_timestamp, ordered)
+
+        entries = []
+        for entry in items:
+            entries.append(
+                FeedEntry(
+                    entry.get("title", ""),
+                    entry.get("link", ""),
+                    entry.get("summary", ""),
+                    entry.get("published", ""),
+                    source,
+                )
+            )
+
+        return entries
+
     def check_keywords(self, text: str) -> List[str]:
         """
         Check if text contains any keywords
@@ -94,6 +306,9 @@ class TechnicalDebtScanner:
         Returns:
             List of found keywords
         """
+        if self.scorer.index is not None:
+            return self.scorer.index.match(text)
+
         text_lower = text.lower()
         found_keywords = []
 
@@ -105,8 +320,7 @@ class TechnicalDebtScanner:
 
     def extract_company_name(self, text: str) -> Optional[str]:
         """
-        Attempt to extract company name from text
-        This is a simple implementation - can be enhanced with NLP
+        Extract company name from text (see extract_company)
 
         Args:
             text: Text to extract from
@@ -114,141 +328,433 @@ class TechnicalDebtScanner:
         Returns:
             Company name or None
         """
-        # Common patterns: "Company X announced...", "At Company Y, we..."
-        patterns = [" at ", " for ", " with ", " announced ", " launched ", " raised ", " founded "]
-
-        words = text.split()
-        for i, word in enumerate(words):
-            if word.lower() in patterns and i + 1 < len(words):
-                potential_company = words[i + 1].strip(".,;:")
-                if potential_company and potential_company[0].isupper() and len(potential_company) > 2:
-                    return potential_company
-
-        return None
+        return extract_company(self.gazetteer, text)
 
-    def analyze_entry(self, entry: Dict) -> Optional[Dict]:
+    def analyze_entry(self, entry: FeedEntry) -> Optional[Signal]:
         """
         Analyze a feed entry for relevant signals
 
         Args:
-            entry: Feed entry dict
+            entry: Feed entry
 
         Returns:
-            Signal dict or None
+            Signal or None
         """
-        full_text = f"{entry['title']} {entry['summary']}"
+        full_text = f"{entry.title} {entry.summary}"
 
         # Check for keywords
         found_keywords = self.check_keywords(full_text)
 
+        # BM25 observes every entry so corpus statistics include non-matches
+        points = self._relevance_points(full_text, found_keywords, entry.link)
+
         if not found_keywords:
             return None
 
         # Try to extract company name
         company_name = self.extract_company_name(full_text)
 
-        # Calculate relevance score (simple heuristic)
-        relevance_score = min(len(found_keywords) * 2, 10)
+        relevance_score = min(int(round(points)), MAX_SCORE)
+
+        return self._build_signal(entry, found_keywords, company_name, relevance_score)
+
+    def _relevance_points(self, full_text: str, found_keywords: List[str], doc_id: str) -> float:
+        """
+        Compute relevance points with the configured model
+
+        Args:
+            full_text: Entry text
+            found_keywords: Matched keywords
+            doc_id: Stable document id (entry URL)
+
+        Returns:
+            Points before capping
+        """
+        if self.relevance is not None:
+            return self.relevance.score(full_text, found_keywords, doc_id)
+        return self.scorer.keyword_score(found_keywords)
+
+    def _build_signal(
+        self,
+        entry: FeedEntry,
+        found_keywords: List[str],
+        company_name: Optional[str],
+        score: int
+    ) -> Signal:
+        """
+        Build a signal for a matched entry
+
+        Args:
+            entry: Feed entry
+            found_keywords: Matched keywords
+            company_name: Extracted company name, if any
+            score: Relevance score
+
+        Returns:
+            Signal
+        """
+        return Signal(
+            company_name=company_name or "Unknown",
+            signal_type="Technical Debt",
+            signal_description=", ".join(found_keywords[:3]),  # Top 3 keywords
+            source_url=entry.link,
+            source=entry.source,
+            detected_date=get_date(),
+            relevance_score=score,
+            title=sanitize_text(entry.title, 200),
+            summary=sanitize_text(entry.summary, 500),
+        )
+
+    def analyze_entries(self, entries: List[FeedEntry]) -> List[Signal]:
+        """
+        Analyze a batch of feed entries with the vectorized scorer
+
+        Produces the same signals as calling analyze_entry on each entry,
+        but matches and scores the whole batch at once. With the analysis
+        memo, entries whose text was analyzed before under the same keywords
+        are not analyzed again.
+
+        Args:
+            entries: Feed entries
+
+        Returns:
+            Signals for the entries that matched, in input order, followed by
+            keyword-profile signals (Signal.profile set)
+        """
+        if not entries:
+            return []
+
+        texts = [f"{entry.title} {entry.summary}" for entry in entries]
+        results = self.memo.lookup(texts) if self.memo is not None else [None] * len(texts)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            analyzed = self._analyze_texts([texts[i] for i in pending], [entries[i].link for i in pending])
+            for i, result in zip(pending, analyzed):
+                results[i] = result
+                if self.memo is not None:
+                    self.memo.store(texts[i], result)
+
+        signals = []
+        for profile in self.profile_names:
+            for entry, result in zip(entries, results):
+                if profile in result:
+                    found_keywords, score, company_name = result[profile]
+                    signal = self._build_signal(entry, found_keywords, company_name, score)
+                    signal.profile = profile
+                    signals.append(signal)
+        return signals
+
+    def _analyze_texts(self, texts: List[str], doc_ids: List[str]) -> List[Dict]:
+        """
+        Match, score and extract companies for a batch of entry texts
 
-        return {
-            "company_name": company_name or "Unknown",
-            "signal_type": "Technical Debt",
-            "signal_description": ", ".join(found_keywords[:3]),  # Top 3 keywords
-            "source_url": entry["link"],
-            "source": entry["source"],
-            "detected_date": get_date(),
-            "relevance_score": relevance_score,
-            "title": sanitize_text(entry["title"], 200),
-            "summary": sanitize_text(entry["summary"], 500),
-        }
+        Args:
+            texts: Entry texts (title + summary)
+            doc_ids: Stable document ids (entry URLs)
 
-    def process_feeds(self) -> List[Dict]:
+        Returns:
+            Per entry: profile -> [matched keywords, score, company name] for each profile it matched
+        """
+        # Companies come back for every entry that hit any profile's keywords
+        hits, has_regional, companies = self.analysis.analyze(texts)
+        routed = {}
+        if self.profiles is None:
+            scores = self.scorer.score_hits(hits, has_regional)
+        else:
+            scores, routed = self.profiles.score_hits(hits, has_regional)
+        matched = scores.keyword_counts() > 0
+
+        if self.relevance is not None:
+            for i, doc_id in enumerate(doc_ids):
+                found_keywords = scores.keywords_for(i) if matched[i] else []
+                points = self.relevance.score(texts[i], found_keywords, doc_id)
+                scores.scores[i] = min(int(round(points)), MAX_SCORE)
+
+        results: List[Dict] = [{} for _ in texts]
+        for i in np.flatnonzero(matched).tolist():
+            results[i][DEFAULT_PROFILE] = [scores.keywords_for(i), int(scores.scores[i]), companies[i]]
+        for profile, (rows, profile_scores) in routed.items():
+            for j, i in enumerate(rows.tolist()):
+                results[i][profile] = [profile_scores.keywords_for(j), int(profile_scores.scores[j]), companies[i]]
+        return results
+
+    def process_feeds(self, deadline: Optional[Deadline] = None) -> List[Signal]:
         """
         Process all configured feeds
 
+        Args:
+            deadline: Run deadline started by run() (defaults to one starting now)
+
         Returns:
             List of signals found
         """
         all_signals = []
+        self.metrics = {"sources_processed": 0, "items_analyzed": 0, "signals_found": 0}
+        self.deadline = deadline or Deadline.from_env(self.deadline_seconds)
+
+        # High-priority feeds first; skip feeds already covered this cycle
+        feeds = prioritize(self.sources["rss_feeds"], lambda feed: feed.get("priority"))
+        if self.websub is not None:
+            # Feeds with an active push subscription arrive through ingest_push; poll the rest
+            self.websub.renew()
+            pushed = self.websub.pushed_urls()
+            self.metrics["sources_pushed"] = sum(feed["url"] in pushed for feed in feeds)
+            feeds = [feed for feed in feeds if feed["url"] not in pushed]
+        if self.checkpoint is not None:
+            feeds = self.checkpoint.pending(feeds, key=lambda feed: feed["url"])
+
+        entries = []
+        slowest = 0.0
+        for feed_config in feeds:
+            if self.deadline.should_stop(slowest):
+                deferred = len(feeds) - self.metrics["sources_processed"]
+                logger.warning(f"Run deadline approaching; deferring {deferred} feeds")
+                break
+            started = time.monotonic()
+            entries.extend(self.fetch_feed(feed_config))
+            slowest = max(slowest, time.monotonic() - started)
+            self.metrics["sources_processed"] += 1
+            if self.checkpoint is not None:
+                self.checkpoint.mark_done(feed_config["url"])
+        self.metrics["sources_deferred"] = len(feeds) - self.metrics["sources_processed"]
+        self.metrics["items_analyzed"] = len(entries)
+
+        # Score every fetched entry in one vectorized batch
+        sampler = LogSampler(logger)
+        for signal in self.analyze_entries(entries):
+            all_signals.append(signal)
+            sampler.log(f"Found signal: {signal.title[:50]}... (score: {signal.relevance_score})")
+        sampler.summary("signals")
+
+        # Article pages are not archived, so enrichment signals stay out of the replay index
+        self._record_snapshots(all_signals)
+        if self.enricher is not None:
+            all_signals.extend(self.enrich_entries(entries, all_signals))
+
+        self.metrics["signals_found"] = len(all_signals)
+        self.flush()
+        return all_signals
 
-        for feed_config in self.sources["rss_feeds"]:
-            entries = self.fetch_feed(feed_config)
+    def enrich_entries(self, entries: List[FeedEntry], signals: List[Signal]) -> List[Signal]:
+        """
+        Match entries again against their linked article's main text
 
-            for entry in entries:
-                signal = self.analyze_entry(entry)
-                if signal:
-                    all_signals.append(signal)
-                    logger.info(f"Found signal: {signal['title'][:50]}... (score: {signal['relevance_score']})")
+        Only entries that produced no signal from their title and summary are
+        candidates (up to max_articles, in feed priority order). The time
+        budget is capped to what the run deadline leaves.
 
-        return all_signals
+        Args:
+            entries: Entries fetched this run
+            signals: Signals already found from feed text
 
-    def write_to_sheets(self, signals: List[Dict]):
+        Returns:
+            Additional signals found in article text
         """
-        Write signals to Google Sheets
+        signaled = {signal.source_url for signal in signals}
+        candidates = [entry for entry in entries if entry.link and entry.link not in signaled]
+        candidates = candidates[:self.enrichment.get("max_articles", 50)]
+        if not candidates:
+            return []
+
+        budget = min(self.enricher.time_budget_seconds, self.deadline.remaining() - self.deadline.margin)
+        texts = self.enricher.enrich([entry.link for entry in candidates], budget)
+        for name, value in self.enricher.metrics.items():
+            self.metrics[f"enrichment_{name}"] = value
+
+        enriched = [
+            FeedEntry(entry.title, entry.link, f"{entry.summary} {texts[entry.link]}", entry.published, entry.source)
+            for entry in candidates
+            if entry.link in texts
+        ]
+        signals = self.analyze_entries(enriched)
+        logger.info(f"Enrichment: {len(signals)} signals from {len(enriched)} article texts")
+        return signals
+
+    def _record_snapshots(self, signals: List[Signal]):
+        """
+        Index this run's fetched documents with the signals they produced and their window cutoffs
 
         Args:
-            signals: List of signal dicts
+            signals: Signals found in this run's feed documents (before enrichment)
         """
-        if not signals:
-            logger.info("No signals to write")
+        if self.snapshots is None:
             return
 
-        logger.info(f"Writing {len(signals)} signals to Google Sheets")
-
-        # Prepare rows for Automation Queue tab
-        # Column order: Queue ID, Agent Source, Company Name, Signal Type,
-        # Signal Details, Priority Score, Status, Date Added, Action Required,
-        # Assigned To, Notes
-        rows = []
+        by_source: Dict[str, List[Signal]] = {}
         for signal in signals:
-            # Skip duplicates - check column K (Notes) which has the URL
-            if self.sheets_client.check_duplicate("Automation Queue", "K", signal["source_url"]):
-                logger.info(f"Skipping duplicate: {signal['source_url']}")
+            if signal.profile != DEFAULT_PROFILE:
                 continue
+            by_source.setdefault(signal.source, []).append(signal)
 
-            row = [
-                "",  # Queue ID (empty - can add auto-increment later)
-                "Agent 3",  # Agent Source
-                signal.get("company_name", "Unknown"),  # Company Name
-                signal.get("signal_type", "Technical Debt"),  # Signal Type
-                signal.get("signal_description", ""),  # Signal Details
-                signal.get("relevance_score", 2),  # Priority Score
-                "Pending Review",  # Status
-                get_date(),  # Date Added
-                "",  # Action Required (empty)
-                "",  # Assigned To (empty)
-                signal.get("source_url", ""),  # Notes (URL)
-            ]
-            rows.append(row)
-
-        if not rows:
-            logger.info("No new signals to write (all duplicates)")
-            return
+        for source, (digest, cutoff) in self._fetched_snapshots.items():
+            self.snapshots.record(digest, source, by_source.get(source, []), cutoff=cutoff)
+        self._fetched_snapshots = {}
+
+    def replay_snapshot(self, content: bytes, source: str, cutoff: Optional[float] = None) -> List[Signal]:
+        """
+        Analyze an archived feed document (no network, no writes)
+
+        Args:
+            content: Raw feed document
+            source: Feed name
+            cutoff: Recency cutoff the live fetch applied (None keeps every entry)
+
+        Returns:
+            Signals produced by the current configuration
+        """
+        window = None
+        ordered = True
+        if cutoff is not None:
+            feed_config = next((feed for feed in self.sources["rss_feeds"] if feed["name"] == source), {})
+            window = RecencyWindow(0, now=cutoff)
+            ordered = feed_config.get("time_ordered", True)
+        signals = self.analyze_entries(self.parse_feed(content, source, window, ordered=ordered))
+        return [signal for signal in signals if signal.profile == DEFAULT_PROFILE]
+
+    def flush(self):
+        """Persist in-memory state (corpus statistics, gazetteer, analysis memo) and stop analysis workers"""
+        self.analysis.close()
+        if self.relevance is not None:
+            self.relevance.save()
+        if self.memo is not None:
+            self.memo.save()
+        self.gazetteer.save()
+
+    def commit_checkpoint(self):
+        """Persist which feeds this cycle has covered and their newest entries (call once signals are written)"""
+        self.last_seen.save()
+        if self.checkpoint is not None:
+            self.checkpoint.save(complete=self.metrics.get("sources_deferred", 0) == 0)
+
+    def write_signals(self, signals: List[Signal]) -> int:
+        """
+        Write signals through the configured output sinks
+
+        Args:
+            signals: List of signals
+
+        Returns:
+            Number of rows written to the primary (first configured) sink
+        """
+        if self.profiles is not None:
+            signals = self.profiles.write(signals, self.metrics)
+
+        if not signals:
+            logger.info("No signals to write")
+            return 0
+
+        logger.info(f"Writing {len(signals)} signals to {', '.join(sink.name for sink in self.sink.sinks)}")
 
         try:
-            self.sheets_client.append_rows("Automation Queue", rows)
-            logger.info(f"Successfully wrote {len(rows)} rows to Automation Queue")
+            written = self.sink.write(signals)
         except Exception as e:
-            logger.error(f"Error writing to sheets: {e}")
+            logger.error(f"Error writing signals: {e}")
             raise
 
-    def run(self):
-        """Main execution method"""
+        for name, count in written.items():
+            self.metrics[f"rows_written_{name}"] = count
+            logger.info(f"Wrote {count} rows to {name}")
+
+        return next(iter(written.values()), 0)
+
+    def ingest_push(self, content: bytes, subscription: Dict) -> Dict:
+        """
+        Analyze and write a feed document pushed by a WebSub hub
+
+        Args:
+            content: Pushed feed document (new or updated entries)
+            subscription: The push's subscription (feed name and url)
+
+        Returns:
+            Summary dict
+        """
+        feed_config = next(
+            (feed for feed in self.sources["rss_feeds"] if feed["url"] == subscription["url"]),
+            {"name": subscription["feed"], "url": subscription["url"]},
+        )
+        self.metrics = {"sources_processed": 1, "items_analyzed": 0, "signals_found": 0}
+        self.deadline = Deadline.from_env(self.deadline_seconds)
+        self.sink.recover()
+
+        max_age = feed_config.get("max_age_hours", self.sources.get("max_age_hours", DEFAULT_MAX_AGE_HOURS))
+        window = self.last_seen.window(feed_config["url"], max_age)
+        entries = self.parse_feed(content, feed_config["name"], window, ordered=feed_config.get("time_ordered", True))
+        self.last_seen.observe(feed_config["url"], window)
+        self.metrics["items_analyzed"] = len(entries)
+
+        signals = self.analyze_entries(entries)
+        if self.enricher is not None:
+            signals.extend(self.enrich_entries(entries, signals))
+        self.metrics["signals_found"] = len(signals)
+        self.flush()
+
+        rows_written = self.write_signals(signals)
+        self.sink.flush()
+        if self.profiles is not None:
+            self.profiles.flush()
+        self.last_seen.save()
+
+        logger.info(f"Push from {feed_config['name']}: {len(entries)} entries, {len(signals)} signals")
+        return {"entries": len(entries), "signals_found": len(signals), "rows_written": rows_written}
+
+    def handle_websub(self, method: str, params: Mapping, headers: Mapping, body: bytes) -> Tuple[int, str]:
+        """
+        Handle a WebSub callback request (verification GET or content POST)
+
+        Args:
+            method: HTTP method
+            params: Query parameters
+            headers: Request headers
+            body: Request body
+
+        Returns:
+            Tuple of (HTTP status, body)
+        """
+        if self.websub is None:
+            return 404, ""
+        return self.websub.handle(method, params, headers, body, self.ingest_push)
+
+    def run(self, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Main execution method
+
+        Args:
+            deadline: Run deadline started by the caller (defaults to one starting now)
+
+        Returns:
+            Run summary dict
+        """
+        # Recovery and the gazetteer sync count against the run's budget too
+        deadline = deadline or Deadline.from_env(self.deadline_seconds)
         logger.info("=" * 60)
         logger.info("Agent 3: Technical Debt Scanner - Starting")
         logger.info("=" * 60)
 
         try:
+            # Finish any Sheets batch a previous run left unacknowledged
+            self.sink.recover()
+            if self.profiles is not None:
+                self.profiles.recover()
+
+            # Learn company names added to the Automation Queue since the last run
+            self.gazetteer.sync(self.sheets_client)
+
             # Process feeds
-            signals = self.process_feeds()
+            signals = self.process_feeds(deadline)
             logger.info(f"Total signals found: {len(signals)}")
 
-            # Write to Google Sheets
-            self.write_to_sheets(signals)
+            # Write to the output sinks
+            rows_written = self.write_signals(signals)
+            self.sink.flush()
+            if self.profiles is not None:
+                self.profiles.flush()
+            self.commit_checkpoint()
 
             logger.info("Agent 3: Technical Debt Scanner - Complete")
             logger.info("=" * 60)
 
+            return {"signals_found": len(signals), "rows_written": rows_written}
+
         except Exception as e:
             logger.error(f"Error in agent execution: {e}", exc_info=True)
             raise
@@ -261,10 +767,16 @@ def main():
         return
 
     try:
-        scanner = TechnicalDebtScanner()
-        scanner.run()
+        processes = int(os.getenv("SHARD_PROCESSES", "1"))
+        if processes > 1:
+            ShardCoordinator(TechnicalDebtScanner, "process_feeds", processes).run()
+        else:
+            deadline = Deadline.from_env()
+            scanner = TechnicalDebtScanner()
+            scanner.run(deadline)
     except Exception as e:
         logger.error(f"Fatal error in Agent 3: {e}", exc_info=True)
+        send_alert("Agent 3 failed", str(e), key="agent_3:fatal")
         sys.exit(1)
 
 
@@ -2,60 +2,221 @@
 Agent 4: Regional News Monitor
 Monitors Reddit and regional sources for expansion, funding, and hiring signals
 """
+from shared.analysis import AnalysisPool, BatchAnalyzer
+from shared.checkpoint import Checkpoint, Deadline
+from shared.gazetteer import Gazetteer, load_seed_companies
+from shared.memo import memo_from_env
+from shared.profiles import DEFAULT_PROFILE, ProfileRouter
+from shared.recency import DEFAULT_MAX_AGE_HOURS, RecencyWindow
+from shared.reddit_client import MAX_SUBREDDITS_PER_MULTI, RedditListingClient
+from shared.records import RedditPost, Signal
+from shared.relevance import RelevanceEngine
+from shared.run_state import build_state_store
+from shared.scoring import MAX_SCORE, BatchScorer, keyword_categories
 from shared.sheets_client import SheetsClient
-from shared.utils import load_json_config, setup_logging, sanitize_text, get_timestamp, get_date
-
+from shared.sharding import ShardCoordinator, get_shard_config, select_shard
+from shared.sinks import build_sinks
+from shared.snapshots import SnapshotStore
+from shared.utils import (
+    LogSampler, load_json_config, setup_logging, sanitize_text, get_date, get_state_dir, send_alert
+)
+
+import json
+import math
 import os
 import sys
+import time
+from functools import partial
 # import logging
 import praw
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import numpy as np
+from typing import List, Dict, Optional, Set, Tuple
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 logger = setup_logging("agent_4")
 
+# Ordered signal-type rules: the first rule with a term inside a matched keyword wins
+SIGNAL_TYPE_RULES = [
+    ("Funding Announcement", ["funding", "raised", "series", "investment"]),
+    ("Hiring Expansion", ["hiring", "seeking", "positions"]),
+    ("Geographic Expansion", ["opening", "expanding", "new office"]),
+    ("Growth Signal", ["growing", "scaling", "doubled"]),
+]
+DEFAULT_SIGNAL_TYPE = "Regional Activity"
+REGIONAL_BONUS = 2
+
+
+def extract_company(gazetteer: Gazetteer, text: str) -> Optional[str]:
+    """
+    Extract company name from text
+
+    Args:
+        gazetteer: Known companies
+        text: Text to extract from
+
+    Returns:
+        Company name or None
+    """
+    # Known companies first (seed list and past Automation Queue rows)
+    known = gazetteer.first(text)
+    if known:
+        return known
+
+    # Look for common patterns
+    patterns = ["company called", "startup called", "working at", "working for", "joined"]
+
+    words = text.split()
+    for i, word in enumerate(words):
+        # word_lower = word.lower()
+        for pattern in patterns:
+            if pattern in " ".join(words[max(0, i - 2) : i + 1]).lower():
+                if i + 1 < len(words):
+                    potential_company = words[i + 1].strip(".,;:")
+                    if potential_company and potential_company[0].isupper():
+                        return potential_company
+
+    return None
+
 
 class RegionalNewsMonitor:
     """Monitors Reddit for regional business signals"""
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(
+        self,
+        config_dir: str = "config",
+        shard_index: int = None,
+        num_shards: int = None,
+        sheets_client: SheetsClient = None,
+        reddit=None,
+        listing: RedditListingClient = None,
+        deadline_seconds: float = None
+    ):
         """
         Initialize monitor
 
         Args:
             config_dir: Directory containing configuration files
+            shard_index: This instance's shard (defaults to SHARD_INDEX env var)
+            num_shards: Total shard count (defaults to SHARD_COUNT env var)
+            sheets_client: Existing Sheets client to use (defaults to a new one)
+            reddit: Existing PRAW client (defaults to one created on first use)
+            listing: Existing multireddit listing client (defaults to one created on first use)
+            deadline_seconds: Per-run time budget (defaults to RUN_DEADLINE_SECONDS / FUNCTION_TIMEOUT_SEC)
         """
         self.config_dir = config_dir
+        self.shard_index, self.num_shards = get_shard_config(shard_index, num_shards)
+        self.metrics = {}
 
         # Initialize Sheets client
-        self.sheets_client = SheetsClient()
+        self.sheets_client = sheets_client or SheetsClient()
+
+        # Output sinks (Sheets and/or local bulk backends, see OUTPUT_SINKS)
+        self.sink = build_sinks("agent_4", self.sheets_client, Signal.to_agent_4_row, "E")
+
+        # Reddit client is created lazily so offline use (replay) needs no credentials
+        self._reddit = reddit
+        self._listing = listing
+
+        # Raw snapshot archive (optional, for offline replay)
+        self.snapshots = None
+        if os.getenv("SNAPSHOTS_ENABLED", "false").lower() == "true":
+            self.snapshots = SnapshotStore(get_state_dir("snapshots", "agent_4"))
 
         # Load configuration
         self.sources = load_json_config(f"{config_dir}/agent_4_sources.json")
         self.keywords = load_json_config(f"{config_dir}/agent_4_keywords.json")
 
-        # Initialize Reddit client
-        self.reddit = praw.Reddit(
-            client_id=os.getenv("REDDIT_CLIENT_ID"),
-            client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-            user_agent=os.getenv("REDDIT_USER_AGENT"),
-        )
+        # Keep only the subreddits this shard owns
+        if self.num_shards > 1:
+            self.sources["subreddits"] = select_shard(self.sources["subreddits"], self.shard_index, self.num_shards)
+            logger.info(f"Shard {self.shard_index + 1}/{self.num_shards}")
 
         # Combine all keywords
         self.all_keywords = []
-        for category in self.keywords.values():
-            self.all_keywords.extend([kw.lower() for kw in category])
+        for category in keyword_categories(self.keywords).values():
+            self.all_keywords.extend(category)
 
         # Add regional keywords
         self.regional_keywords = [r.lower() for r in self.sources["regional_focus"]]
 
+        # Optional comment-thread scanning with per-run budgets
+        self.comment_scan = self.sources.get("comment_scan", {})
+        self._recent_posts: List[RedditPost] = []
+
+        # Run deadline; with one, covered subreddits are checkpointed so long lists finish over several runs
+        self.deadline_seconds = deadline_seconds
+        self.deadline = Deadline.from_env(deadline_seconds)
+        self.checkpoint = None
+        if self.deadline.enabled:
+            self.checkpoint = Checkpoint(
+                build_state_store(self.sheets_client, "checkpoints"),
+                f"agent_4_shard{self.shard_index}of{self.num_shards}",
+            )
+
+        # Known companies: local seed list plus names already in the Automation Queue
+        self.gazetteer = Gazetteer.load(os.path.join(get_state_dir(), "gazetteer.json"))
+        self.gazetteer.add_many(load_seed_companies(f"{config_dir}/company_seeds.json"))
+
+        # Vectorized scorer (applies per-keyword/category weights from the keyword file)
+        self.scorer = BatchScorer(self.keywords, self.regional_keywords, SIGNAL_TYPE_RULES, DEFAULT_SIGNAL_TYPE)
+
+        # Extra keyword profiles (config/profiles.json), matched in the same pass as the default keywords
+        self.profiles = ProfileRouter.from_config(
+            config_dir, "agent_4", self.scorer, self.sheets_client, Signal.to_agent_4_row, "E",
+            regional_keywords=self.regional_keywords, signal_type_rules=SIGNAL_TYPE_RULES,
+            default_signal_type=DEFAULT_SIGNAL_TYPE,
+        )
+
+        # Matching and company extraction, across worker processes for large batches (ANALYSIS_WORKERS)
+        self.analysis = AnalysisPool.from_env(BatchAnalyzer(
+            self.profiles.union if self.profiles is not None else self.scorer,
+            partial(extract_company, self.gazetteer),
+            require_regional=True,
+        ))
+
+        # Relevance model: "count" (capped weighted keyword count) or "bm25"
+        self.relevance = None
+        if os.getenv("RELEVANCE_MODEL", "count").lower() == "bm25":
+            self.relevance = RelevanceEngine(
+                self.all_keywords,
+                self.scorer.keyword_weights,
+                path=os.path.join(get_state_dir(), "relevance_agent_4.npz"),
+                matcher=self.scorer.matcher,
+            )
+
+        # Per-item analysis results keyed by content and keyword version (ANALYSIS_MEMO_ENABLED)
+        self.profile_names = [DEFAULT_PROFILE]
+        if self.profiles is not None:
+            self.profile_names += [profile.name for profile in self.profiles.profiles]
+        self.memo = memo_from_env(
+            f"agent_4_shard{self.shard_index}of{self.num_shards}", self.scorer, self.profiles,
+            base=[self.regional_keywords, SIGNAL_TYPE_RULES, DEFAULT_SIGNAL_TYPE, REGIONAL_BONUS],
+        )
+
         logger.info(f"Initialized with {len(self.sources['subreddits'])} subreddits")
         logger.info(f"Monitoring {len(self.all_keywords)} keywords")
         logger.info(f"Regional focus: {', '.join(self.sources['regional_focus'])}")
 
+    @property
+    def reddit(self):
+        """PRAW client, initialized on first use"""
+        if self._reddit is None:
+            self._reddit = praw.Reddit(
+                client_id=os.getenv("REDDIT_CLIENT_ID"),
+                client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+                user_agent=os.getenv("REDDIT_USER_AGENT"),
+            )
+        return self._reddit
+
+    @property
+    def listing(self) -> RedditListingClient:
+        """Multireddit listing client (REDDIT_LISTING=multireddit), initialized on first use"""
+        if self._listing is None:
+            self._listing = RedditListingClient()
+        return self._listing
+
     def check_keywords(self, text: str) -> Tuple[List[str], bool]:
         """
         Check if text contains keywords
@@ -66,6 +227,9 @@ class RegionalNewsMonitor:
         Returns:
             Tuple of (found_keywords, has_regional_keyword)
         """
+        if self.scorer.index is not None:
+            return self.scorer.index.match(text), bool(self.scorer.regional_index.match_ids(text))
+
         text_lower = text.lower()
         found_keywords = []
         has_regional = False
@@ -85,7 +249,7 @@ class RegionalNewsMonitor:
 
     def extract_company_name(self, text: str) -> Optional[str]:
         """
-        Extract company name from text
+        Extract company name from text (see extract_company)
 
         Args:
             text: Text to extract from
@@ -93,20 +257,7 @@ class RegionalNewsMonitor:
         Returns:
             Company name or None
         """
-        # Look for common patterns
-        patterns = ["company called", "startup called", "working at", "working for", "joined"]
-
-        words = text.split()
-        for i, word in enumerate(words):
-            # word_lower = word.lower()
-            for pattern in patterns:
-                if pattern in " ".join(words[max(0, i - 2) : i + 1]).lower():
-                    if i + 1 < len(words):
-                        potential_company = words[i + 1].strip(".,;:")
-                        if potential_company and potential_company[0].isupper():
-                            return potential_company
-
-        return None
+        return extract_company(self.gazetteer, text)
 
     def determine_signal_type(self, keywords: List[str]) -> str:
         """
@@ -118,34 +269,32 @@ class RegionalNewsMonitor:
         Returns:
             Signal type string
         """
-        keyword_str = " ".join(keywords).lower()
+        keywords = [kw.lower() for kw in keywords]
 
-        if any(x in keyword_str for x in ["funding", "raised", "series", "investment"]):
-            return "Funding Announcement"
-        elif any(x in keyword_str for x in ["hiring", "seeking", "positions"]):
-            return "Hiring Expansion"
-        elif any(x in keyword_str for x in ["opening", "expanding", "new office"]):
-            return "Geographic Expansion"
-        elif any(x in keyword_str for x in ["growing", "scaling", "doubled"]):
-            return "Growth Signal"
-        else:
-            return "Regional Activity"
+        for signal_type, terms in SIGNAL_TYPE_RULES:
+            if any(term in kw for kw in keywords for term in terms):
+                return signal_type
 
-    def analyze_post(self, post) -> Optional[Dict]:
+        return DEFAULT_SIGNAL_TYPE
+
+    def analyze_post(self, post: RedditPost) -> Optional[Signal]:
         """
         Analyze a Reddit post for relevant signals
 
         Args:
-            post: PRAW submission object
+            post: Reddit post
 
         Returns:
-            Signal dict or None
+            Signal or None
         """
         full_text = f"{post.title} {post.selftext}"
 
         # Check for keywords
         found_keywords, has_regional = self.check_keywords(full_text)
 
+        # BM25 observes every post so corpus statistics include non-matches
+        base_score = self._relevance_points(full_text, found_keywords, post.permalink)
+
         # Must have both business signal AND regional keyword
         if not (found_keywords and has_regional):
             return None
@@ -157,24 +306,161 @@ class RegionalNewsMonitor:
         signal_type = self.determine_signal_type(found_keywords)
 
         # Calculate relevance score
-        base_score = len(found_keywords) * 2
-        regional_bonus = 2 if has_regional else 0
+        regional_bonus = REGIONAL_BONUS if has_regional else 0
         upvote_bonus = min(post.score // 10, 3)  # Up to 3 points for popular posts
-        relevance_score = min(base_score + regional_bonus + upvote_bonus, 10)
-
-        return {
-            "company_name": company_name or "Unknown",
-            "signal_type": signal_type,
-            "signal_description": ", ".join(found_keywords[:3]),
-            "source_url": f"https://reddit.com{post.permalink}",
-            "source": f"Reddit r/{post.subreddit.display_name}",
-            "detected_date": get_date(),
-            "relevance_score": relevance_score,
-            "title": sanitize_text(post.title, 200),
-            "summary": sanitize_text(post.selftext, 500) if post.selftext else sanitize_text(post.title, 500),
-        }
-
-    def monitor_subreddit(self, subreddit_name: str) -> List[Dict]:
+        relevance_score = min(int(round(base_score + regional_bonus + upvote_bonus)), MAX_SCORE)
+
+        return self._build_signal(post, found_keywords, company_name, signal_type, relevance_score)
+
+    def _relevance_points(self, full_text: str, found_keywords: List[str], doc_id: str) -> float:
+        """
+        Compute keyword relevance points (before bonuses) with the configured model
+
+        Args:
+            full_text: Post text
+            found_keywords: Matched keywords
+            doc_id: Stable document id (permalink)
+
+        Returns:
+            Points before bonuses and capping
+        """
+        if self.relevance is not None:
+            return self.relevance.score(full_text, found_keywords, doc_id)
+        return self.scorer.keyword_score(found_keywords)
+
+    def _build_signal(
+        self,
+        post: RedditPost,
+        found_keywords: List[str],
+        company_name: Optional[str],
+        signal_type: str,
+        score: int
+    ) -> Signal:
+        """
+        Build a signal for a matched post
+
+        Args:
+            post: Reddit post
+            found_keywords: Matched keywords
+            company_name: Extracted company name, if any
+            signal_type: Signal type
+            score: Relevance score
+
+        Returns:
+            Signal
+        """
+        return Signal(
+            company_name=company_name or "Unknown",
+            signal_type=signal_type,
+            signal_description=", ".join(found_keywords[:3]),
+            source_url=f"https://reddit.com{post.permalink}",
+            source=f"Reddit r/{post.subreddit}",
+            detected_date=get_date(),
+            relevance_score=score,
+            title=sanitize_text(post.title, 200),
+            summary=sanitize_text(post.selftext, 500) if post.selftext else sanitize_text(post.title, 500),
+        )
+
+    def analyze_posts(self, posts: List[RedditPost]) -> List[Signal]:
+        """
+        Analyze a batch of Reddit posts with the vectorized scorer
+
+        Produces the same signals as calling analyze_post on each post,
+        but matches and scores the whole batch at once. With the analysis
+        memo, posts whose text and upvote bonus were analyzed before under
+        the same keywords are not analyzed again.
+
+        Args:
+            posts: Reddit posts
+
+        Returns:
+            Signals for the posts that matched, in input order, followed by
+            keyword-profile signals (Signal.profile set)
+        """
+        if not posts:
+            return []
+
+        texts = [f"{post.title} {post.selftext}" for post in posts]
+        # The upvote bonus is part of the score, so it is part of the memo key
+        buckets = [str(min(post.score // 10, 3)) for post in posts]
+        results = self.memo.lookup(texts, buckets) if self.memo is not None else [None] * len(texts)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            analyzed = self._analyze_texts([posts[i] for i in pending], [texts[i] for i in pending])
+            for i, result in zip(pending, analyzed):
+                results[i] = result
+                if self.memo is not None:
+                    self.memo.store(texts[i], result, buckets[i])
+
+        signals = []
+        for profile in self.profile_names:
+            for post, result in zip(posts, results):
+                if profile in result:
+                    found_keywords, score, signal_type, company_name = result[profile]
+                    signal = self._build_signal(post, found_keywords, company_name, signal_type, score)
+                    signal.profile = profile
+                    signals.append(signal)
+        return signals
+
+    def _analyze_texts(self, posts: List[RedditPost], texts: List[str]) -> List[Dict]:
+        """
+        Match, score and extract companies for a batch of posts
+
+        Args:
+            posts: Reddit posts
+            texts: Their texts (title + body)
+
+        Returns:
+            Per post: profile -> [matched keywords, score, signal type, company name]
+            for each profile it matched (with a regional keyword)
+        """
+        upvotes = [post.score for post in posts]
+        # Companies come back for every post with a regional term that hit any profile's keywords
+        hits, has_regional, companies = self.analysis.analyze(texts)
+        routed = {}
+        if self.profiles is None:
+            scores = self.scorer.score_hits(hits, has_regional, upvotes=upvotes, regional_bonus=REGIONAL_BONUS)
+        else:
+            scores, routed = self.profiles.score_hits(
+                hits, has_regional, upvotes=upvotes, regional_bonus=REGIONAL_BONUS
+            )
+
+        # Must have both business signal AND regional keyword
+        has_keywords = scores.keyword_counts() > 0
+        matched = has_keywords & scores.has_regional
+
+        if self.relevance is not None:
+            for i, post in enumerate(posts):
+                found_keywords = scores.keywords_for(i) if has_keywords[i] else []
+                points = self.relevance.score(texts[i], found_keywords, post.permalink)
+                points += REGIONAL_BONUS if scores.has_regional[i] else 0
+                points += min(post.score // 10, 3)
+                scores.scores[i] = min(int(round(points)), MAX_SCORE)
+
+        results: List[Dict] = [{} for _ in posts]
+        for i in np.flatnonzero(matched).tolist():
+            results[i][DEFAULT_PROFILE] = [
+                scores.keywords_for(i), int(scores.scores[i]), scores.signal_types[i], companies[i]
+            ]
+        for profile, (rows, profile_scores) in routed.items():
+            for j in np.flatnonzero(profile_scores.has_regional).tolist():
+                i = int(rows[j])
+                results[i][profile] = [
+                    profile_scores.keywords_for(j), int(profile_scores.scores[j]), profile_scores.signal_types[j],
+                    companies[i]
+                ]
+        return results
+
+    def recency_window(self) -> RecencyWindow:
+        """
+        Build the post recency window (max_age_hours in agent_4_sources.json, default 24)
+
+        Returns:
+            RecencyWindow
+        """
+        return RecencyWindow(self.sources.get("max_age_hours", DEFAULT_MAX_AGE_HOURS))
+
+    def monitor_subreddit(self, subreddit_name: str) -> List[Signal]:
         """
         Monitor a single subreddit
 
@@ -184,107 +470,342 @@ class RegionalNewsMonitor:
         Returns:
             List of signals found
         """
-        signals = []
-
         try:
             logger.info(f"Monitoring r/{subreddit_name}")
             subreddit = self.reddit.subreddit(subreddit_name)
 
-            # Check posts from last 24 hours
-            for post in subreddit.new(limit=50):
-                # Check if post is recent (last 24 hours)
-                post_time = datetime.fromtimestamp(post.created_utc)
-                if datetime.now() - post_time > timedelta(hours=24):
-                    continue
+            # Newest first: stop at the first post older than the window (UTC epoch comparison)
+            posts = (RedditPost.from_praw(submission) for submission in subreddit.new(limit=50))
+            recent_posts = list(self.recency_window().take(posts, lambda post: post.created_utc))
 
-                signal = self.analyze_post(post)
-                if signal:
-                    signals.append(signal)
-                    logger.info(f"Found signal: {signal['title'][:50]}... (score: {signal['relevance_score']})")
+            return self._process_listing(subreddit_name, recent_posts)
 
         except Exception as e:
             logger.error(f"Error monitoring r/{subreddit_name}: {e}")
+            send_alert(f"Agent 4: r/{subreddit_name} failing", str(e), key=f"subreddit:{subreddit_name}")
+            return []
+
+    def monitor_multireddit(self) -> List[Signal]:
+        """
+        Monitor the configured subreddits through combined multireddit listings
+
+        Subreddits already covered this cycle are skipped. Each multireddit is
+        checkpointed once its listing has been read down to the cutoff; one cut
+        short by the run deadline is read again next run.
+
+        Returns:
+            List of signals found
+        """
+        subreddits = self.sources["subreddits"]
+        if self.checkpoint is not None:
+            subreddits = self.checkpoint.pending(subreddits)
+        logger.info(f"Monitoring {len(subreddits)} subreddits via multireddit listing")
+
+        signals = []
+        cutoff = self.recency_window().cutoff
+        slowest = 0.0
+        for i in range(0, len(subreddits), MAX_SUBREDDITS_PER_MULTI):
+            if self.deadline.should_stop(slowest):
+                logger.warning(f"Run deadline approaching; deferring {len(subreddits) - i} subreddits")
+                break
+            chunk = subreddits[i:i + MAX_SUBREDDITS_PER_MULTI]
+            started = time.monotonic()
+            try:
+                posts = self.listing.fetch_new(chunk, cutoff, deadline=self.deadline)
+                # The listing may have stopped paging before the cutoff (deadline or page limit)
+                complete = not self.listing.truncated
+            except Exception as e:
+                logger.error(f"Error fetching multireddit listing: {e}")
+                send_alert("Agent 4: multireddit listing failing", str(e), key="agent_4:multireddit")
+                posts, complete = [], True
+            finally:
+                self.metrics["api_requests"] = self.listing.requests_made
+            slowest = max(slowest, time.monotonic() - started)
+
+            # Group by subreddit so analysis and snapshots stay per source
+            by_subreddit = {name.lower(): [] for name in chunk}
+            for post in posts:
+                by_subreddit.setdefault(post.subreddit.lower(), []).append(post)
+            for name in chunk:
+                signals.extend(self._process_listing(name, by_subreddit[name.lower()]))
+
+            if not complete:
+                logger.warning(f"Listing cut short; deferring {len(subreddits) - i} subreddits")
+                break
+            self.metrics["sources_processed"] += len(chunk)
+            if self.checkpoint is not None:
+                for name in chunk:
+                    self.checkpoint.mark_done(name)
+
+        self.metrics["sources_deferred"] = len(subreddits) - self.metrics["sources_processed"]
+        return signals
 
+    def _process_listing(self, subreddit_name: str, recent_posts: List[RedditPost]) -> List[Signal]:
+        """
+        Analyze one subreddit's recent posts and archive the listing
+
+        Args:
+            subreddit_name: Subreddit name
+            recent_posts: Posts inside the recency window
+
+        Returns:
+            List of signals found
+        """
+        signals = []
+        self.metrics["items_analyzed"] = self.metrics.get("items_analyzed", 0) + len(recent_posts)
+        self._recent_posts.extend(recent_posts)
+
+        sampler = LogSampler(logger)
+        for signal in self.analyze_posts(recent_posts):
+            signals.append(signal)
+            sampler.log(f"Found signal: {signal.title[:50]}... (score: {signal.relevance_score})")
+        sampler.summary(f"signals in r/{subreddit_name}")
+
+        if self.snapshots is not None:
+            digest = self.snapshots.put(self.serialize_posts(recent_posts))
+            self.snapshots.record(
+                digest, subreddit_name, [signal for signal in signals if signal.profile == DEFAULT_PROFILE]
+            )
+
+        return signals
+
+    @staticmethod
+    def thread_priority(post: RedditPost, now: float) -> float:
+        """
+        Rank a thread for comment scanning by post score and comment velocity
+
+        Args:
+            post: Reddit post
+            now: Current Unix time
+
+        Returns:
+            Priority (higher scans first)
+        """
+        age_hours = max((now - post.created_utc) / 3600, 0.25)
+        return math.log1p(max(post.score, 0)) + math.log1p(post.num_comments / age_hours)
+
+    def scan_comments(self, posts: List[RedditPost], signaled_urls: Set[str]) -> List[Signal]:
+        """
+        Scan comment threads for signals within the per-run comment budget
+
+        Threads are visited in thread_priority order, skipping posts that
+        already produced a signal, until the request, comment or time budget
+        (comment_scan in agent_4_sources.json) runs out. Comments go through
+        the same keyword and regional matching as posts.
+
+        Args:
+            posts: Recent posts from this run
+            signaled_urls: Source URLs of signals already found
+
+        Returns:
+            Signals found in comments
+        """
+        max_requests = self.comment_scan.get("max_requests", 20)
+        max_comments = self.comment_scan.get("max_comments", 2000)
+        time_limit = self.comment_scan.get("time_limit_seconds", 60)
+        deadline = time.monotonic() + min(time_limit, self.deadline.remaining() - self.deadline.margin)
+
+        now = time.time()
+        threads = [
+            post for post in posts
+            if post.num_comments > 0 and f"https://reddit.com{post.permalink}" not in signaled_urls
+        ]
+        threads.sort(key=lambda post: self.thread_priority(post, now), reverse=True)
+
+        comments: List[RedditPost] = []
+        requests_made = 0
+        for post in threads:
+            remaining = deadline - time.monotonic()
+            if requests_made >= max_requests or len(comments) >= max_comments or remaining <= 0:
+                break
+            requests_made += 1
+            try:
+                thread = self.listing.fetch_comments(post.permalink, max_comments - len(comments), timeout=remaining)
+            except Exception as e:
+                logger.warning(f"Error fetching comments for {post.permalink}: {e}")
+                continue
+            comments.extend(thread[:max_comments - len(comments)])
+
+        self.metrics["comment_requests"] = requests_made
+        self.metrics["comments_scanned"] = len(comments)
+
+        signals = self.analyze_posts(comments)
+        logger.info(f"Scanned {len(comments)} comments in {requests_made} threads: {len(signals)} signals")
         return signals
 
-    def process_subreddits(self) -> List[Dict]:
+    @staticmethod
+    def serialize_posts(posts: List[RedditPost]) -> bytes:
+        """
+        Serialize a listing for the snapshot store
+
+        Args:
+            posts: Reddit posts
+
+        Returns:
+            JSON document bytes
+        """
+        return json.dumps([post.to_dict() for post in posts], sort_keys=True).encode("utf-8")
+
+    @staticmethod
+    def parse_posts(content: bytes) -> List[RedditPost]:
+        """
+        Decode a serialized listing
+
+        Args:
+            content: JSON document from serialize_posts
+
+        Returns:
+            List of Reddit posts
+        """
+        return [RedditPost.from_dict(item) for item in json.loads(content)]
+
+    def replay_snapshot(self, content: bytes, source: str, cutoff: Optional[float] = None) -> List[Signal]:
+        """
+        Analyze an archived listing (no network, no writes)
+
+        Args:
+            content: Serialized listing
+            source: Subreddit name
+            cutoff: Unused; listings are archived after the recency window is applied
+
+        Returns:
+            Signals produced by the current configuration
+        """
+        signals = self.analyze_posts(self.parse_posts(content))
+        return [signal for signal in signals if signal.profile == DEFAULT_PROFILE]
+
+    def process_subreddits(self, deadline: Optional[Deadline] = None) -> List[Signal]:
         """
         Process all configured subreddits
 
+        Args:
+            deadline: Run deadline started by run() (defaults to one starting now)
+
         Returns:
             List of all signals found
         """
         all_signals = []
+        self.metrics = {"sources_processed": 0, "items_analyzed": 0, "signals_found": 0}
+        self._recent_posts = []
+        self.deadline = deadline or Deadline.from_env(self.deadline_seconds)
 
-        for subreddit_name in self.sources["subreddits"]:
-            signals = self.monitor_subreddit(subreddit_name)
-            all_signals.extend(signals)
-
+        if os.getenv("REDDIT_LISTING", "praw").lower() == "multireddit":
+            all_signals = self.monitor_multireddit()
+        else:
+            # Subreddits are listed in priority order; skip those already covered this cycle
+            subreddits = self.sources["subreddits"]
+            if self.checkpoint is not None:
+                subreddits = self.checkpoint.pending(subreddits)
+
+            slowest = 0.0
+            for subreddit_name in subreddits:
+                if self.deadline.should_stop(slowest):
+                    deferred = len(subreddits) - self.metrics["sources_processed"]
+                    logger.warning(f"Run deadline approaching; deferring {deferred} subreddits")
+                    break
+                started = time.monotonic()
+                signals = self.monitor_subreddit(subreddit_name)
+                slowest = max(slowest, time.monotonic() - started)
+                all_signals.extend(signals)
+                self.metrics["sources_processed"] += 1
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_done(subreddit_name)
+            self.metrics["sources_deferred"] = len(subreddits) - self.metrics["sources_processed"]
+
+        if self.comment_scan.get("enabled"):
+            signaled = {signal.source_url for signal in all_signals if signal.profile == DEFAULT_PROFILE}
+            all_signals.extend(self.scan_comments(self._recent_posts, signaled))
+
+        self.metrics["signals_found"] = len(all_signals)
+        self.flush()
         return all_signals
 
-    def write_to_sheets(self, signals: List[Dict]):
+    def flush(self):
+        """Persist in-memory state (corpus statistics, gazetteer, analysis memo) and stop analysis workers"""
+        self.analysis.close()
+        if self.relevance is not None:
+            self.relevance.save()
+        if self.memo is not None:
+            self.memo.save()
+        self.gazetteer.save()
+
+    def commit_checkpoint(self):
+        """Persist which subreddits this cycle has covered (call once the run's signals are written)"""
+        if self.checkpoint is not None:
+            self.checkpoint.save(complete=self.metrics.get("sources_deferred", 0) == 0)
+
+    def write_signals(self, signals: List[Signal]) -> int:
         """
-        Write signals to Google Sheets
+        Write signals through the configured output sinks
 
         Args:
-            signals: List of signal dicts
+            signals: List of signals
+
+        Returns:
+            Number of rows written to the primary (first configured) sink
         """
+        if self.profiles is not None:
+            signals = self.profiles.write(signals, self.metrics)
+
         if not signals:
             logger.info("No signals to write")
-            return
-
-        logger.info(f"Writing {len(signals)} signals to Google Sheets")
-
-        # Prepare rows for Automation Queue tab
-        rows = []
-        for signal in signals:
-            # Skip duplicates
-            if self.sheets_client.check_duplicate("Automation Queue", "E", signal["source_url"]):
-                logger.info(f"Skipping duplicate: {signal['source_url']}")
-                continue
+            return 0
 
-            row = [
-                get_timestamp(),  # Timestamp
-                signal["company_name"],
-                signal["signal_type"],
-                signal["signal_description"],
-                signal["source_url"],
-                signal["detected_date"],
-                "Agent 4",
-                "Pending Review",
-                "",  # Notes
-                signal["relevance_score"],
-            ]
-            rows.append(row)
-
-        if not rows:
-            logger.info("No new signals to write (all duplicates)")
-            return
+        logger.info(f"Writing {len(signals)} signals to {', '.join(sink.name for sink in self.sink.sinks)}")
 
         try:
-            self.sheets_client.append_rows("Automation Queue", rows)
-            logger.info(f"Successfully wrote {len(rows)} rows to Automation Queue")
+            written = self.sink.write(signals)
         except Exception as e:
-            logger.error(f"Error writing to sheets: {e}")
+            logger.error(f"Error writing signals: {e}")
             raise
 
-    def run(self):
-        """Main execution method"""
+        for name, count in written.items():
+            self.metrics[f"rows_written_{name}"] = count
+            logger.info(f"Wrote {count} rows to {name}")
+
+        return next(iter(written.values()), 0)
+
+    def run(self, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Main execution method
+
+        Args:
+            deadline: Run deadline started by the caller (defaults to one starting now)
+
+        Returns:
+            Run summary dict
+        """
+        # Recovery and the gazetteer sync count against the run's budget too
+        deadline = deadline or Deadline.from_env(self.deadline_seconds)
         logger.info("=" * 60)
         logger.info("Agent 4: Regional News Monitor - Starting")
         logger.info("=" * 60)
 
         try:
+            # Finish any Sheets batch a previous run left unacknowledged
+            self.sink.recover()
+            if self.profiles is not None:
+                self.profiles.recover()
+
+            # Learn company names added to the Automation Queue since the last run
+            self.gazetteer.sync(self.sheets_client)
+
             # Process subreddits
-            signals = self.process_subreddits()
+            signals = self.process_subreddits(deadline)
             logger.info(f"Total signals found: {len(signals)}")
 
-            # Write to Google Sheets
-            self.write_to_sheets(signals)
+            # Write to the output sinks
+            rows_written = self.write_signals(signals)
+            self.sink.flush()
+            if self.profiles is not None:
+                self.profiles.flush()
+            self.commit_checkpoint()
 
             logger.info("Agent 4: Regional News Monitor - Complete")
             logger.info("=" * 60)
 
+            return {"signals_found": len(signals), "rows_written": rows_written}
+
         except Exception as e:
             logger.error(f"Error in agent execution: {e}", exc_info=True)
             raise
@@ -297,10 +818,16 @@ def main():
         return
 
     try:
-        monitor = RegionalNewsMonitor()
-        monitor.run()
+        processes = int(os.getenv("SHARD_PROCESSES", "1"))
+        if processes > 1:
+            ShardCoordinator(RegionalNewsMonitor, "process_subreddits", processes).run()
+        else:
+            deadline = Deadline.from_env()
+            monitor = RegionalNewsMonitor()
+            monitor.run(deadline)
     except Exception as e:
         logger.error(f"Fatal error in Agent 4: {e}", exc_info=True)
+        send_alert("Agent 4 failed", str(e), key="agent_4:fatal")
         sys.exit(1)
 
 
@@ -0,0 +1,180 @@
+"""
+Per-company aggregation of Automation Queue rows
+
+Without aggregation every matching item is its own row, so a company
+mentioned ten times in a week becomes ten rows that reviewers merge by
+hand. With AGGREGATE_BY_COMPANY=true the Sheets sink first groups a batch
+by normalized company name (queue_mirror.company_key):
+
+- A company that already has an agent row is updated in place: the row's
+  score becomes the highest seen, its Signal Details gain the new terms
+  and the new source URLs ("also <url>"), and its Last Seen column moves
+  forward. Updates for the whole batch go out in batched
+  values.batchUpdate calls.
+- Signals for a company with no row yet are merged into one new row.
+
+The URL cell always holds one URL (the row's first source), so journal
+idempotency keys and URL-column duplicate checks keep working; the mirror
+indexes the extra sources from Signal Details, and the date columns keep
+the day the company was first queued.
+- Signals without a usable company name ("Unknown") are appended as before.
+
+Existing rows are found through the local queue mirror's company -> row
+index, so no sheet scan is needed; aggregation turns the mirror on.
+"""
+
+import logging
+from typing import Dict, List, Union
+
+from shared.queue_mirror import QueueMirror, company_key
+from shared.records import AUTOMATION_QUEUE, QUEUE_LAYOUTS, Signal
+from shared.utils import column_letter
+
+logger = logging.getLogger(__name__)
+
+MAX_RANGES_PER_REQUEST = 500
+AGGREGATED_FIELDS = ("details", "score", "url", "last_seen")
+
+
+def _terms(details: str) -> List[str]:
+    return [term.strip() for term in str(details).split(",") if term.strip()]
+
+
+def _source_terms(urls: List[str], canonical: str) -> List[str]:
+    return [f"also {url}" for url in dict.fromkeys(urls) if url != canonical]
+
+
+def merge_signals(signals: List[Signal]) -> Signal:
+    """
+    Merge one company's signals into a single signal
+
+    Args:
+        signals: Signals for the same company
+
+    Returns:
+        Signal with the best-scoring signal's type, title, summary and source
+        URL, every distinct detail term plus the other source URLs, and the
+        latest date
+    """
+    if len(signals) == 1:
+        return signals[0]
+    best = max(signals, key=lambda signal: signal.relevance_score)
+    details = [term for signal in signals for term in _terms(signal.signal_description)]
+    details += _source_terms([signal.source_url for signal in signals], best.source_url)
+    return Signal(
+        company_name=best.company_name,
+        signal_type=best.signal_type,
+        signal_description=", ".join(dict.fromkeys(details)),
+        source_url=best.source_url,
+        source=best.source,
+        detected_date=max(signal.detected_date for signal in signals),
+        relevance_score=best.relevance_score,
+        title=best.title,
+        summary=best.summary,
+        profile=best.profile,
+    )
+
+
+class CompanyAggregator:
+    """Folds batches of signals into existing company rows"""
+
+    def __init__(self, mirror: QueueMirror, sheets_client, sheet_name: str = AUTOMATION_QUEUE):
+        """
+        Initialize aggregator
+
+        Args:
+            mirror: Mirror of the tab (company -> row index; synced by the sink before each write)
+            sheets_client: SheetsClient for the row updates
+            sheet_name: Tab
+        """
+        self.mirror = mirror
+        self.sheets_client = sheets_client
+        self.sheet_name = sheet_name
+        self.rows_updated = 0
+
+    def apply(self, signals: List[Signal], dedup) -> List[Signal]:
+        """
+        Update existing company rows and merge the remaining signals per company
+
+        Args:
+            signals: Signals accepted by the sink
+            dedup: Duplicate checker of the write (URLs folded into rows are recorded in it)
+
+        Returns:
+            Signals still to append: one per new company plus those without a
+            company name, in order of first appearance
+        """
+        order: List[Union[str, Signal]] = []
+        groups: Dict[str, List[Signal]] = {}
+        batch_urls = set()
+        for signal in signals:
+            if signal.source_url in batch_urls or dedup.seen(signal.source_url):
+                continue
+            batch_urls.add(signal.source_url)
+            key = company_key(signal.company_name)
+            if key is None:
+                order.append(signal)
+                continue
+            if key not in groups:
+                order.append(key)
+            groups.setdefault(key, []).append(signal)
+
+        data, updated = [], {}
+        for key, group in groups.items():
+            row = self.mirror.row_for_company(key)
+            if row is None:
+                continue
+            cells = self._merge(row, group)
+            layout = QUEUE_LAYOUTS[row["agent"]]
+            for field in AGGREGATED_FIELDS:
+                index = layout[field]
+                if index >= len(row["cells"]) or str(cells[index]) != str(row["cells"][index]):
+                    cell = f"{self.sheet_name}!{column_letter(index)}{row['row']}"
+                    data.append({"range": cell, "values": [[cells[index]]]})
+            updated[key] = (row["row"], cells)
+
+        for start in range(0, len(data), MAX_RANGES_PER_REQUEST):
+            self.sheets_client.batch_update(data[start:start + MAX_RANGES_PER_REQUEST])
+        for key, (number, cells) in updated.items():
+            self.mirror.update_row(number, cells)
+            for signal in groups[key]:
+                dedup.add(signal.source_url)
+        if updated:
+            self.rows_updated += len(updated)
+            logger.info(f"Aggregation: updated {len(updated)} company rows in {self.sheet_name}")
+
+        remaining = []
+        for item in order:
+            if isinstance(item, Signal):
+                remaining.append(item)
+            elif item not in updated:
+                merged = merge_signals(groups[item])
+                # The merged row's URL cell holds only its own URL; record the others for other writers this run
+                for signal in groups[item]:
+                    if signal.source_url != merged.source_url:
+                        dedup.add(signal.source_url)
+                remaining.append(merged)
+        return remaining
+
+    @staticmethod
+    def _merge(row: Dict, signals: List[Signal]) -> List:
+        layout = QUEUE_LAYOUTS[row["agent"]]
+        cells = list(row["cells"])
+        cells.extend([""] * (max(layout.values()) + 1 - len(cells)))
+
+        # Keep one URL in the URL cell (rows from older versions may hold several, one per line)
+        urls = str(cells[layout["url"]]).split() + [signal.source_url for signal in signals]
+        cells[layout["url"]] = urls[0]
+
+        details = _terms(cells[layout["details"]]) + [t for s in signals for t in _terms(s.signal_description)]
+        details += _source_terms(urls, urls[0])
+        cells[layout["details"]] = ", ".join(dict.fromkeys(details))
+
+        try:
+            score = int(float(cells[layout["score"]]))
+        except (TypeError, ValueError):
+            score = 0
+        cells[layout["score"]] = max([score] + [signal.relevance_score for signal in signals])
+
+        cells[layout["last_seen"]] = max([str(cells[layout["last_seen"]])] + [s.detected_date for s in signals])
+        return cells
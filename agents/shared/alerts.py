@@ -0,0 +1,424 @@
+"""
+Asynchronous, coalescing alert dispatcher
+
+send_alert() only enqueues; a background thread delivers. Alerts with the
+same key (e.g. one dead feed) are coalesced: the first occurrence opens a
+window of ALERT_COALESCE_SECONDS, and everything arriving in it goes out as
+one message with an occurrence count. Each key is also rate limited to one
+delivery per ALERT_RATE_LIMIT_SECONDS; the limit is persisted in
+STATE_DIR/alerts.json, so it holds across runs on the same host or instance
+(the worker, a warm Cloud Functions instance) but is per instance: a fresh
+instance alerts again. Alerts are most needed when Sheets is failing, so the
+state is deliberately not kept in the spreadsheet. Occurrences suppressed by
+the limit are folded into the key's next delivery. Delivery retries each backend a
+bounded number of times with exponential backoff, and flush() (called at
+shutdown) sends whatever is pending.
+
+Backends: Slack-compatible webhook (SLACK_WEBHOOK_URL) and SMTP
+(ALERT_EMAIL_FROM / ALERT_EMAIL_TO / ALERT_EMAIL_PASSWORD, server from
+ALERT_SMTP_HOST / ALERT_SMTP_PORT).
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from shared.utils import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+class Alert:
+    """A pending alert and how many times its key fired"""
+
+    __slots__ = ("key", "subject", "message", "first_at", "count")
+
+    def __init__(self, key: str, subject: str, message: str, first_at: float, count: int = 1):
+        self.key = key
+        self.subject = subject
+        self.message = message
+        self.first_at = first_at
+        self.count = count
+
+
+class WebhookBackend:
+    """Posts alerts to a Slack-compatible incoming webhook"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None, timeout: float = 10.0):
+        """
+        Initialize backend
+
+        Args:
+            url: Webhook URL
+            session: HTTP session (defaults to a new one)
+            timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def send(self, subject: str, message: str):
+        """
+        Deliver one alert (raises on failure)
+
+        Args:
+            subject: Alert subject
+            message: Alert body
+        """
+        response = self.session.post(self.url, json={"text": f"*{subject}*\n{message}"}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class SmtpBackend:
+    """Emails alerts through an SMTP server"""
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        sender: str,
+        recipients: Sequence[str],
+        password: Optional[str] = None,
+        host: str = "smtp.gmail.com",
+        port: int = 587,
+        starttls: bool = True,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize backend
+
+        Args:
+            sender: From address (also the login user)
+            recipients: To addresses
+            password: Login password (no login without one)
+            host: SMTP server
+            port: SMTP port
+            starttls: Upgrade the connection with STARTTLS
+            timeout: Connection timeout in seconds
+        """
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.password = password
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, subject: str, message: str):
+        """
+        Deliver one alert (raises on failure)
+
+        Args:
+            subject: Alert subject
+            message: Alert body
+        """
+        email = EmailMessage()
+        email["Subject"] = subject
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email.set_content(message)
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.password:
+                server.login(self.sender, self.password)
+            server.send_message(email)
+
+
+class AlertState:
+    """Per-key last delivery time and suppressed occurrences, persisted between runs"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize state
+
+        Args:
+            path: JSON file (None keeps state in memory only)
+        """
+        self.path = path
+        self.keys: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.keys = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable alert state {path}: {e}")
+
+    def last_sent(self, key: str) -> float:
+        """Unix time of the key's last delivery (0 if never)"""
+        return self.keys.get(key, {}).get("last_sent", 0.0)
+
+    def suppressed(self, key: str) -> int:
+        """Occurrences held back since the key's last delivery"""
+        return self.keys.get(key, {}).get("suppressed", 0)
+
+    def mark_sent(self, key: str, now: float):
+        """Record a delivery"""
+        self.keys[key] = {"last_sent": now, "suppressed": 0}
+
+    def suppress(self, key: str, count: int):
+        """Record occurrences that were not delivered"""
+        entry = self.keys.setdefault(key, {"last_sent": 0.0, "suppressed": 0})
+        entry["suppressed"] += count
+
+    def save(self):
+        """Write the state to disk"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.keys, f)
+        os.replace(tmp_path, self.path)
+
+
+class _Flush:
+    """Queue marker: send everything pending, then set the event"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class AlertDispatcher:
+    """Background-thread alert delivery with per-key coalescing and rate limiting"""
+
+    def __init__(
+        self,
+        backends: Sequence,
+        coalesce_seconds: float = 60.0,
+        rate_limit_seconds: float = 3600.0,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        max_queue: int = 1000,
+        state: Optional[AlertState] = None
+    ):
+        """
+        Initialize dispatcher (the thread starts on the first alert)
+
+        Args:
+            backends: Delivery backends (none: alerts are only logged)
+            coalesce_seconds: Window after a key's first occurrence in which repeats are merged
+            rate_limit_seconds: Minimum seconds between deliveries for one key
+            max_retries: Delivery attempts per backend
+            retry_backoff: First retry delay in seconds (doubles per attempt)
+            max_queue: Alerts buffered before new ones are dropped
+            state: Rate-limit state (defaults to in-memory)
+        """
+        self.backends = list(backends)
+        self.coalesce_seconds = coalesce_seconds
+        self.rate_limit_seconds = rate_limit_seconds
+        self.max_retries = max(max_retries, 1)
+        self.retry_backoff = retry_backoff
+        self.state = state or AlertState()
+
+        self.pending: Dict[str, Alert] = {}
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AlertDispatcher":
+        """
+        Build a dispatcher from the environment
+
+        Returns:
+            AlertDispatcher with the configured backends
+        """
+        backends: List = []
+        if os.getenv("SLACK_WEBHOOK_URL"):
+            backends.append(WebhookBackend(os.environ["SLACK_WEBHOOK_URL"]))
+        if os.getenv("ALERT_EMAIL_FROM") and os.getenv("ALERT_EMAIL_TO"):
+            backends.append(SmtpBackend(
+                os.environ["ALERT_EMAIL_FROM"],
+                [addr.strip() for addr in os.environ["ALERT_EMAIL_TO"].split(",") if addr.strip()],
+                os.getenv("ALERT_EMAIL_PASSWORD") or None,
+                host=os.getenv("ALERT_SMTP_HOST", "smtp.gmail.com"),
+                port=int(os.getenv("ALERT_SMTP_PORT", "587")),
+            ))
+        return cls(
+            backends,
+            coalesce_seconds=float(os.getenv("ALERT_COALESCE_SECONDS", "60")),
+            rate_limit_seconds=float(os.getenv("ALERT_RATE_LIMIT_SECONDS", "3600")),
+            max_retries=int(os.getenv("ALERT_MAX_RETRIES", "3")),
+            state=AlertState(os.path.join(get_state_dir(), "alerts.json")),
+        )
+
+    def send(self, subject: str, message: str, key: Optional[str] = None):
+        """
+        Queue an alert without blocking
+
+        Args:
+            subject: Alert subject
+            message: Alert body
+            key: Coalescing / rate-limit key (defaults to the subject)
+        """
+        if not self.backends:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(Alert(key or subject, subject, message, time.monotonic()))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Deliver every pending alert now (rate limits still apply)
+
+        Args:
+            timeout: Seconds to wait for delivery
+
+        Returns:
+            True if the flush completed in time
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """
+        Flush and stop the background thread
+
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="alerts", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_due())
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._dispatch(force=True)
+                return
+            if isinstance(item, _Flush):
+                self._dispatch(force=True)
+                item.done.set()
+                continue
+            if item is not None:
+                self._add(item)
+            self._dispatch()
+
+    def _add(self, alert: Alert):
+        current = self.pending.get(alert.key)
+        if current is None:
+            self.pending[alert.key] = alert
+        else:
+            current.count += 1
+            current.message = alert.message
+
+    def _due_at(self, alert: Alert) -> float:
+        # last_sent is wall-clock (persisted); convert the rate limit to the monotonic clock
+        rate_limited_for = self.state.last_sent(alert.key) + self.rate_limit_seconds - time.time()
+        return max(alert.first_at + self.coalesce_seconds, time.monotonic() + rate_limited_for)
+
+    def _next_due(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        return max(min(self._due_at(alert) for alert in self.pending.values()) - time.monotonic(), 0.0)
+
+    def _dispatch(self, force: bool = False):
+        now = time.monotonic()
+        for key, alert in list(self.pending.items()):
+            rate_limited = time.time() < self.state.last_sent(key) + self.rate_limit_seconds
+            if rate_limited:
+                if force:
+                    # Carry the occurrences into the key's next delivery (possibly in a later run)
+                    self.state.suppress(key, alert.count)
+                    del self.pending[key]
+                continue
+            if not force and now < alert.first_at + self.coalesce_seconds:
+                continue
+
+            del self.pending[key]
+            self._deliver(alert)
+        if force:
+            self.state.save()
+
+    def _deliver(self, alert: Alert):
+        count = alert.count + self.state.suppressed(alert.key)
+        message = alert.message if count == 1 else f"{alert.message}\n\n({count} occurrences)"
+
+        delivered = False
+        for backend in self.backends:
+            for attempt in range(self.max_retries):
+                try:
+                    backend.send(alert.subject, message)
+                    delivered = True
+                    break
+                except Exception as e:
+                    logger.warning(f"Alert delivery via {backend.name} failed (attempt {attempt + 1}): {e}")
+                    if attempt + 1 < self.max_retries:
+                        time.sleep(self.retry_backoff * 2 ** attempt)
+
+        if delivered:
+            self.sent += 1
+            self.state.mark_sent(alert.key, time.time())
+        else:
+            self.failed += 1
+            self.state.suppress(alert.key, alert.count)
+
+
+_dispatcher: Optional[AlertDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> AlertDispatcher:
+    """
+    Get the process-wide dispatcher, built from the environment on first use
+
+    Returns:
+        AlertDispatcher
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher.from_env()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+
+def flush_alerts(timeout: Optional[float] = 10.0) -> bool:
+    """
+    Deliver pending alerts (call at the end of a run or at shutdown)
+
+    Args:
+        timeout: Seconds to wait
+
+    Returns:
+        True if the flush completed in time
+    """
+    if _dispatcher is None:
+        return True
+    return _dispatcher.flush(timeout)
@@ -0,0 +1,177 @@
+"""
+Process-pool execution of the CPU-bound part of analysis
+
+Keyword matching (especially the token matcher) and company extraction are
+pure Python and hold the GIL, so large batches (backfills, replay, big
+keyword sets) run on one core. AnalysisPool shards a batch into chunks over
+a process pool:
+
+- The matcher and gazetteer travel to each worker once, as the pool
+  initializer's argument; tasks carry only the chunk's texts.
+- Workers return their hits as (row, column) index arrays plus the regional
+  flags and extracted companies, not the dense hit matrix.
+- Chunks come back in submission order, so results line up with the input.
+
+Batches smaller than ANALYSIS_MIN_BATCH (and every batch when
+ANALYSIS_WORKERS <= 1, the default) run in-process, where pool start-up and
+pickling would cost more than they save. Scoring stays in the calling
+process: it is a few vectorized NumPy operations on the merged hits.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.scoring import BatchScorer
+
+logger = logging.getLogger(__name__)
+
+_worker_analyzer: Optional["BatchAnalyzer"] = None
+
+
+def _install(analyzer: "BatchAnalyzer"):
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+def _analyze_chunk(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]]]:
+    return _worker_analyzer.analyze_compact(texts)
+
+
+class BatchAnalyzer:
+    """Keyword matching plus company extraction for the items that matched (picklable)"""
+
+    def __init__(
+        self,
+        scorer: BatchScorer,
+        extract_company: Callable[[str], Optional[str]],
+        require_regional: bool = False
+    ):
+        """
+        Initialize analyzer
+
+        Args:
+            scorer: Scorer whose vocabulary is matched (a profile router's union scorer)
+            extract_company: Company extraction for one text; must be picklable
+                (a module-level function or a functools.partial of one)
+            require_regional: Only extract companies for items with a regional term
+        """
+        self.scorer = scorer
+        self.extract_company = extract_company
+        self.require_regional = require_regional
+
+    def analyze(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]]]:
+        """
+        Match a batch and extract companies for the items that can produce a signal
+
+        Args:
+            texts: Item texts
+
+        Returns:
+            Tuple of (N x K hit matrix, N regional flags, N company names or None)
+        """
+        hits, has_regional = self.scorer.match(texts)
+        candidates = hits.any(axis=1)
+        if self.require_regional:
+            candidates &= has_regional
+        companies = [self.extract_company(text) if candidate else None for text, candidate in zip(texts, candidates)]
+        return hits, has_regional, companies
+
+    def analyze_compact(
+        self,
+        texts: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]]]:
+        """
+        analyze() with the hit matrix as index arrays, for shipping between processes
+
+        Returns:
+            Tuple of (hit rows, hit columns, regional flags, company names)
+        """
+        hits, has_regional, companies = self.analyze(texts)
+        rows, columns = np.nonzero(hits)
+        return rows.astype(np.int32), columns.astype(np.int32), has_regional, companies
+
+
+class AnalysisPool:
+    """Runs a BatchAnalyzer in-process or across worker processes"""
+
+    def __init__(self, analyzer: BatchAnalyzer, max_workers: int = 1, min_batch: int = 2000,
+                 chunks_per_worker: int = 4):
+        """
+        Initialize pool (worker processes start on the first large batch)
+
+        Args:
+            analyzer: Analyzer shipped to every worker
+            max_workers: Worker processes (1 or less: always in-process)
+            min_batch: Smaller batches run in-process
+            chunks_per_worker: Chunks per worker per batch (smaller chunks balance uneven texts)
+        """
+        self.analyzer = analyzer
+        self.max_workers = max_workers
+        self.min_batch = min_batch
+        self.chunks_per_worker = max(chunks_per_worker, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls, analyzer: BatchAnalyzer) -> "AnalysisPool":
+        """
+        Build a pool from ANALYSIS_WORKERS and ANALYSIS_MIN_BATCH
+
+        Args:
+            analyzer: Analyzer shipped to every worker
+
+        Returns:
+            AnalysisPool
+        """
+        return cls(
+            analyzer,
+            max_workers=int(os.getenv("ANALYSIS_WORKERS", "1")),
+            min_batch=int(os.getenv("ANALYSIS_MIN_BATCH", "2000")),
+        )
+
+    def analyze(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]]]:
+        """
+        Analyze a batch (see BatchAnalyzer.analyze)
+
+        Args:
+            texts: Item texts
+
+        Returns:
+            Tuple of (N x K hit matrix, N regional flags, N company names or None), in input order
+        """
+        if self.max_workers <= 1 or len(texts) < self.min_batch:
+            return self.analyzer.analyze(texts)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.max_workers, mp_context=multiprocessing.get_context(),
+                initializer=_install, initargs=(self.analyzer,),
+            )
+            logger.info(f"Started {self.max_workers} analysis workers")
+
+        n = len(texts)
+        size = math.ceil(n / (self.max_workers * self.chunks_per_worker))
+        starts = range(0, n, size)
+
+        hits = np.zeros((n, len(self.analyzer.scorer.vocabulary)), dtype=bool)
+        has_regional = np.zeros(n, dtype=bool)
+        companies: List[Optional[str]] = []
+        chunks = (list(texts[start:start + size]) for start in starts)
+        for start, (rows, columns, regional, chunk_companies) in zip(
+            starts, self._executor.map(_analyze_chunk, chunks)
+        ):
+            hits[start + rows, columns] = True
+            has_regional[start:start + len(regional)] = regional
+            companies.extend(chunk_companies)
+        return hits, has_regional, companies
+
+    def close(self):
+        """Stop the worker processes (a later large batch starts new ones)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
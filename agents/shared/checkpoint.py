@@ -0,0 +1,151 @@
+"""
+Run deadlines and per-cycle source checkpoints
+
+A Deadline tells an agent when to stop starting new sources so it can write
+what it has collected before the platform kills it. A Checkpoint records
+which sources the current cycle has already covered; the next invocation
+skips them and picks up the rest, and the cycle resets once every source
+has been processed. Checkpoints live in a run state store (shared.run_state)
+so the next invocation finds them even on a fresh instance. Sources are visited in priority order ("high" first).
+
+The deadline comes from RUN_DEADLINE_SECONDS, or from the Cloud Functions
+timeout (FUNCTION_TIMEOUT_SEC); DEADLINE_MARGIN_SECONDS is held back for
+analysis and writes.
+"""
+
+import os
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def prioritize(sources: Iterable[Any], priority: Callable[[Any], Optional[str]]) -> List[Any]:
+    """
+    Order sources by priority, keeping config order within a level
+
+    Args:
+        sources: Source items
+        priority: Function returning an item's priority ("high", "medium", "low")
+
+    Returns:
+        Sources sorted high to low (unknown priorities count as medium)
+    """
+    return sorted(sources, key=lambda source: PRIORITY_ORDER.get(priority(source), 1))
+
+
+class Deadline:
+    """Wall-clock budget for one run"""
+
+    def __init__(self, seconds: Optional[float] = None, margin: float = 30.0):
+        """
+        Initialize deadline
+
+        Args:
+            seconds: Run budget from now (None for no deadline)
+            margin: Seconds reserved for analysis and writes
+        """
+        self.margin = margin
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def from_env(cls, seconds: Optional[float] = None) -> "Deadline":
+        """
+        Build a deadline from an explicit budget or the environment
+
+        Args:
+            seconds: Explicit run budget (overrides the environment)
+
+        Returns:
+            Deadline
+        """
+        if seconds is None:
+            configured = os.getenv("RUN_DEADLINE_SECONDS") or os.getenv("FUNCTION_TIMEOUT_SEC")
+            seconds = float(configured) if configured else None
+        return cls(seconds, float(os.getenv("DEADLINE_MARGIN_SECONDS", "30")))
+
+    @property
+    def enabled(self) -> bool:
+        """True if this run has a deadline"""
+        return self.expires_at is not None
+
+    def remaining(self) -> float:
+        """
+        Get seconds left before the deadline
+
+        Returns:
+            Remaining seconds (infinity without a deadline)
+        """
+        if self.expires_at is None:
+            return float("inf")
+        return self.expires_at - time.monotonic()
+
+    def should_stop(self, next_cost: float = 0.0) -> bool:
+        """
+        Check whether starting another unit of work would run into the margin
+
+        Args:
+            next_cost: Expected duration of the next unit (e.g. slowest source so far)
+
+        Returns:
+            True if no new work should be started
+        """
+        return self.remaining() < self.margin + next_cost
+
+    def expired(self) -> bool:
+        """
+        Check whether the run has used its budget (everything but the margin)
+
+        Returns:
+            True once only the margin is left (never without a deadline)
+        """
+        return self.remaining() < self.margin
+
+
+class Checkpoint:
+    """Sources completed in the current cycle, persisted between runs"""
+
+    def __init__(self, store, key: str):
+        """
+        Initialize checkpoint
+
+        Args:
+            store: Run state store (shared.run_state) holding progress across instances
+            key: Key for this agent/shard
+        """
+        self.store = store
+        self.key = key
+        self.done = set((store.load(key) or {}).get("done", []))
+
+    def pending(self, sources: Iterable[Any], key: Callable[[Any], str] = str) -> List[Any]:
+        """
+        Filter out sources already covered this cycle
+
+        Args:
+            sources: Source items, in the order to process them
+            key: Function returning a source's checkpoint key
+
+        Returns:
+            Sources still to process
+        """
+        return [source for source in sources if key(source) not in self.done]
+
+    def mark_done(self, source_key: str):
+        """
+        Record a processed source (in memory until save())
+
+        Args:
+            source_key: Source key
+        """
+        self.done.add(source_key)
+
+    def save(self, complete: bool = False):
+        """
+        Persist progress; call after the collected signals have been written
+
+        Args:
+            complete: True if every source was processed (starts a new cycle)
+        """
+        if complete:
+            self.done = set()
+        self.store.save(self.key, {"done": sorted(self.done), "saved_at": time.time()})
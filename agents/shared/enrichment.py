@@ -0,0 +1,373 @@
+"""
+Article full-text enrichment
+
+Many feeds only carry a one-line teaser, so entries that did not match on
+their title and summary can be enriched with the linked article's main text
+and matched again. Articles are fetched by a small thread pool under per-run
+byte and time budgets (enrichment is skipped for whatever is left once
+either runs out), and extracted text is kept in an on-disk cache keyed by
+canonical URL with LRU eviction and a TTL, so an article is downloaded once
+no matter how many runs or feeds see it.
+
+Configured by the "enrichment" block of agent_3_sources.json.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared.utils import canonical_url
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ResultsCTO-Agent3/1.0"
+MIN_BLOCK_CHARS = 40  # Shorter text blocks are usually navigation or captions
+
+
+class _MainTextParser(HTMLParser):
+    """Collects paragraph-level text, preferring <article>/<main> content"""
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "template"}
+    BLOCK_TAGS = {"p", "li", "pre", "blockquote", "h1", "h2", "h3", "h4", "td"}
+    VOID_TAGS = {"br", "img", "hr", "input", "meta", "link", "source", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.block_depth = 0
+        self.parts: List[str] = []
+        self.blocks: List[str] = []
+        self.main_blocks: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in ("article", "main"):
+            self.main_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            if self.block_depth == 0:
+                self.parts = []
+            self.block_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in ("article", "main"):
+            self.main_depth = max(self.main_depth - 1, 0)
+        elif tag in self.BLOCK_TAGS and self.block_depth:
+            self.block_depth -= 1
+            if self.block_depth == 0:
+                self._end_block()
+
+    def handle_data(self, data):
+        if self.block_depth and not self.skip_depth:
+            self.parts.append(data)
+
+    def _end_block(self):
+        text = " ".join("".join(self.parts).split())
+        self.parts = []
+        if len(text) >= MIN_BLOCK_CHARS:
+            self.blocks.append(text)
+            if self.main_depth:
+                self.main_blocks.append(text)
+
+
+def extract_main_text(html: str) -> str:
+    """
+    Extract an article's main text from HTML
+
+    Paragraph-level blocks inside <article>/<main> are used when the page has
+    them, otherwise every block outside navigation, headers, footers and
+    scripts. Short blocks (menus, captions, bylines) are dropped.
+
+    Args:
+        html: HTML document
+
+    Returns:
+        Main text, one block per line
+    """
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:  # Malformed markup: keep whatever was collected
+        logger.debug(f"HTML parse error: {e}")
+    return "\n".join(parser.main_blocks or parser.blocks)
+
+
+class ContentCache:
+    """On-disk LRU+TTL cache of extracted article text, keyed by canonical URL"""
+
+    def __init__(self, directory: str, max_entries: int = 5000, ttl_seconds: float = 7 * 86400):
+        """
+        Initialize cache
+
+        Args:
+            directory: Cache directory (one text file per article plus index.json)
+            max_entries: Least recently used articles beyond this are evicted
+            ttl_seconds: Articles older than this are fetched again
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.index_path = os.path.join(directory, "index.json")
+        # key -> [fetched_at, last_used]; dict order is recency order (oldest first)
+        self.index: Dict[str, List[float]] = {}
+        self._dirty = False
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                entries = json.load(f)
+            self.index = dict(sorted(entries.items(), key=lambda item: item[1][1]))
+
+    @staticmethod
+    def key(url: str) -> str:
+        """
+        Get the cache key for a URL
+
+        Args:
+            url: Article URL
+
+        Returns:
+            Hex key derived from the canonical URL
+        """
+        return hashlib.blake2b(canonical_url(url).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, url: str, now: Optional[float] = None) -> Optional[str]:
+        """
+        Look up an article's text
+
+        Args:
+            url: Article URL
+            now: Current Unix time (defaults to time.time())
+
+        Returns:
+            Cached text ("" for articles with no extractable text), or None on a miss
+        """
+        now = time.time() if now is None else now
+        key = self.key(url)
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl_seconds:
+            self._remove(key)
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            self._remove(key)
+            return None
+
+        del self.index[key]
+        self.index[key] = [entry[0], now]
+        self._dirty = True
+        return text
+
+    def put(self, url: str, text: str, now: Optional[float] = None):
+        """
+        Store an article's text, evicting the least recently used beyond max_entries
+
+        Args:
+            url: Article URL
+            text: Extracted text
+            now: Current Unix time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        key = self.key(url)
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(key))
+
+        self.index.pop(key, None)
+        self.index[key] = [now, now]
+        self._dirty = True
+
+        while len(self.index) > self.max_entries:
+            self._remove(next(iter(self.index)))
+
+    def _remove(self, key: str):
+        self.index.pop(key, None)
+        self._dirty = True
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        """Write the index to disk if it changed"""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+
+class ArticleEnricher:
+    """Fetches and extracts article text under per-run byte and time budgets"""
+
+    def __init__(
+        self,
+        cache: ContentCache,
+        session: Optional[requests.Session] = None,
+        max_workers: int = 4,
+        max_bytes: int = 20_000_000,
+        time_budget_seconds: float = 45.0,
+        max_article_bytes: int = 2_000_000,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize enricher
+
+        Args:
+            cache: Content cache
+            session: HTTP session (defaults to one pooled for max_workers)
+            max_workers: Concurrent article fetches
+            max_bytes: Bytes downloaded per run before enrichment stops
+            time_budget_seconds: Seconds per run before enrichment stops
+            max_article_bytes: Largest article body read (the rest is discarded)
+            timeout: Per-request timeout in seconds
+        """
+        self.cache = cache
+        self.max_workers = max(max_workers, 1)
+        self.max_bytes = max_bytes
+        self.time_budget_seconds = time_budget_seconds
+        self.max_article_bytes = max_article_bytes
+        self.timeout = timeout
+
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self.metrics: Dict[str, int] = {}
+
+    def _over_budget(self) -> bool:
+        return self.metrics["bytes_fetched"] >= self.max_bytes or time.monotonic() >= self._expires_at
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Download an article and extract its main text
+
+        Args:
+            url: Article URL
+
+        Returns:
+            Main text ("" for non-HTML responses), or None if skipped, failed or
+            cut short by the run budget
+        """
+        if self._over_budget():
+            return None
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                if "html" not in response.headers.get("Content-Type", "text/html"):
+                    return ""
+
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(65536):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    with self._lock:
+                        self.metrics["bytes_fetched"] += len(chunk)
+                    if size >= self.max_article_bytes:
+                        break
+                    if self._over_budget():
+                        # Cut short by the run budget: a partial article would be cached for the full TTL
+                        return None
+
+                encoding = response.encoding or "utf-8"
+                html = b"".join(chunks)[:self.max_article_bytes].decode(encoding, errors="replace")
+        except Exception as e:
+            logger.debug(f"Error fetching article {url}: {e}")
+            with self._lock:
+                self.metrics["fetch_errors"] += 1
+            return None
+
+        return extract_main_text(html)
+
+    def enrich(self, urls: Iterable[str], time_budget_seconds: Optional[float] = None) -> Dict[str, str]:
+        """
+        Get the main text of several articles, from the cache or the network
+
+        URLs are fetched in the order given until the byte or time budget
+        runs out; the rest are skipped for this run.
+
+        Args:
+            urls: Article URLs, most important first
+            time_budget_seconds: Overrides the configured time budget (e.g. to fit a run deadline)
+
+        Returns:
+            URL -> main text for every article that has text
+        """
+        budget = self.time_budget_seconds if time_budget_seconds is None else time_budget_seconds
+        self._expires_at = time.monotonic() + max(budget, 0.0)
+        self.metrics = {"cache_hits": 0, "articles_fetched": 0, "bytes_fetched": 0, "fetch_errors": 0, "skipped": 0}
+
+        texts: Dict[str, str] = {}
+        misses = []
+        for url in dict.fromkeys(url for url in urls if url):
+            cached = self.cache.get(url)
+            if cached is None:
+                misses.append(url)
+            else:
+                self.metrics["cache_hits"] += 1
+                if cached:
+                    texts[url] = cached
+
+        if misses:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                pending = {executor.submit(self.fetch, url): url for url in misses}
+                while pending:
+                    remaining = self._expires_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = pending.pop(future)
+                        text = future.result()
+                        if text is None:
+                            continue
+                        self.metrics["articles_fetched"] += 1
+                        self.cache.put(url, text)
+                        if text:
+                            texts[url] = text
+                self.metrics["skipped"] = len(misses) - self.metrics["articles_fetched"] - self.metrics["fetch_errors"]
+            finally:
+                # Abandon queued fetches; in-flight ones end at their request timeout
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self.cache.save()
+        logger.info(
+            f"Enrichment: {self.metrics['cache_hits']} cached, {self.metrics['articles_fetched']} fetched "
+            f"({self.metrics['bytes_fetched']} bytes), {self.metrics['skipped']} skipped by budget"
+        )
+        return texts
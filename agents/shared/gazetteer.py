@@ -0,0 +1,274 @@
+"""
+Company gazetteer with token-trie lookup
+
+Known company names come from the Company Name column of the Automation
+Queue plus a local seed list (config/company_seeds.json). They are compiled
+into a trie over lowercase word tokens, so every known company in a text is
+found in one left-to-right pass, preferring the longest name at each
+position. New names are inserted in place as they are confirmed in the
+sheet (no rebuild), and the compiled trie is stored in
+STATE_DIR/gazetteer.json so startup is a single JSON load.
+
+Agent rows are written by the heuristic extractors as "Pending Review", so
+their company is only learned once a reviewer has moved the row to another
+status (and not to a rejection); otherwise a bad guess such as "The" would
+be fed back into every later extraction. Rows added by hand are learned
+as they appear, and single words that are never company names are refused.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from shared.records import AUTOMATION_QUEUE, QUEUE_LAYOUTS
+from shared.utils import column_letter
+
+logger = logging.getLogger(__name__)
+
+# Version 3: only confirmed rows are learned (earlier files may hold unreviewed extractor guesses)
+GAZETTEER_FORMAT = 3
+COMPANY_NAME_HEADER = "company name"
+STATUS_HEADER = "status"
+IGNORED_NAMES = {"unknown", "n/a", "none", "tbd"}
+# Statuses of rows whose company is not (yet) confirmed
+PENDING_STATUSES = {"", "pending review"}
+REJECTED_STATUSES = {"rejected", "dismissed", "not relevant", "duplicate"}
+# Single words that start sentences but never name a company on their own
+NON_NAME_WORDS = {
+    "a", "an", "the", "this", "that", "these", "those", "my", "our", "your", "their", "his", "her", "its",
+    "i", "we", "you", "they", "he", "she", "it", "and", "or", "but", "so", "if", "new", "local",
+    "yesterday", "today", "anyone", "someone",
+}
+
+_END = ""  # Terminal key; never a token
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def load_seed_companies(path: str) -> List[str]:
+    """
+    Load the local seed list
+
+    Args:
+        path: JSON file with a "companies" list
+
+    Returns:
+        Company names (empty if the file does not exist)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f).get("companies", [])
+
+
+class Gazetteer:
+    """Token trie of known company names"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize an empty gazetteer
+
+        Args:
+            path: File for save() (see load())
+        """
+        self.path = path
+        self.trie: Dict = {}
+        self.names = 0
+        self.rows_synced = 0
+        self.company_column: Optional[int] = None
+        self.status_column: Optional[int] = None
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        """
+        Load a stored gazetteer, or start an empty one
+
+        Args:
+            path: Gazetteer file
+
+        Returns:
+            Gazetteer
+        """
+        gazetteer = cls(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("format") != GAZETTEER_FORMAT:
+                logger.info("Gazetteer format changed; re-reading company names from the sheet")
+                return gazetteer
+            gazetteer.trie = data["trie"]
+            gazetteer.names = data["names"]
+            gazetteer.rows_synced = data.get("rows_synced", 0)
+            gazetteer.company_column = data.get("company_column")
+            gazetteer.status_column = data.get("status_column")
+        return gazetteer
+
+    def save(self):
+        """Write the compiled trie to disk if it changed"""
+        if not self.path or not self._dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "format": GAZETTEER_FORMAT,
+                "names": self.names,
+                "rows_synced": self.rows_synced,
+                "company_column": self.company_column,
+                "status_column": self.status_column,
+                "trie": self.trie,
+            }, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def add(self, name: str) -> bool:
+        """
+        Insert a company name
+
+        Args:
+            name: Company name as it should be reported
+
+        Returns:
+            True if the name was new
+        """
+        name = name.strip()
+        tokens = [token.lower() for token in _WORD_RE.findall(name)]
+        if not tokens or name.lower() in IGNORED_NAMES or len(name) < 2:
+            return False
+        if len(tokens) == 1 and tokens[0] in NON_NAME_WORDS:
+            return False
+
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END in node:
+            return False
+        node[_END] = name
+        self.names += 1
+        self._dirty = True
+        return True
+
+    def add_many(self, names: Iterable[str]) -> int:
+        """
+        Insert several company names
+
+        Args:
+            names: Company names
+
+        Returns:
+            Number of new names
+        """
+        return sum(self.add(name) for name in names)
+
+    def find_all(self, text: str) -> List[str]:
+        """
+        Find every known company in a text (longest match wins at each position)
+
+        Single-word names only match capitalized words, so names that are
+        also common words ("Square") don't match ordinary prose.
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Company names in order of appearance
+        """
+        tokens = _WORD_RE.findall(text)
+        lowered = [token.lower() for token in tokens]
+        found = []
+
+        i = 0
+        while i < len(tokens):
+            node = self.trie
+            match = None
+            j = i
+            while j < len(tokens) and lowered[j] in node:
+                node = node[lowered[j]]
+                j += 1
+                if _END in node:
+                    match = (j, node[_END])
+
+            if match and (match[0] - i > 1 or not tokens[i][0].islower()):
+                found.append(match[1])
+                i = match[0]
+            else:
+                i += 1
+
+        return found
+
+    def first(self, text: str) -> Optional[str]:
+        """
+        Find the first known company in a text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Company name or None
+        """
+        found = self.find_all(text)
+        return found[0] if found else None
+
+    def sync(self, sheets_client, sheet_name: str = AUTOMATION_QUEUE) -> int:
+        """
+        Add confirmed company names from sheet rows not yet settled
+
+        Each row's company and status cells are found from its agent's layout
+        (records.QUEUE_LAYOUTS); rows from no known agent use the "Company
+        Name" and "Status" header columns, if the tab has them. Syncing
+        resumes at the first agent row still pending review, so its company
+        is picked up once the row is confirmed.
+
+        Args:
+            sheets_client: SheetsClient
+            sheet_name: Tab (header in row 1)
+
+        Returns:
+            Number of new names
+        """
+        if self.rows_synced == 0:
+            header = sheets_client.read_sheet(f"{sheet_name}!1:1")
+            columns = [str(value).strip().lower() for value in (header[0] if header else [])]
+            self.company_column = columns.index(COMPANY_NAME_HEADER) if COMPANY_NAME_HEADER in columns else None
+            self.status_column = columns.index(STATUS_HEADER) if STATUS_HEADER in columns else None
+            self.rows_synced = 1
+            self._dirty = True
+
+        # Only the Agent Source, company and status cells are needed
+        needed = [layout[field] for layout in QUEUE_LAYOUTS.values() for field in ("agent", "company", "status")]
+        last = column_letter(max(needed + [self.company_column or 0, self.status_column or 0]))
+        rows = sheets_client.read_sheet(f"{sheet_name}!A{self.rows_synced + 1}:{last}")
+
+        added = 0
+        settled = None
+        for offset, row in enumerate(rows):
+            company, status, pending = self._company(row)
+            if pending:
+                settled = offset if settled is None else settled
+            elif company and status not in REJECTED_STATUSES:
+                added += self.add(company)
+        settled = len(rows) if settled is None else settled
+        if settled:
+            self.rows_synced += settled
+            self._dirty = True
+
+        if added:
+            logger.info(f"Gazetteer: {added} new companies ({self.names} known)")
+        return added
+
+    def _company(self, row: List) -> Tuple[Optional[str], str, bool]:
+        """Get a row's (company, lowercase status, awaiting review)"""
+        company_index, status_index, agent_row = self.company_column, self.status_column, False
+        for name, layout in QUEUE_LAYOUTS.items():
+            if layout["agent"] < len(row) and str(row[layout["agent"]]).strip() == name:
+                company_index, status_index, agent_row = layout["company"], layout["status"], True
+                break
+
+        def cell(index):
+            return str(row[index]).strip() if index is not None and index < len(row) else ""
+
+        company, status = cell(company_index) or None, cell(status_index).lower()
+        # Rows added by hand need no review; an agent's guess does
+        pending = agent_row and company is not None and status in PENDING_STATUSES
+        return company, status, pending
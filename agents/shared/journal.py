@@ -0,0 +1,206 @@
+"""
+Write-ahead journal for Sheets appends
+
+Each batch of rows is recorded (and fsynced) before it is sent to Sheets
+and acknowledged once the append returns. On the next write, batches that
+were never acknowledged are re-sent from the journal without re-reading the
+sheet, and rows whose idempotency key (hash of the canonical source URL) was
+already committed are dropped. A host-level file lock serializes writers so
+overlapping runs on one machine cannot both commit the same rows.
+
+Delivery is at-least-once only for the window between Sheets accepting an
+append and the acknowledgement reaching disk.
+
+Layout:
+    <root>/journal.jsonl   {"batch": id, "sheet": ..., "keys": [...], "rows": [...]}
+                           {"ack": id}
+                           {"committed": [...]}   (written by compaction)
+    <root>/journal.lock
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from shared.utils import canonical_url
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(url: str) -> str:
+    """
+    Get the idempotency key for a source URL
+
+    Args:
+        url: Source URL
+
+    Returns:
+        Hex key derived from the canonical URL
+    """
+    return hashlib.blake2b(canonical_url(url).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class WriteJournal:
+    """Append-only journal of pending and acknowledged Sheets batches"""
+
+    def __init__(self, root: str, max_committed_keys: int = 200000, compact_after: int = 1000):
+        """
+        Initialize journal
+
+        Args:
+            root: Journal directory
+            max_committed_keys: Most recent committed keys kept after compaction
+            compact_after: Journal lines that trigger compaction on load
+        """
+        self.root = root
+        self.path = os.path.join(root, "journal.jsonl")
+        self.max_committed_keys = max_committed_keys
+        self.compact_after = compact_after
+        self.committed: Dict[str, None] = {}
+        self.pending: Dict[str, Dict] = {}
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def lock(self) -> Iterator["WriteJournal"]:
+        """
+        Hold the host-wide journal lock and load the current journal state
+
+        Yields:
+            This journal
+        """
+        with open(os.path.join(self.root, "journal.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield self
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        self.committed = {}
+        self.pending = {}
+        if not os.path.exists(self.path):
+            return
+
+        lines = 0
+        with open(self.path) as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write; the batch was never sent
+                    continue
+                if "committed" in entry:
+                    self.committed.update(dict.fromkeys(entry["committed"]))
+                elif "ack" in entry:
+                    batch = self.pending.pop(entry["ack"], None)
+                    if batch:
+                        self.committed.update(dict.fromkeys(batch["keys"]))
+                else:
+                    self.pending[entry["batch"]] = entry
+
+        if lines > self.compact_after:
+            self._compact()
+
+    def _compact(self):
+        keys = list(self.committed)[-self.max_committed_keys:]
+        self.committed = dict.fromkeys(keys)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"committed": keys}) + "\n")
+            for entry in self.pending.values():
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, entry: Dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_committed(self, key: str) -> bool:
+        """
+        Check whether a key was committed or is awaiting replay
+
+        Args:
+            key: Idempotency key
+
+        Returns:
+            True if the key is already journaled
+        """
+        return key in self.committed or any(key in batch["keys"] for batch in self.pending.values())
+
+    def begin(self, sheet_name: str, keys: List[str], rows: List[List]) -> str:
+        """
+        Record a batch before sending it
+
+        Args:
+            sheet_name: Target tab
+            keys: Idempotency key per row
+            rows: Row values
+
+        Returns:
+            Batch id
+        """
+        batch_id = uuid.uuid4().hex
+        entry = {"batch": batch_id, "sheet": sheet_name, "keys": keys, "rows": rows}
+        self._append(entry)
+        self.pending[batch_id] = entry
+        return batch_id
+
+    def ack(self, batch_id: str):
+        """
+        Mark a batch as committed
+
+        Args:
+            batch_id: Batch id from begin()
+        """
+        self._append({"ack": batch_id})
+        batch = self.pending.pop(batch_id)
+        self.committed.update(dict.fromkeys(batch["keys"]))
+
+    def commit(self, sheets_client, sheet_name: str, keys: List[str], rows: List[List]) -> int:
+        """
+        Journal, append and acknowledge one batch (call while holding lock())
+
+        Args:
+            sheets_client: SheetsClient
+            sheet_name: Target tab
+            keys: Idempotency key per row
+            rows: Row values
+
+        Returns:
+            Number of rows appended
+        """
+        if not rows:
+            return 0
+        batch_id = self.begin(sheet_name, keys, rows)
+        sheets_client.append_rows(sheet_name, rows)
+        self.ack(batch_id)
+        return len(rows)
+
+    def replay(self, sheets_client) -> int:
+        """
+        Re-send batches that were journaled but never acknowledged (call while holding lock())
+
+        Args:
+            sheets_client: SheetsClient
+
+        Returns:
+            Number of rows re-sent
+        """
+        replayed = 0
+        for batch_id, batch in list(self.pending.items()):
+            logger.warning(f"Replaying unacknowledged batch {batch_id} ({len(batch['rows'])} rows)")
+            sheets_client.append_rows(batch["sheet"], batch["rows"])
+            self.ack(batch_id)
+            replayed += len(batch["rows"])
+        return replayed
@@ -0,0 +1,170 @@
+"""
+Token-level inverted keyword index
+
+An alternative to substring matching: each item is tokenized and stemmed
+once, and keywords (unigrams and phrases) are looked up in a hash index
+keyed by their first stemmed token. Matching cost follows the item's token
+count rather than the keyword count, inflections match ("refactoring" hits
+"refactor", "hires" hits "hiring"), and keywords no longer match inside
+other words ("cto" in "director").
+
+Selected with KEYWORD_MATCHER=token (default "substring").
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+MATCHERS = ("substring", "token")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = set("aeiouy")
+
+
+def get_matcher() -> str:
+    """
+    Get the configured keyword matcher
+
+    Returns:
+        "substring" or "token"
+    """
+    matcher = os.getenv("KEYWORD_MATCHER", "substring").lower()
+    if matcher not in MATCHERS:
+        raise ValueError(f"Unknown KEYWORD_MATCHER: {matcher}")
+    return matcher
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Reduce a token to a crude stem with a few English suffix rules
+
+    Deliberately light (no dictionary): it only has to map a keyword and
+    its common inflections to the same string.
+
+    Args:
+        token: Lowercase token
+
+    Returns:
+        Stem
+    """
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        token = token[:-3] + "y"
+    elif token.endswith("sses"):
+        token = token[:-2]
+    elif token.endswith(("xes", "ches", "shes")):
+        token = token[:-2]
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+
+    for suffix in ("ing", "ed"):
+        base = token[:-len(suffix)]
+        if token.endswith(suffix) and len(base) >= 3 and _VOWELS & set(base):
+            token = base
+            # "planned" -> "plan", "scaling" -> "scal"
+            if len(token) > 3 and token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]
+            break
+
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens
+
+    Args:
+        text: Text
+
+    Returns:
+        Tokens
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+def analyze(text: str) -> List[str]:
+    """
+    Tokenize and stem text
+
+    Args:
+        text: Text
+
+    Returns:
+        Stemmed tokens
+    """
+    return [stem(token) for token in tokenize(text)]
+
+
+class KeywordIndex:
+    """Hash index of stemmed keyword phrases, keyed by first token"""
+
+    def __init__(self, keywords: Sequence[str]):
+        """
+        Build the index
+
+        Args:
+            keywords: Keyword list (order and duplicates are preserved in results)
+        """
+        self.keywords = list(keywords)
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], List[int]]]] = {}
+
+        phrases: Dict[Tuple[str, ...], List[int]] = {}
+        for k, keyword in enumerate(self.keywords):
+            phrase = tuple(analyze(keyword))
+            if phrase:
+                phrases.setdefault(phrase, []).append(k)
+
+        for phrase, ids in phrases.items():
+            self._index.setdefault(phrase[0], []).append((phrase, ids))
+
+    def match_ids(self, text: str) -> List[int]:
+        """
+        Find the keyword ids occurring in a text
+
+        Args:
+            text: Item text
+
+        Returns:
+            Sorted keyword indices
+        """
+        tokens = analyze(text)
+        found = set()
+        for i, token in enumerate(tokens):
+            for phrase, ids in self._index.get(token, ()):
+                if len(phrase) == 1 or tuple(tokens[i:i + len(phrase)]) == phrase:
+                    found.update(ids)
+        return sorted(found)
+
+    def match(self, text: str) -> List[str]:
+        """
+        Find the keywords occurring in a text
+
+        Args:
+            text: Item text
+
+        Returns:
+            Matched keywords, in keyword-list order
+        """
+        return [self.keywords[k] for k in self.match_ids(text)]
+
+    def hit_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Build an items x keywords hit matrix
+
+        Args:
+            texts: Item texts
+
+        Returns:
+            Boolean matrix of shape (len(texts), len(keywords))
+        """
+        hits = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        for i, text in enumerate(texts):
+            hits[i, self.match_ids(text)] = True
+        return hits
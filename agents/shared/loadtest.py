@@ -0,0 +1,446 @@
+"""
+End-to-end load testing against local synthetic servers
+
+SyntheticFeedServer serves generated RSS/Atom feeds and SyntheticRedditServer
+serves multireddit listings and comment trees, each with configurable
+counts, document sizes, log-normal latency and injected error rates. The
+LoadTest harness points the real agents at them (Sheets in testing mode,
+state in a temporary directory) and reports throughput, per-source latency
+percentiles, peak RSS and API call counts.
+"""
+
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from shared.sheets_client import SheetsClient
+
+# Phrases that hit both agents' keyword files, mixed into a fraction of items
+SIGNAL_PHRASES = [
+    "is refactoring a legacy system after years of technical debt",
+    "raised funding and is hiring a CTO in Des Moines",
+    "announced a cloud migration of its monolithic architecture",
+    "is expanding to Chicago and hiring engineers",
+]
+FILLER_WORDS = "the quarterly update covers product roadmap customers team office market".split()
+
+
+class LoadProfile:
+    """Shape of the synthetic workload"""
+
+    def __init__(
+        self,
+        feeds: int = 50,
+        items_per_feed: int = 20,
+        item_bytes: int = 500,
+        subreddits: int = 50,
+        posts: int = 1000,
+        comments_per_post: int = 10,
+        signal_rate: float = 0.1,
+        latency_ms: float = 20.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize profile
+
+        Args:
+            feeds: Number of RSS/Atom feeds
+            items_per_feed: Items in each feed
+            item_bytes: Approximate size of each item description / post body
+            subreddits: Number of subreddits
+            posts: Total posts in the last 24 hours across all subreddits
+            comments_per_post: Comments in each comment tree
+            signal_rate: Fraction of items containing a signal phrase
+            latency_ms: Median response latency
+            latency_sigma: Log-normal sigma of the latency (0 for constant)
+            error_rate: Fraction of requests answered with HTTP 500
+            seed: Random seed (documents and injected errors are reproducible)
+        """
+        self.feeds = feeds
+        self.items_per_feed = items_per_feed
+        self.item_bytes = item_bytes
+        self.subreddits = subreddits
+        self.posts = posts
+        self.comments_per_post = comments_per_post
+        self.signal_rate = signal_rate
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class _SyntheticServer:
+    """Threaded local HTTP server with latency and error injection"""
+
+    def __init__(self, profile: LoadProfile):
+        self.profile = profile
+        self.requests: Dict[str, int] = {}
+        self.errors_injected = 0
+        self._random = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _text(self, rng: random.Random, size: int) -> str:
+        words = []
+        length = 0
+        if rng.random() < self.profile.signal_rate:
+            phrase = rng.choice(SIGNAL_PHRASES)
+            words.append(phrase)
+            length += len(phrase)
+        while length < size:
+            word = rng.choice(FILLER_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        rng.shuffle(words)
+        return " ".join(words)
+
+    def _delay_and_fail(self, kind: str) -> bool:
+        """Record a request, sleep for a sampled latency, and decide whether to fail it"""
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            delay = self.profile.latency_ms / 1000
+            if self.profile.latency_sigma > 0:
+                delay *= math.exp(self._random.gauss(0, self.profile.latency_sigma))
+            fail = self._random.random() < self.profile.error_rate
+            if fail:
+                self.errors_injected += 1
+        time.sleep(delay)
+        return fail
+
+    def route(self, path: str, query: Dict) -> Optional[tuple]:
+        """Return (request kind, content type, body) for a path, or None for 404"""
+        raise NotImplementedError
+
+    def start(self) -> "_SyntheticServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                routed = server.route(url.path, parse_qs(url.query))
+                if routed is None:
+                    self.send_error(404)
+                    return
+                kind, content_type, body = routed
+                if server._delay_and_fail(kind):
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class SyntheticFeedServer(_SyntheticServer):
+    """Serves /feed/<n>.xml (RSS 2.0 for even n, Atom for odd n)"""
+
+    def feed_urls(self) -> List[Dict]:
+        """
+        Feed configs in agent_3_sources.json form
+
+        Returns:
+            List of {"name", "url", "priority"}
+        """
+        priorities = ("high", "medium", "low")
+        return [
+            {"name": f"Feed {n}", "url": f"{self.base_url}/feed/{n}.xml", "priority": priorities[n % 3]}
+            for n in range(self.profile.feeds)
+        ]
+
+    def document(self, n: int) -> bytes:
+        rng = random.Random(f"{self.profile.seed}-feed-{n}")
+        items = []
+        for i in range(self.profile.items_per_feed):
+            title = escape(f"Company {n}-{i} update")
+            link = f"https://feed{n}.example.com/articles/{i}"
+            body = escape(self._text(rng, self.profile.item_bytes))
+            if n % 2:
+                items.append(
+                    f"<entry><title>{title}</title><link href=\"{link}\"/><id>{link}</id>"
+                    f"<summary>{body}</summary></entry>"
+                )
+            else:
+                items.append(f"<item><title>{title}</title><link>{link}</link><description>{body}</description></item>")
+        if n % 2:
+            return (
+                "<?xml version=\"1.0\"?><feed xmlns=\"http://www.w3.org/2005/Atom\">"
+                f"<title>Feed {n}</title>{''.join(items)}</feed>"
+            ).encode("utf-8")
+        return (
+            f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Feed {n}</title>"
+            f"{''.join(items)}</channel></rss>"
+        ).encode("utf-8")
+
+    def route(self, path: str, query: Dict) -> Optional[tuple]:
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "feed" and parts[1].endswith(".xml"):
+            n = int(parts[1][:-len(".xml")])
+            if 0 <= n < self.profile.feeds:
+                return "feed", "application/xml", self.document(n)
+        return None
+
+
+class SyntheticRedditServer(_SyntheticServer):
+    """Serves /r/<a+b+c>/new.json listings and /r/<sub>/comments/<id>.json trees"""
+
+    def __init__(self, profile: LoadProfile):
+        super().__init__(profile)
+        self.created_at = time.time()
+
+    def subreddit_names(self) -> List[str]:
+        return [f"loadtest{n}" for n in range(self.profile.subreddits)]
+
+    def post(self, i: int) -> Dict:
+        rng = random.Random(f"{self.profile.seed}-post-{i}")
+        subreddit = f"loadtest{i % max(self.profile.subreddits, 1)}"
+        return {
+            "title": f"Post {i} from r/{subreddit}",
+            "selftext": self._text(rng, self.profile.item_bytes),
+            "score": rng.randint(0, 200),
+            "permalink": f"/r/{subreddit}/comments/p{i}/",
+            "created_utc": self.created_at - (i + 1) * 86400 / (self.profile.posts + 1),
+            "subreddit": subreddit,
+            "num_comments": self.profile.comments_per_post,
+        }
+
+    def route(self, path: str, query: Dict) -> Optional[tuple]:
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "r" and parts[2] == "new.json":
+            wanted = set(parts[1].split("+"))
+            start = int(query.get("after", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            page, i = [], start
+            while len(page) < limit and i < self.profile.posts:
+                post = self.post(i)
+                i += 1
+                if post["subreddit"] in wanted:
+                    page.append({"kind": "t3", "data": post})
+            after = str(i) if i < self.profile.posts else None
+            return "listing", "application/json", json.dumps({"data": {"after": after, "children": page}}).encode()
+
+        if len(parts) == 4 and parts[0] == "r" and parts[2] == "comments" and parts[3].endswith(".json"):
+            post_id = parts[3][:-len(".json")]
+            rng = random.Random(f"{self.profile.seed}-comments-{post_id}")
+            comments = [
+                {"kind": "t1", "data": {
+                    "body": self._text(rng, self.profile.item_bytes // 2),
+                    "score": rng.randint(0, 50),
+                    "permalink": f"/r/{parts[1]}/comments/{post_id}/c{c}/",
+                    "created_utc": time.time() - 60 * c,
+                    "subreddit": parts[1],
+                    "replies": "",
+                }}
+                for c in range(self.profile.comments_per_post)
+            ]
+            thread = [{"data": {"children": []}}, {"data": {"children": comments}}]
+            return "comments", "application/json", json.dumps(thread).encode()
+        return None
+
+
+class CountingSheetsClient(SheetsClient):
+    """Testing-mode Sheets client that counts API calls"""
+
+    def __init__(self):
+        super().__init__(testing=True)
+        self.calls: Dict[str, int] = {}
+        for name in ("append_row", "batch_update", "read_sheet", "check_duplicate"):
+            setattr(self, name, self._counted(name, getattr(self, name)))
+
+    def _counted(self, name: str, method: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return method(*args, **kwargs)
+        return wrapper
+
+
+def _timed(method: Callable, latencies: List[float]) -> Callable:
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def peak_rss_mb() -> float:
+    """
+    Get this process's peak resident set size
+
+    Returns:
+        Peak RSS in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def _environment(**values: str):
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class LoadTest:
+    """Runs the agents end to end against the synthetic servers"""
+
+    def __init__(self, profile: LoadProfile, config_dir: str = "config"):
+        """
+        Initialize harness
+
+        Args:
+            profile: Workload shape
+            config_dir: Agent configuration directory (keywords, seeds)
+        """
+        self.profile = profile
+        self.config_dir = config_dir
+
+    @staticmethod
+    def _report(name: str, agent, latencies: List[float], elapsed: float, api_calls: Dict, sheets) -> Dict:
+        metrics = dict(agent.metrics)
+        latency_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+        items = metrics.get("items_analyzed", 0)
+        api_calls.update({f"sheets_{name}": count for name, count in sheets.calls.items()})
+        return {
+            "agent": name,
+            "elapsed_seconds": round(elapsed, 3),
+            "sources": metrics.get("sources_processed", 0),
+            "items_analyzed": items,
+            "signals_found": metrics.get("signals_found", 0),
+            "items_per_second": round(items / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latency_ms, 50)), 1),
+                "p99": round(float(np.percentile(latency_ms, 99)), 1),
+                "max": round(float(latency_ms.max()), 1),
+            },
+            "peak_rss_mb": peak_rss_mb(),
+            "api_calls": api_calls,
+        }
+
+    def run_agent_3(self) -> Dict:
+        """
+        Run TechnicalDebtScanner against the synthetic feed server
+
+        Returns:
+            Report dict
+        """
+        from agent_3.agent import TechnicalDebtScanner
+
+        with tempfile.TemporaryDirectory() as state_dir, _environment(STATE_DIR=state_dir), \
+                SyntheticFeedServer(self.profile) as server:
+            sheets = CountingSheetsClient()
+            scanner = TechnicalDebtScanner(self.config_dir, shard_index=0, num_shards=1, sheets_client=sheets)
+            scanner.sources["rss_feeds"] = server.feed_urls()
+
+            latencies: List[float] = []
+            scanner.fetch_feed = _timed(scanner.fetch_feed, latencies)
+
+            start = time.perf_counter()
+            scanner.run()
+            elapsed = time.perf_counter() - start
+
+            api_calls = {"feed_requests": server.requests.get("feed", 0), "errors_injected": server.errors_injected}
+            return self._report("agent_3", scanner, latencies, elapsed, api_calls, sheets)
+
+    def run_agent_4(self) -> Dict:
+        """
+        Run RegionalNewsMonitor (multireddit listing mode) against the synthetic Reddit server
+
+        Per-source latency is measured per listing page and comment-tree request.
+
+        Returns:
+            Report dict
+        """
+        from agent_4.agent import RegionalNewsMonitor
+        from shared.reddit_client import RedditListingClient
+
+        with tempfile.TemporaryDirectory() as state_dir, \
+                _environment(STATE_DIR=state_dir, REDDIT_LISTING="multireddit"), \
+                SyntheticRedditServer(self.profile) as server:
+            sheets = CountingSheetsClient()
+            listing = RedditListingClient(base_url=server.base_url)
+            monitor = RegionalNewsMonitor(
+                self.config_dir, shard_index=0, num_shards=1, sheets_client=sheets, listing=listing
+            )
+            monitor.sources["subreddits"] = server.subreddit_names()
+            if self.profile.comments_per_post:
+                monitor.comment_scan = dict(monitor.comment_scan, enabled=True)
+
+            latencies: List[float] = []
+            listing.fetch_page = _timed(listing.fetch_page, latencies)
+            listing.fetch_comments = _timed(listing.fetch_comments, latencies)
+
+            start = time.perf_counter()
+            monitor.run()
+            elapsed = time.perf_counter() - start
+
+            api_calls = {
+                "reddit_listing_requests": server.requests.get("listing", 0),
+                "reddit_comment_requests": server.requests.get("comments", 0),
+                "errors_injected": server.errors_injected,
+            }
+            return self._report("agent_4", monitor, latencies, elapsed, api_calls, sheets)
+
+    def run(self, agents: List[str]) -> Dict:
+        """
+        Run the selected agents
+
+        Args:
+            agents: Any of "agent_3", "agent_4"
+
+        Returns:
+            Combined report with the profile
+        """
+        runners = {"agent_3": self.run_agent_3, "agent_4": self.run_agent_4}
+        return {"profile": self.profile.to_dict(), "results": [runners[name]() for name in agents]}
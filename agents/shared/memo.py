@@ -0,0 +1,274 @@
+"""
+Persistent memo of per-item analysis results
+
+Feed entries and posts stay in their listings for days, so most items in a
+poll were already analyzed. The memo maps a hash of an item's normalized
+text to its analysis result (matched keywords, score, signal type and
+company per profile), so unchanged items skip matching, extraction and
+scoring entirely.
+
+Each result is tagged with the keyword-configuration version it was computed
+under. A version is a fingerprint per (profile, keyword) of its categories
+and weights. When the keyword files change, a stored result is re-used
+only if none of the keywords it matched changed or were removed and none of
+the added keywords occur in the item; only the affected items are analyzed
+again. Changes to anything else that shapes results (regional terms, signal
+type rules, matcher, scoring constants) change the base hash and clear the
+memo.
+
+Results are kept in least-recently-used order and evicted beyond
+max_entries. Not used with RELEVANCE_MODEL=bm25, whose scores depend on
+corpus statistics that change every run.
+
+Enabled with ANALYSIS_MEMO_ENABLED=true (size: ANALYSIS_MEMO_MAX_ENTRIES).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from shared.keyword_index import KeywordIndex
+from shared.scoring import MAX_SCORE, POINTS_PER_KEYWORD, BatchScorer
+from shared.utils import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+MEMO_FORMAT = 1
+MAX_VERSIONS = 8
+_SEP = "\x1f"
+
+
+def _digest(data: str) -> str:
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_key(text: str, context: str = "") -> str:
+    """
+    Hash an item's analyzed text
+
+    Args:
+        text: Item text (title + body)
+        context: Item data outside the text that changes its result (e.g. an upvote bucket)
+
+    Returns:
+        Hex key of the NFC-normalized, trimmed text (case is kept: company extraction reads it)
+    """
+    return _digest(f"{unicodedata.normalize('NFC', text).strip()}{_SEP}{context}")
+
+
+def keyword_fingerprints(scorer: BatchScorer, profile: str = "") -> Dict[str, str]:
+    """
+    Fingerprint every keyword of a scorer by its categories and weights
+
+    Args:
+        scorer: BatchScorer
+        profile: Profile name ("" for the agent's own keywords)
+
+    Returns:
+        "profile<US>keyword" -> fingerprint
+    """
+    occurrences: Dict[str, List] = {}
+    for k, keyword in enumerate(scorer.vocabulary):
+        category = scorer.category_names[int(np.argmax(scorer.category_matrix[k]))]
+        occurrences.setdefault(keyword, []).append([category, float(scorer.weights[k])])
+    return {f"{profile}{_SEP}{keyword}": _digest(json.dumps(occ)) for keyword, occ in occurrences.items()}
+
+
+class AnalysisMemo:
+    """Content-addressed, version-tagged cache of analysis results"""
+
+    def __init__(
+        self,
+        path: str,
+        fingerprints: Dict[str, str],
+        base: Sequence,
+        matcher: str = "substring",
+        max_entries: int = 100000
+    ):
+        """
+        Load the memo for the current configuration
+
+        Args:
+            path: JSON file for this agent/shard
+            fingerprints: keyword_fingerprints() of every profile, merged
+            base: Other settings that shape results; any change clears the memo
+            matcher: Keyword matcher ("substring" or "token"), for checking added keywords
+            max_entries: Least recently used results beyond this are evicted
+        """
+        self.path = path
+        self.fingerprints = fingerprints
+        self.base = _digest(json.dumps([MEMO_FORMAT, matcher, *base], default=str))
+        self.version = _digest(json.dumps(sorted(fingerprints.items())))
+        self.matcher = matcher
+        self.max_entries = max_entries
+
+        self.versions: Dict[str, Dict[str, str]] = {}
+        # content key -> [version, result]; dict order is recency order (oldest first)
+        self.entries: Dict[str, List] = {}
+        self._deltas: Dict[str, Optional[tuple]] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._dirty = False
+
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("base") == self.base:
+                    self.versions = data["versions"]
+                    self.entries = data["entries"]
+                else:
+                    logger.info("Analysis settings changed; starting a new analysis memo")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable analysis memo {path}: {e}")
+
+        if self.version not in self.versions:
+            self.versions[self.version] = fingerprints
+            self._dirty = True
+            # Keep the newest versions (insertion order); results under dropped ones are recomputed
+            for old in list(self.versions)[:-MAX_VERSIONS]:
+                del self.versions[old]
+
+    def _delta(self, version: str) -> Optional[tuple]:
+        """
+        Compare an older version with the current one
+
+        Returns:
+            (changed or removed keys, added keywords, token index over the added keywords or None),
+            or None if the version is unknown
+        """
+        if version not in self._deltas:
+            old = self.versions.get(version)
+            if old is None:
+                self._deltas[version] = None
+            else:
+                changed = {key for key, fp in old.items() if self.fingerprints.get(key) != fp}
+                keywords = sorted({key.split(_SEP, 1)[1] for key in self.fingerprints if key not in old})
+                index = KeywordIndex(keywords) if self.matcher == "token" and keywords else None
+                self._deltas[version] = (changed, keywords, index)
+        return self._deltas[version]
+
+    def _still_valid(self, version: str, result: Dict, text: str) -> bool:
+        delta = self._delta(version)
+        if delta is None:
+            return False
+        changed, added, index = delta
+        for profile, values in result.items():
+            if any(f"{profile}{_SEP}{keyword}" in changed for keyword in values[0]):
+                return False
+        if added:
+            if index is not None:
+                return not index.match_ids(text)
+            text_lower = text.lower()
+            return not any(keyword in text_lower for keyword in added)
+        return True
+
+    def lookup(self, texts: Sequence[str], contexts: Optional[Sequence[str]] = None) -> List[Optional[Dict]]:
+        """
+        Get memoized results
+
+        Args:
+            texts: Item texts
+            contexts: Optional per-item context (see content_key())
+
+        Returns:
+            Per item: result dict (profile -> [matched keywords, ...agent-specific fields];
+            empty for items that produced no signal), or None when it must be analyzed
+        """
+        contexts = contexts or [""] * len(texts)
+        results = []
+        for text, context in zip(texts, contexts):
+            key = content_key(text, context)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                results.append(None)
+                continue
+
+            version, result = entry
+            if version != self.version:
+                if not self._still_valid(version, result, text):
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.revalidated += 1
+            self.hits += 1
+
+            del self.entries[key]
+            self.entries[key] = [self.version, result]
+            self._dirty = True
+            results.append(result)
+        return results
+
+    def store(self, text: str, result: Dict, context: str = ""):
+        """
+        Record an item's analysis result
+
+        Args:
+            text: Item text
+            result: Result dict (see lookup())
+            context: Item context (see content_key())
+        """
+        key = content_key(text, context)
+        self.entries.pop(key, None)
+        self.entries[key] = [self.version, result]
+        self._dirty = True
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self):
+        """Write the memo to disk if it changed"""
+        if not self._dirty:
+            return
+        # Only versions still referenced (plus the current one) are kept
+        live = {version for version, _ in self.entries.values()} | {self.version}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "base": self.base,
+                "versions": {v: fps for v, fps in self.versions.items() if v in live},
+                "entries": self.entries,
+            }, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        logger.info(
+            f"Analysis memo: {self.hits} hits ({self.revalidated} revalidated), {self.misses} analyzed, "
+            f"{len(self.entries)} stored"
+        )
+
+
+def memo_from_env(name: str, scorer: BatchScorer, profiles=None, base: Sequence = ()) -> Optional[AnalysisMemo]:
+    """
+    Build an agent's analysis memo if ANALYSIS_MEMO_ENABLED=true
+
+    Args:
+        name: Agent/shard name (memo file name)
+        scorer: The agent's own scorer
+        profiles: The agent's ProfileRouter, if any
+        base: Agent settings that shape results besides the keyword files
+
+    Returns:
+        AnalysisMemo, or None if disabled or RELEVANCE_MODEL=bm25
+    """
+    if os.getenv("ANALYSIS_MEMO_ENABLED", "false").lower() != "true":
+        return None
+    if os.getenv("RELEVANCE_MODEL", "count").lower() == "bm25":
+        logger.info("Analysis memo disabled: BM25 scores change with corpus statistics")
+        return None
+
+    fingerprints = keyword_fingerprints(scorer)
+    for profile in profiles.profiles if profiles is not None else []:
+        fingerprints.update(keyword_fingerprints(profile.scorer, profile.name))
+    return AnalysisMemo(
+        os.path.join(get_state_dir("memo"), f"{name}.json"),
+        fingerprints,
+        [MAX_SCORE, POINTS_PER_KEYWORD, *base],
+        matcher=scorer.matcher,
+        max_entries=int(os.getenv("ANALYSIS_MEMO_MAX_ENTRIES", "100000")),
+    )
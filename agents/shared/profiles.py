@@ -0,0 +1,255 @@
+"""
+Keyword profiles evaluated in a single pass
+
+A profile is a client's or vertical's own keyword set (with its own weights)
+and destination tab, run over the same sources as the agent's default
+keywords. Instead of one scan per profile, every batch is matched once
+against the union of all profiles' keywords; each profile then takes its own
+columns of that hit matrix, scores only the items that hit them, and writes
+to its own sinks. Matching cost follows the number of distinct keywords, not
+profiles x items.
+
+Profiles live in config/profiles.json (see profiles.example.json):
+
+    {"profiles": [{
+        "name": "fintech",
+        "agents": ["agent_3"],
+        "keywords": "fintech_keywords.json",     (file in config/, or an inline dict)
+        "sheet": "Fintech Queue",
+        "min_score": 4
+    }]}
+
+Profile signals carry the profile name in Signal.profile; default signals
+have an empty profile.
+"""
+
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.records import Signal
+from shared.scoring import BatchScorer, BatchScores
+from shared.sinks import MultiSink, build_sinks
+from shared.utils import load_json_config
+
+logger = logging.getLogger(__name__)
+
+PROFILES_FILE = "profiles.json"
+DEFAULT_PROFILE = ""
+
+
+def load_profile_configs(config_dir: str, agent_name: str) -> List[Dict]:
+    """
+    Load the profiles that apply to an agent
+
+    Args:
+        config_dir: Configuration directory
+        agent_name: Agent name ("agent_3", "agent_4")
+
+    Returns:
+        Profile dicts with "keywords" resolved to a keyword config (empty without profiles.json)
+    """
+    path = os.path.join(config_dir, PROFILES_FILE)
+    if not os.path.exists(path):
+        return []
+
+    profiles = []
+    for profile in load_json_config(path).get("profiles", []):
+        if agent_name not in profile.get("agents", [agent_name]):
+            continue
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", profile.get("name", "")):
+            raise ValueError(f"Invalid profile name: {profile.get('name')!r}")
+        keywords = profile["keywords"]
+        if isinstance(keywords, str):
+            keywords = load_json_config(os.path.join(config_dir, keywords))
+        profiles.append(dict(profile, keywords=keywords))
+    return profiles
+
+
+class Profile:
+    """One keyword profile: scorer, score threshold and output sinks"""
+
+    def __init__(self, name: str, scorer: BatchScorer, sink: MultiSink, min_score: int = 0):
+        """
+        Initialize profile
+
+        Args:
+            name: Profile name
+            scorer: Scorer over the profile's keywords and weights
+            sink: Output sinks for the profile's signals
+            min_score: Signals scoring below this are dropped
+        """
+        self.name = name
+        self.scorer = scorer
+        self.sink = sink
+        self.min_score = min_score
+
+
+class ProfileRouter:
+    """Matches batches once against every profile's keywords and routes the hits"""
+
+    def __init__(self, default_scorer: BatchScorer, profiles: Sequence[Profile]):
+        """
+        Initialize router
+
+        Args:
+            default_scorer: The agent's own scorer (default profile)
+            profiles: Additional profiles
+        """
+        self.default_scorer = default_scorer
+        self.profiles = list(profiles)
+
+        # Union vocabulary; each scorer reads its own columns (duplicates included) from the union hits
+        positions: Dict[str, int] = {}
+        for scorer in [default_scorer] + [profile.scorer for profile in self.profiles]:
+            for keyword in scorer.vocabulary:
+                positions.setdefault(keyword, len(positions))
+        self.union = BatchScorer(
+            {"union": list(positions)}, default_scorer.regional_keywords, matcher=default_scorer.matcher
+        )
+        self.default_columns = np.array([positions[kw] for kw in default_scorer.vocabulary], dtype=np.intp)
+        self.columns = {
+            profile.name: np.array([positions[kw] for kw in profile.scorer.vocabulary], dtype=np.intp)
+            for profile in self.profiles
+        }
+
+        logger.info(
+            f"{len(self.profiles)} keyword profiles: {', '.join(p.name for p in self.profiles)} "
+            f"({len(positions)} distinct keywords)"
+        )
+
+    @classmethod
+    def from_config(
+        cls,
+        config_dir: str,
+        agent_name: str,
+        default_scorer: BatchScorer,
+        sheets_client,
+        row_builder: Callable[[Signal], List],
+        dedup_column: str,
+        **scorer_kwargs
+    ) -> Optional["ProfileRouter"]:
+        """
+        Build a router from config/profiles.json
+
+        Args:
+            config_dir: Configuration directory
+            agent_name: Agent name
+            default_scorer: The agent's own scorer
+            sheets_client: SheetsClient for the profiles' Sheets sinks
+            row_builder: Row layout for the profiles' Sheets sinks
+            dedup_column: URL column for the profiles' Sheets sinks
+            **scorer_kwargs: Extra BatchScorer arguments (regional terms, signal type rules)
+
+        Returns:
+            ProfileRouter, or None if no profile applies to the agent
+        """
+        configs = load_profile_configs(config_dir, agent_name)
+        if not configs:
+            return None
+
+        profiles = []
+        for config in configs:
+            scorer = BatchScorer(config["keywords"], matcher=default_scorer.matcher, **scorer_kwargs)
+            sink = build_sinks(
+                f"{agent_name}_{config['name']}", sheets_client, row_builder, dedup_column,
+                sheet_name=config.get("sheet", config["name"]),
+            )
+            profiles.append(Profile(config["name"], scorer, sink, config.get("min_score", 0)))
+        return cls(default_scorer, profiles)
+
+    def score(
+        self,
+        texts: Sequence[str],
+        upvotes: Optional[Sequence[int]] = None,
+        regional_bonus: int = 0
+    ) -> Tuple[BatchScores, Dict[str, Tuple[np.ndarray, BatchScores]]]:
+        """
+        Match a batch once and score it for every profile
+
+        Args:
+            texts: Item texts
+            upvotes: Optional per-item upvote counts
+            regional_bonus: Points added to items matching a regional keyword
+
+        Returns:
+            Tuple of (default BatchScores for every item,
+            profile name -> (item indices that hit the profile, BatchScores for those items))
+        """
+        hits, has_regional = self.union.match(texts)
+        return self.score_hits(hits, has_regional, upvotes, regional_bonus)
+
+    def score_hits(
+        self,
+        hits: np.ndarray,
+        has_regional: np.ndarray,
+        upvotes: Optional[Sequence[int]] = None,
+        regional_bonus: int = 0
+    ) -> Tuple[BatchScores, Dict[str, Tuple[np.ndarray, BatchScores]]]:
+        """
+        Score a batch for every profile from precomputed union matches
+
+        Args:
+            hits: N x K hit matrix over the union vocabulary (self.union.match)
+            has_regional: N regional flags
+            upvotes: Optional per-item upvote counts
+            regional_bonus: Points added to items matching a regional keyword
+
+        Returns:
+            Same as score()
+        """
+        default = self.default_scorer.score_hits(hits[:, self.default_columns], has_regional, upvotes, regional_bonus)
+
+        routed = {}
+        for profile in self.profiles:
+            profile_hits = hits[:, self.columns[profile.name]]
+            rows = np.flatnonzero(profile_hits.any(axis=1))
+            if not rows.size:
+                continue
+            profile_upvotes = None if upvotes is None else np.asarray(upvotes)[rows]
+            routed[profile.name] = (
+                rows,
+                profile.scorer.score_hits(profile_hits[rows], has_regional[rows], profile_upvotes, regional_bonus),
+            )
+        return default, routed
+
+    def write(self, signals: List[Signal], metrics: Dict) -> List[Signal]:
+        """
+        Write profile signals to their profiles' sinks
+
+        Args:
+            signals: Signals from every profile
+            metrics: Agent metrics (gets rows_written_<profile>_<sink>)
+
+        Returns:
+            The default profile's signals, for the agent's own sinks
+        """
+        default = []
+        by_profile: Dict[str, List[Signal]] = {}
+        for signal in signals:
+            if signal.profile == DEFAULT_PROFILE:
+                default.append(signal)
+            else:
+                by_profile.setdefault(signal.profile, []).append(signal)
+
+        for profile in self.profiles:
+            selected = [s for s in by_profile.get(profile.name, []) if s.relevance_score >= profile.min_score]
+            if not selected:
+                continue
+            for name, count in profile.sink.write(selected).items():
+                metrics[f"rows_written_{profile.name}_{name}"] = count
+                logger.info(f"Profile {profile.name}: wrote {count} rows to {name}")
+        return default
+
+    def recover(self):
+        """Finish any batch a previous run left unacknowledged in a profile's sinks"""
+        for profile in self.profiles:
+            profile.sink.recover()
+
+    def flush(self):
+        """Flush every profile's sinks"""
+        for profile in self.profiles:
+            profile.sink.flush()
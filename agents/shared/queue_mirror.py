@@ -0,0 +1,382 @@
+"""
+Incremental local mirror of the Automation Queue
+
+Duplicate checks used to read a whole URL column of the sheet (once per
+signal in SheetsSink, once per column in the unified runner), so every run
+transferred every row ever written. QueueMirror keeps an indexed SQLite copy
+of the tab under STATE_DIR/mirror instead: each sync reads only the rows
+past the last synced row count, and a full reconcile (every
+QUEUE_MIRROR_RECONCILE_HOURS, and on first use) re-reads the tab to pick up
+manual edits and deletions. URL, company and status lookups are then local
+index lookups.
+
+Rows are indexed by the agent layouts in records.QUEUE_LAYOUTS (told apart
+by their Agent Source cell); rows in neither layout fall back to the header
+row's "Company Name" / "Status" columns. Every URL in a cell (aggregated
+rows list extra sources in Signal Details) is indexed with its column, so
+duplicate checks can be limited to a sink's URL column like a column read. Company names are
+also indexed by their normalized key (see company_key), which is the
+company -> row index used by per-company aggregation.
+
+Enabled with QUEUE_MIRROR_ENABLED=true.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from shared.gazetteer import IGNORED_NAMES
+from shared.records import AUTOMATION_QUEUE, QUEUE_LAYOUTS
+from shared.utils import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+LAST_COLUMN = "Z"
+MIRROR_FORMAT = 2  # Bump when the schema changes; older files are rebuilt by a full reconcile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rows (
+    row INTEGER PRIMARY KEY,
+    agent TEXT,
+    company TEXT,
+    company_key TEXT,
+    status TEXT,
+    url TEXT,
+    cells TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_company ON rows (company COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS rows_company_key ON rows (company_key);
+CREATE INDEX IF NOT EXISTS rows_status ON rows (status);
+CREATE TABLE IF NOT EXISTS urls (
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (row, col, url)
+);
+CREATE INDEX IF NOT EXISTS urls_url ON urls (url);
+"""
+
+COMPANY_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "plc", "gmbh"}
+_URL_RE = re.compile(r"https?://[^\s,]+")
+
+
+def company_key(name: Optional[str]) -> Optional[str]:
+    """
+    Normalize a company name for grouping ("Acme, Inc." and "ACME" -> "acme")
+
+    Args:
+        name: Company name
+
+    Returns:
+        Lowercase alphanumeric tokens without legal suffixes, or None for
+        empty and placeholder names ("Unknown", "N/A")
+    """
+    if not name or name.strip().lower() in IGNORED_NAMES:
+        return None
+    tokens = re.findall(r"[a-z0-9]+", name.lower())
+    while len(tokens) > 1 and tokens[-1] in COMPANY_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or None
+
+
+def _column_index(letter: str) -> int:
+    return ord(letter.upper()) - ord("A")
+
+
+def _cell(row: Sequence, index: Optional[int]) -> Optional[str]:
+    if index is None or index >= len(row):
+        return None
+    value = str(row[index]).strip()
+    return value or None
+
+
+class QueueMirror:
+    """SQLite mirror of one sheet tab, synced incrementally"""
+
+    def __init__(self, path: str, sheet_name: str = AUTOMATION_QUEUE, reconcile_seconds: float = 86400.0):
+        """
+        Open (or create) a mirror
+
+        Args:
+            path: SQLite file
+            sheet_name: Mirrored tab (row 1 is its header)
+            reconcile_seconds: Maximum age of the last full re-read
+        """
+        self.path = path
+        self.sheet_name = sheet_name
+        self.reconcile_seconds = reconcile_seconds
+        self.rows_read = 0
+
+        self._lock = threading.Lock()
+        # Shards in other processes may share the file; sqlite serializes their writes
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != MIRROR_FORMAT:
+                self.conn.executescript(
+                    "DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS rows; DROP TABLE IF EXISTS urls;"
+                )
+                self.conn.execute(f"PRAGMA user_version = {MIRROR_FORMAT}")
+            self.conn.executescript(SCHEMA)
+
+    def _meta(self, key: str, default=None):
+        found = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(found[0]) if found else default
+
+    def _set_meta(self, **values):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    @property
+    def rows_synced(self) -> int:
+        """Sheet rows (header included) mirrored so far"""
+        with self._lock:
+            return self._meta("rows_synced", 0)
+
+    def sync(self, sheets_client, full: Optional[bool] = None) -> int:
+        """
+        Bring the mirror up to date
+
+        Args:
+            sheets_client: SheetsClient
+            full: Force (True) or skip (False) a full reconcile; by default one
+                runs on first use and once reconcile_seconds have passed
+
+        Returns:
+            Number of sheet rows read
+        """
+        with self._lock:
+            rows_synced = self._meta("rows_synced", 0)
+            if full is None:
+                full = rows_synced == 0 or time.time() - self._meta("reconciled_at", 0) >= self.reconcile_seconds
+
+            if full:
+                rows = sheets_client.read_sheet(f"{self.sheet_name}!A1:{LAST_COLUMN}")
+                header = [str(value).strip().lower() for value in (rows[0] if rows else [])]
+                with self.conn:
+                    self.conn.execute("DELETE FROM rows")
+                    self.conn.execute("DELETE FROM urls")
+                    self._insert(rows[1:], 2, header)
+                    self._set_meta(rows_synced=len(rows), reconciled_at=time.time(), header=header)
+                logger.info(f"Queue mirror: reconciled {max(len(rows) - 1, 0)} rows of {self.sheet_name}")
+            else:
+                rows = sheets_client.read_sheet(f"{self.sheet_name}!A{rows_synced + 1}:{LAST_COLUMN}")
+                if rows:
+                    with self.conn:
+                        self._insert(rows, rows_synced + 1, self._meta("header", []))
+                        self._set_meta(rows_synced=rows_synced + len(rows))
+                    logger.info(f"Queue mirror: {len(rows)} new rows from {self.sheet_name}")
+
+            self.rows_read += len(rows)
+            return len(rows)
+
+    def _insert(self, rows: List[List], first_row: int, header: List[str]):
+        fallback = {
+            field: header.index(name) if name in header else None
+            for field, name in (("company", "company name"), ("status", "status"))
+        }
+        records, urls = [], []
+        for number, row in enumerate(rows, first_row):
+            # Empty rows keep their number so later rows stay aligned with the sheet
+            agent, columns = None, fallback
+            for name, layout in QUEUE_LAYOUTS.items():
+                if _cell(row, layout["agent"]) == name:
+                    agent, columns = name, layout
+                    break
+
+            row_urls = [
+                (number, col, url)
+                for col in range(len(row))
+                for url in _URL_RE.findall(_cell(row, col) or "")
+            ]
+            url = _cell(row, columns.get("url")) or (row_urls[0][2] if row_urls else None)
+            company = _cell(row, columns["company"])
+            records.append((
+                number, agent, company, company_key(company), _cell(row, columns["status"]), url,
+                json.dumps(list(row)),
+            ))
+            urls.extend(row_urls)
+
+        self.conn.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+        self.conn.executemany("DELETE FROM urls WHERE row = ?", [(record[0],) for record in records])
+        self.conn.executemany("INSERT OR REPLACE INTO urls (row, col, url) VALUES (?, ?, ?)", urls)
+
+    def update_row(self, number: int, cells: List):
+        """
+        Record cells written to an existing row (keeps the mirror current without a re-read)
+
+        Args:
+            number: Sheet row number
+            cells: The row's full new values
+        """
+        with self._lock, self.conn:
+            self._insert([cells], number, self._meta("header", []))
+
+    def contains_url(self, url: str, columns: Optional[Iterable[str]] = None) -> bool:
+        """
+        Check whether a URL is in the tab
+
+        Args:
+            url: Source URL
+            columns: Column letters to look in (default: any column)
+
+        Returns:
+            True if present
+        """
+        query, params = "SELECT 1 FROM urls WHERE url = ?", [url]
+        if columns is not None:
+            indexes = [_column_index(column) for column in columns]
+            query += f" AND col IN ({', '.join('?' * len(indexes))})"
+            params.extend(indexes)
+        with self._lock:
+            return self.conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def _select(self, where: str, params: Sequence) -> List[Dict]:
+        with self._lock:
+            found = self.conn.execute(f"SELECT * FROM rows WHERE {where} ORDER BY row", params).fetchall()
+        return [dict(record, cells=json.loads(record["cells"])) for record in found]
+
+    def rows_by_url(self, url: str) -> List[Dict]:
+        """
+        Get the rows holding a URL in any column
+
+        Args:
+            url: Source URL
+
+        Returns:
+            Row dicts (row, agent, company, company_key, status, url, cells), in sheet order
+        """
+        return self._select("row IN (SELECT row FROM urls WHERE url = ?)", (url,))
+
+    def rows_by_company(self, company: str) -> List[Dict]:
+        """
+        Get a company's rows (case-insensitive)
+
+        Args:
+            company: Company name
+
+        Returns:
+            Row dicts, in sheet order
+        """
+        return self._select("company = ? COLLATE NOCASE", (company,))
+
+    def row_for_company(self, key: str) -> Optional[Dict]:
+        """
+        Get the latest agent-written row of a company
+
+        Args:
+            key: Normalized company name (company_key)
+
+        Returns:
+            Row dict, or None if no agent row has the company
+        """
+        found = self._select("company_key = ? AND agent IS NOT NULL", (key,))
+        return found[-1] if found else None
+
+    def rows_by_status(self, status: str) -> List[Dict]:
+        """
+        Get the rows with a status (e.g. "Pending Review")
+
+        Args:
+            status: Status value
+
+        Returns:
+            Row dicts, in sheet order
+        """
+        return self._select("status = ?", (status,))
+
+    def dedup_view(self, columns: Optional[Sequence[str]] = None) -> "MirrorDedupView":
+        """
+        Get a duplicate checker over the mirror (see sinks.DedupView)
+
+        Args:
+            columns: URL column letters to check (default: any column)
+
+        Returns:
+            MirrorDedupView
+        """
+        return MirrorDedupView(self, columns)
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self.conn.close()
+
+
+class MirrorDedupView:
+    """DedupView backed by the mirror: sheet URLs are looked up locally, this run's URLs in memory"""
+
+    def __init__(self, mirror: QueueMirror, columns: Optional[Sequence[str]] = None):
+        """
+        Initialize view
+
+        Args:
+            mirror: Synced mirror
+            columns: URL column letters to check (default: any column)
+        """
+        self.mirror = mirror
+        self.columns = list(columns) if columns is not None else None
+        self.urls = set()
+
+    def add(self, url: str) -> bool:
+        """
+        Record a URL
+
+        Args:
+            url: Source URL
+
+        Returns:
+            True if the URL was new
+        """
+        if self.seen(url):
+            return False
+        self.urls.add(url)
+        return True
+
+    def seen(self, url: str) -> bool:
+        """
+        Check a URL without recording it
+
+        Args:
+            url: Source URL
+
+        Returns:
+            True if the URL is in the sheet or was added this run
+        """
+        return url in self.urls or self.mirror.contains_url(url, self.columns)
+
+
+_mirrors: Dict[str, QueueMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(sheet_name: str = AUTOMATION_QUEUE, enabled: Optional[bool] = None) -> Optional[QueueMirror]:
+    """
+    Get the process-wide mirror of a tab if QUEUE_MIRROR_ENABLED=true
+
+    Args:
+        sheet_name: Tab name
+        enabled: Overrides QUEUE_MIRROR_ENABLED (e.g. when a feature needs the mirror)
+
+    Returns:
+        QueueMirror (shared by every sink writing the tab), or None if disabled
+    """
+    if enabled is None:
+        enabled = os.getenv("QUEUE_MIRROR_ENABLED", "false").lower() == "true"
+    if not enabled:
+        return None
+    slug = re.sub(r"\W+", "_", sheet_name).lower()
+    path = os.path.join(get_state_dir("mirror"), f"{slug}.sqlite")
+    with _mirrors_lock:
+        if path not in _mirrors:
+            reconcile_hours = float(os.getenv("QUEUE_MIRROR_RECONCILE_HOURS", "24"))
+            _mirrors[path] = QueueMirror(path, sheet_name, reconcile_seconds=reconcile_hours * 3600)
+        return _mirrors[path]
@@ -0,0 +1,147 @@
+"""
+Timezone-correct recency windows
+
+All comparisons use Unix timestamps (UTC): feedparser's *_parsed dates are
+UTC struct_times and Reddit's created_utc is already epoch seconds, so no
+local-time datetime ever enters the comparison.
+
+A RecencyWindow's cutoff is the later of "now minus the source's max age"
+and the newest timestamp seen for that source in an earlier run. Sources
+list newest first, so iteration stops at the first item at or before the
+cutoff; old content never reaches analysis or the dedup lookups. Items
+without a date are kept (there is nothing to compare), and sources that are
+not time-ordered (e.g. ranked front pages) are filtered rather than cut off.
+
+Last-seen marks are per source and only persisted once a run's signals have
+been written, so a failed write re-reads the same window next time. They
+live in a run state store (shared.run_state), so a cold instance picks up
+where the previous run left off.
+"""
+
+import calendar
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+def entry_timestamp(entry: Dict) -> Optional[float]:
+    """
+    Get a feedparser entry's publish (or update) time
+
+    Args:
+        entry: feedparser entry
+
+    Returns:
+        Unix timestamp, or None if the entry is undated
+    """
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed:
+        return None
+    return float(calendar.timegm(parsed))
+
+
+class RecencyWindow:
+    """Accepts items newer than a source's cutoff"""
+
+    def __init__(self, max_age_hours: float = DEFAULT_MAX_AGE_HOURS, last_seen: Optional[float] = None,
+                 now: Optional[float] = None):
+        """
+        Initialize window
+
+        Args:
+            max_age_hours: Oldest item age to accept
+            last_seen: Newest timestamp processed by an earlier run (optional)
+            now: Current Unix time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        self.cutoff = now - max_age_hours * 3600
+        if last_seen is not None:
+            self.cutoff = max(self.cutoff, last_seen)
+        self.newest: Optional[float] = None
+
+    def accepts(self, timestamp: Optional[float]) -> bool:
+        """
+        Check an item's timestamp against the cutoff
+
+        Args:
+            timestamp: Unix timestamp (None for undated items)
+
+        Returns:
+            True if the item is inside the window
+        """
+        if timestamp is None:
+            return True
+        if timestamp <= self.cutoff:
+            return False
+        self.newest = timestamp if self.newest is None else max(self.newest, timestamp)
+        return True
+
+    def take(self, items: Iterable[Any], timestamp: Callable[[Any], Optional[float]],
+             ordered: bool = True) -> Iterator[Any]:
+        """
+        Yield the items inside the window
+
+        Args:
+            items: Items, newest first if ordered
+            timestamp: Function returning an item's Unix timestamp (or None)
+            ordered: Stop at the first item past the cutoff (False filters every item)
+
+        Yields:
+            Items inside the window
+        """
+        for item in items:
+            if self.accepts(timestamp(item)):
+                yield item
+            elif ordered:
+                return
+
+
+class LastSeen:
+    """Newest processed timestamp per source, persisted between runs"""
+
+    def __init__(self, store, key: str):
+        """
+        Initialize last-seen marks
+
+        Args:
+            store: Run state store (shared.run_state) holding the marks across instances
+            key: Key for this agent/shard
+        """
+        self.store = store
+        self.key = key
+        self._pending: Dict[str, float] = {}
+        self.marks: Dict[str, float] = (store.load(key) or {}).get("marks", {})
+
+    def window(self, source: str, max_age_hours: float = DEFAULT_MAX_AGE_HOURS) -> RecencyWindow:
+        """
+        Build a source's window from its max age and last-seen mark
+
+        Args:
+            source: Source key
+            max_age_hours: Oldest item age to accept
+
+        Returns:
+            RecencyWindow
+        """
+        return RecencyWindow(max_age_hours, self.marks.get(source))
+
+    def observe(self, source: str, window: RecencyWindow):
+        """
+        Record a window's newest accepted item (in memory until save())
+
+        Args:
+            source: Source key
+            window: Window the source's items went through
+        """
+        if window.newest is not None:
+            self._pending[source] = max(window.newest, self._pending.get(source, window.newest))
+
+    def save(self):
+        """Persist observed marks; call after the collected signals have been written"""
+        if not self._pending:
+            return
+        for source, newest in self._pending.items():
+            self.marks[source] = max(newest, self.marks.get(source, newest))
+        self._pending = {}
+        self.store.save(self.key, {"marks": self.marks, "saved_at": time.time()})
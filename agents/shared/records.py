@@ -0,0 +1,217 @@
+"""
+Compact record types for items and signals
+
+Entries, posts and signals move through the pipeline as __slots__ classes
+instead of dicts: no per-instance __dict__, fixed attribute layout, and
+explicit conversions to each agent's Automation Queue row layout.
+"""
+
+from typing import Any, Dict, List
+
+from shared.utils import get_date, get_timestamp
+
+AUTOMATION_QUEUE = "Automation Queue"
+
+# 0-based positions of the indexed and aggregated fields in each agent's row
+# layout, keyed by the Agent Source value found at the layout's "agent"
+# position. "last_seen" is the Last Seen column (L) shared by both layouts and
+# written only by per-company aggregation, so a row's Date Added / Detected
+# Date keeps the day it was first queued
+LAST_SEEN_COLUMN = 11
+QUEUE_LAYOUTS = {
+    "Agent 3": {
+        "agent": 1, "company": 2, "status": 6, "url": 10, "details": 4, "score": 5, "last_seen": LAST_SEEN_COLUMN,
+    },
+    "Agent 4": {
+        "agent": 6, "company": 1, "status": 7, "url": 4, "details": 3, "score": 9, "last_seen": LAST_SEEN_COLUMN,
+    },
+}
+
+
+class Record:
+    """Base class: equality, repr, pickling and dict conversion from __slots__"""
+
+    __slots__ = ()
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other._values() == self._values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        # Positional reconstruction: smaller and faster to pickle across processes
+        return type(self), self._values()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to a plain dict
+
+        Returns:
+            Dict of field name to value
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """
+        Build a record from a dict (unknown keys are ignored)
+
+        Args:
+            data: Field values
+
+        Returns:
+            Record instance
+        """
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+class FeedEntry(Record):
+    """An RSS/Atom entry"""
+
+    __slots__ = ("title", "link", "summary", "published", "source")
+
+    def __init__(self, title: str = "", link: str = "", summary: str = "", published: str = "", source: str = ""):
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.published = published
+        self.source = source
+
+
+class RedditPost(Record):
+    """The fields of a Reddit submission (or comment, with an empty title) that analysis reads"""
+
+    __slots__ = ("title", "selftext", "score", "permalink", "created_utc", "subreddit", "num_comments")
+
+    def __init__(
+        self,
+        title: str = "",
+        selftext: str = "",
+        score: int = 0,
+        permalink: str = "",
+        created_utc: float = 0.0,
+        subreddit: str = "",
+        num_comments: int = 0
+    ):
+        self.title = title
+        self.selftext = selftext
+        self.score = score
+        self.permalink = permalink
+        self.created_utc = created_utc
+        self.subreddit = subreddit
+        self.num_comments = num_comments
+
+    @classmethod
+    def from_praw(cls, submission) -> "RedditPost":
+        """
+        Copy the analyzed fields out of a PRAW submission
+
+        Args:
+            submission: PRAW submission object
+
+        Returns:
+            RedditPost
+        """
+        return cls(
+            submission.title,
+            submission.selftext,
+            submission.score,
+            submission.permalink,
+            submission.created_utc,
+            submission.subreddit.display_name,
+            submission.num_comments,
+        )
+
+
+class Signal(Record):
+    """A detected lead signal"""
+
+    __slots__ = (
+        "company_name",
+        "signal_type",
+        "signal_description",
+        "source_url",
+        "source",
+        "detected_date",
+        "relevance_score",
+        "title",
+        "summary",
+        "profile",
+    )
+
+    def __init__(
+        self,
+        company_name: str,
+        signal_type: str,
+        signal_description: str,
+        source_url: str,
+        source: str,
+        detected_date: str,
+        relevance_score: int,
+        title: str = "",
+        summary: str = "",
+        profile: str = ""
+    ):
+        self.company_name = company_name
+        self.signal_type = signal_type
+        self.signal_description = signal_description
+        self.source_url = source_url
+        self.source = source
+        self.detected_date = detected_date
+        self.relevance_score = relevance_score
+        self.title = title
+        self.summary = summary
+        self.profile = profile  # Keyword profile ("" for the agent's own keywords)
+
+    def to_agent_3_row(self) -> List:
+        """
+        Automation Queue row in Agent 3's layout
+
+        Column order: Queue ID, Agent Source, Company Name, Signal Type,
+        Signal Details, Priority Score, Status, Date Added, Action Required,
+        Assigned To, Notes (URL)
+
+        Returns:
+            Row values
+        """
+        return [
+            "",  # Queue ID (empty - can add auto-increment later)
+            "Agent 3",
+            self.company_name,
+            self.signal_type,
+            self.signal_description,
+            self.relevance_score,
+            "Pending Review",
+            get_date(),
+            "",  # Action Required (empty)
+            "",  # Assigned To (empty)
+            self.source_url,
+        ]
+
+    def to_agent_4_row(self) -> List:
+        """
+        Automation Queue row in Agent 4's layout
+
+        Column order: Timestamp, Company Name, Signal Type, Signal Details,
+        Source URL, Detected Date, Agent Source, Status, Notes, Priority Score
+
+        Returns:
+            Row values
+        """
+        return [
+            get_timestamp(),
+            self.company_name,
+            self.signal_type,
+            self.signal_description,
+            self.source_url,
+            self.detected_date,
+            "Agent 4",
+            "Pending Review",
+            "",  # Notes
+            self.relevance_score,
+        ]
@@ -0,0 +1,250 @@
+"""
+Lightweight Reddit listing client
+
+Fetches combined multireddit listings (r/a+b+c/new.json) over plain HTTP
+and decodes each post straight into a RedditPost, instead of one PRAW
+subreddit.new() call per subreddit. Listings are sorted newest first across
+every subreddit in the multi, so pagination stops at the recency cutoff and
+the request count scales with the number of new posts, not subreddits.
+
+Uses application-only OAuth when REDDIT_CLIENT_ID / REDDIT_CLIENT_SECRET are
+set, and the public JSON endpoints otherwise. Tokens last about an hour, so a
+long-lived client re-authenticates shortly before expiry, and once on a 401.
+"""
+
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from shared.checkpoint import Deadline
+from shared.records import RedditPost
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_BASE_URL = "https://www.reddit.com"
+OAUTH_BASE_URL = "https://oauth.reddit.com"
+TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+PAGE_SIZE = 100  # Reddit's maximum listing page size
+MAX_SUBREDDITS_PER_MULTI = 100
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+
+class RedditListingClient:
+    """Paginated multireddit listing fetcher"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        timeout: float = 30,
+        token_url: Optional[str] = None
+    ):
+        """
+        Initialize client
+
+        Args:
+            base_url: Listing host (defaults to OAuth or public Reddit; set for local stand-ins)
+            session: HTTP session to reuse
+            client_id: Reddit app id (defaults to REDDIT_CLIENT_ID)
+            client_secret: Reddit app secret (defaults to REDDIT_CLIENT_SECRET)
+            user_agent: User agent (defaults to REDDIT_USER_AGENT)
+            timeout: Per-request timeout in seconds
+            token_url: OAuth token endpoint (defaults to Reddit's; with base_url, set to authenticate a stand-in)
+        """
+        self.http = session or requests.Session()
+        self.http.headers["User-Agent"] = user_agent or os.getenv("REDDIT_USER_AGENT", "ResultsCTO-Agent4/1.0")
+        self.client_id = client_id or os.getenv("REDDIT_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("REDDIT_CLIENT_SECRET")
+        self.timeout = timeout
+        self.token_url = token_url or TOKEN_URL
+        self.token_refresh_at: Optional[float] = None
+        self.requests_made = 0
+        # True if the last fetch_new stopped before reaching its cutoff
+        self.truncated = False
+
+        self.base_url = base_url
+        authenticated = (base_url is None or token_url is not None) and self._authenticate()
+        if self.base_url is None:
+            self.base_url = OAUTH_BASE_URL if authenticated else PUBLIC_BASE_URL
+
+    def _authenticate(self) -> bool:
+        """Obtain an application-only OAuth token; False if no credentials or the grant fails"""
+        if not (self.client_id and self.client_secret):
+            return False
+        try:
+            response = self.http.post(
+                self.token_url,
+                auth=(self.client_id, self.client_secret),
+                data={"grant_type": "client_credentials"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            token = response.json()
+            self.http.headers["Authorization"] = f"bearer {token['access_token']}"
+            expires_in = float(token.get("expires_in", 3600))
+            self.token_refresh_at = time.monotonic() + expires_in - min(TOKEN_REFRESH_MARGIN_SECONDS, expires_in / 2)
+            return True
+        except Exception as e:
+            logger.warning(f"Reddit OAuth failed, using public listings: {e}")
+            return False
+
+    def _get(self, url: str, params: Dict, timeout: Optional[float] = None) -> requests.Response:
+        """
+        GET with a current token: refreshed before expiry, and once on a 401
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Request timeout (defaults to the client timeout)
+
+        Returns:
+            Successful response
+        """
+        if self.token_refresh_at is not None and time.monotonic() >= self.token_refresh_at:
+            self._authenticate()
+        self.requests_made += 1
+        response = self.http.get(url, params=params, timeout=timeout or self.timeout)
+        if response.status_code == 401 and self.token_refresh_at is not None and self._authenticate():
+            logger.info("Reddit token rejected; re-authenticated and retrying")
+            self.requests_made += 1
+            response = self.http.get(url, params=params, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def decode_listing(listing: Dict) -> List[RedditPost]:
+        """
+        Decode a listing response into posts
+
+        Args:
+            listing: Parsed listing JSON
+
+        Returns:
+            Posts, in listing order
+        """
+        posts = []
+        for child in listing.get("data", {}).get("children", []):
+            data = child.get("data", {})
+            posts.append(RedditPost(
+                data.get("title", ""),
+                data.get("selftext", ""),
+                data.get("score", 0),
+                data.get("permalink", ""),
+                float(data.get("created_utc", 0)),
+                data.get("subreddit", ""),
+                data.get("num_comments", 0),
+            ))
+        return posts
+
+    @staticmethod
+    def decode_comments(listing: Dict) -> List[RedditPost]:
+        """
+        Flatten a comment tree into records (body as selftext, empty title)
+
+        Args:
+            listing: Comment listing (second element of a thread response)
+
+        Returns:
+            Comments in depth-first order; "load more" stubs are skipped
+        """
+        comments = []
+        stack = list(reversed(listing.get("data", {}).get("children", [])))
+        while stack:
+            child = stack.pop()
+            if child.get("kind") != "t1":
+                continue
+            data = child.get("data", {})
+            comments.append(RedditPost(
+                "",
+                data.get("body", ""),
+                data.get("score", 0),
+                data.get("permalink", ""),
+                float(data.get("created_utc", 0)),
+                data.get("subreddit", ""),
+            ))
+            replies = data.get("replies")
+            if isinstance(replies, dict):
+                stack.extend(reversed(replies.get("data", {}).get("children", [])))
+        return comments
+
+    def fetch_comments(self, permalink: str, limit: int = 200, timeout: Optional[float] = None) -> List[RedditPost]:
+        """
+        Fetch one post's comment tree (a single request)
+
+        Args:
+            permalink: Post permalink (/r/sub/comments/id/slug/)
+            limit: Maximum comments requested
+            timeout: Request timeout (defaults to the client timeout)
+
+        Returns:
+            Flattened comments
+        """
+        url = f"{self.base_url}{permalink.rstrip('/')}.json"
+        thread = self._get(url, {"limit": limit, "sort": "new", "raw_json": 1}, timeout).json()
+        return self.decode_comments(thread[1]) if len(thread) > 1 else []
+
+    def fetch_page(self, subreddits: List[str], after: Optional[str] = None) -> Dict:
+        """
+        Fetch one page of a combined /new listing
+
+        Args:
+            subreddits: Subreddit names
+            after: Pagination cursor from the previous page
+
+        Returns:
+            Parsed listing JSON
+        """
+        params = {"limit": PAGE_SIZE, "raw_json": 1}
+        if after:
+            params["after"] = after
+        url = f"{self.base_url}/r/{'+'.join(subreddits)}/new.json"
+        return self._get(url, params).json()
+
+    def fetch_new(self, subreddits: Iterable[str], since_utc: float, max_pages: int = 50,
+                  deadline: Optional[Deadline] = None) -> List[RedditPost]:
+        """
+        Fetch every post newer than a cutoff across many subreddits
+
+        Sets truncated if a chunk stopped before the cutoff (deadline or
+        max_pages), so callers don't treat the window as fully read.
+
+        Args:
+            subreddits: Subreddit names
+            since_utc: Unix timestamp cutoff (posts at or before it are excluded)
+            max_pages: Page limit per multireddit chunk
+            deadline: Run deadline; no further pages are requested once it has expired
+
+        Returns:
+            Posts newer than the cutoff, newest first within each chunk
+        """
+        names = list(subreddits)
+        posts: List[RedditPost] = []
+        self.truncated = False
+
+        for i in range(0, len(names), MAX_SUBREDDITS_PER_MULTI):
+            chunk = names[i:i + MAX_SUBREDDITS_PER_MULTI]
+            after = None
+            for _ in range(max_pages):
+                if deadline is not None and deadline.expired():
+                    logger.warning(f"Run deadline reached; stopped listing before the cutoff ({len(posts)} posts)")
+                    self.truncated = True
+                    return posts
+                listing = self.fetch_page(chunk, after)
+                page = self.decode_listing(listing)
+                recent = [post for post in page if post.created_utc > since_utc]
+                posts.extend(recent)
+
+                after = listing.get("data", {}).get("after")
+                if not after or len(recent) < len(page):
+                    break
+            else:
+                logger.warning(f"Listing for {len(chunk)} subreddits hit {max_pages} pages before the cutoff")
+                self.truncated = True
+
+        return posts
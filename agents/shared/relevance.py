@@ -0,0 +1,286 @@
+"""
+BM25 relevance scoring over the keyword vocabulary
+
+Replaces the capped keyword count with a BM25 score: repeated mentions of a
+keyword saturate (so boilerplate "migration" x5 is worth little more than one
+mention), common keywords are discounted by inverse document frequency, and
+long documents are length-normalized.
+
+Document-frequency statistics are updated incrementally from every analyzed
+item and persisted compactly (compressed NumPy arrays) between runs. One
+file is shared by every shard of an agent: save() takes a file lock, re-reads
+the file and adds only the documents this process observed since, so
+concurrent shard processes merge instead of overwriting each other. Items
+are represented as sparse {keyword index: term frequency} vectors built only
+from the keywords that already matched, so per-item cost scales with hits.
+Term frequencies are counted the way the hits were found: substring
+occurrences, or stemmed phrase occurrences with KEYWORD_MATCHER=token (so
+"cto" is not counted inside "director").
+"""
+
+import fcntl
+import hashlib
+import logging
+import math
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from shared.keyword_index import analyze, get_matcher
+from shared.scoring import MAX_SCORE
+
+logger = logging.getLogger(__name__)
+
+
+def _doc_hash(doc_id: str) -> int:
+    """Stable 64-bit hash of a document id (URL)"""
+    return int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class RelevanceEngine:
+    """BM25 scorer with incrementally maintained corpus statistics"""
+
+    def __init__(
+        self,
+        vocabulary: Iterable[str],
+        weights: Optional[Dict[str, float]] = None,
+        path: Optional[str] = None,
+        k1: float = 0.9,
+        b: float = 0.4,
+        saturation: float = 3.0,
+        max_tracked_docs: int = 200000,
+        matcher: Optional[str] = None
+    ):
+        """
+        Initialize engine
+
+        Args:
+            vocabulary: Keywords (lowercased); duplicates are collapsed
+            weights: Optional per-keyword weight multipliers
+            path: .npz file for corpus statistics (None keeps them in memory only)
+            k1: BM25 term-frequency saturation (low, since items are short title+summary texts)
+            b: BM25 length normalization
+            saturation: Raw BM25 score that maps to half of MAX_SCORE
+            max_tracked_docs: How many document hashes to remember for
+                de-duplicating statistics updates across polls
+            matcher: Matcher that produced the hits, "substring" or "token"
+                (defaults to KEYWORD_MATCHER)
+        """
+        self.vocabulary: List[str] = list(dict.fromkeys(vocabulary))
+        self.index = {kw: i for i, kw in enumerate(self.vocabulary)}
+        self.weights = np.array([(weights or {}).get(kw, 1.0) for kw in self.vocabulary], dtype=np.float64)
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.saturation = saturation
+        self.max_tracked_docs = max_tracked_docs
+        self.matcher = matcher or get_matcher()
+        # Stemmed token phrase per keyword, for counting token matches
+        self.phrases = [tuple(analyze(kw)) for kw in self.vocabulary] if self.matcher == "token" else None
+
+        self.df = np.zeros(len(self.vocabulary), dtype=np.uint32)
+        self.doc_count = 0
+        self.total_length = 0
+        self._seen: Dict[int, None] = {}
+        # Documents observed since the last load/save: (doc hash or None, vector, length)
+        self._pending: List[Tuple[Optional[int], Dict[int, int], int]] = []
+
+        if path and os.path.exists(path):
+            self.load()
+
+    @property
+    def avg_length(self) -> float:
+        """Average document length in tokens"""
+        return self.total_length / self.doc_count if self.doc_count else 1.0
+
+    def idf(self, k: int) -> float:
+        """
+        BM25 inverse document frequency for a vocabulary index
+
+        Args:
+            k: Vocabulary index
+
+        Returns:
+            IDF (always positive)
+        """
+        df = float(self.df[k])
+        return math.log(1.0 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def vector(self, text_lower: str, found_keywords: Iterable[str]) -> Dict[int, int]:
+        """
+        Build a sparse term-frequency vector from already-matched keywords
+
+        Args:
+            text_lower: Lowercased item text
+            found_keywords: Keywords known to occur in the text
+
+        Returns:
+            Dict of vocabulary index to occurrence count
+        """
+        vector = {}
+        tokens = analyze(text_lower) if self.phrases is not None else None
+        for kw in found_keywords:
+            k = self.index.get(kw)
+            if k is None or k in vector:
+                continue
+            if tokens is None:
+                count = text_lower.count(kw)
+            else:
+                phrase = self.phrases[k]
+                count = sum(
+                    1 for i in range(len(tokens) - len(phrase) + 1) if tuple(tokens[i:i + len(phrase)]) == phrase
+                ) if phrase else 0
+            vector[k] = max(count, 1)
+        return vector
+
+    def observe(self, doc_id: Optional[str], vector: Dict[int, int], length: int) -> bool:
+        """
+        Add a document to the corpus statistics
+
+        Documents already counted (by doc_id hash) are skipped, so entries that
+        stay in a feed for days don't inflate document frequencies.
+
+        Args:
+            doc_id: Stable document id (URL); None always counts
+            vector: Sparse term-frequency vector
+            length: Document length in tokens
+
+        Returns:
+            True if the statistics changed
+        """
+        h = None
+        if doc_id is not None:
+            h = _doc_hash(doc_id)
+            if h in self._seen:
+                return False
+        self._add(h, vector, length)
+        self._pending.append((h, vector, length))
+        return True
+
+    def _add(self, h: Optional[int], vector: Dict[int, int], length: int):
+        if h is not None:
+            self._seen[h] = None
+            if len(self._seen) > self.max_tracked_docs:
+                del self._seen[next(iter(self._seen))]
+        self.doc_count += 1
+        self.total_length += length
+        for k in vector:
+            self.df[k] += 1
+
+    def raw_score(self, vector: Dict[int, int], length: int) -> float:
+        """
+        Weighted BM25 score of a sparse vector
+
+        Args:
+            vector: Sparse term-frequency vector
+            length: Document length in tokens
+
+        Returns:
+            Raw (unbounded) BM25 score
+        """
+        norm = self.k1 * (1.0 - self.b + self.b * length / self.avg_length)
+        score = 0.0
+        for k, tf in vector.items():
+            score += self.weights[k] * self.idf(k) * tf * (self.k1 + 1.0) / (tf + norm)
+        return score
+
+    def to_points(self, raw: float) -> float:
+        """
+        Map a raw BM25 score onto the 0..MAX_SCORE scale
+
+        Args:
+            raw: Raw score
+
+        Returns:
+            Points (saturating, half of MAX_SCORE at raw == saturation)
+        """
+        return MAX_SCORE * raw / (raw + self.saturation) if raw > 0 else 0.0
+
+    def score(self, text: str, found_keywords: Iterable[str], doc_id: Optional[str] = None) -> float:
+        """
+        Observe a document and return its relevance points
+
+        Args:
+            text: Item text
+            found_keywords: Keywords matched in the text
+            doc_id: Stable document id (URL)
+
+        Returns:
+            Relevance points in 0..MAX_SCORE (callers add bonuses and round)
+        """
+        text_lower = text.lower()
+        vector = self.vector(text_lower, found_keywords)
+        length = len(text_lower.split())
+        self.observe(doc_id, vector, length)
+        return self.to_points(self.raw_score(vector, length))
+
+    def load(self) -> bool:
+        """
+        Load corpus statistics, remapping document frequencies by keyword
+
+        Returns:
+            True if the file was read (on failure the in-memory statistics are kept)
+        """
+        try:
+            with np.load(self.path) as data:
+                stored_vocab = [str(kw) for kw in data["vocabulary"]]
+                stored_df = data["df"]
+                doc_count, total_length = (int(v) for v in data["totals"])
+                seen = dict.fromkeys(int(h) for h in data["seen"])
+        except Exception as e:
+            logger.warning(f"Could not load corpus statistics from {self.path}: {e}")
+            return False
+
+        self.df = np.zeros(len(self.vocabulary), dtype=np.uint32)
+        self.doc_count, self.total_length, self._seen = doc_count, total_length, seen
+        for kw, df in zip(stored_vocab, stored_df):
+            k = self.index.get(kw)
+            if k is not None:
+                self.df[k] = df
+        return True
+
+    def save(self):
+        """
+        Merge this process's new documents into the persisted statistics (locked, atomic replace)
+
+        If the file can't be read, the in-memory statistics (which already
+        count every pending document once) replace it as they are. Pending
+        documents are cleared only once the file has been written.
+        """
+        if not self.path or not self._pending:
+            return
+
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Start from what other shards have saved meanwhile, then replay our documents
+                if os.path.exists(self.path):
+                    merged = self.load()
+                else:
+                    self.df = np.zeros(len(self.vocabulary), dtype=np.uint32)
+                    self.doc_count, self.total_length, self._seen = 0, 0, {}
+                    merged = True
+                if merged:
+                    for h, vector, length in self._pending:
+                        if h is None or h not in self._seen:
+                            self._add(h, vector, length)
+
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        np.savez_compressed(
+                            f,
+                            vocabulary=np.array(self.vocabulary, dtype=str),
+                            df=self.df,
+                            totals=np.array([self.doc_count, self.total_length], dtype=np.int64),
+                            seen=np.fromiter(self._seen, dtype=np.uint64, count=len(self._seen)),
+                        )
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self._pending = []
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,150 @@
+"""
+Run state shared across instances
+
+Checkpoints (sources a cycle has covered) and last-seen marks (newest item
+processed per source) are read back by the next run. On Cloud Functions
+that run usually lands on a fresh instance with an empty disk, so with
+RUN_STATE_STORE=sheets (the default) they are kept in a "Run State" tab of
+the spreadsheet the agents already write to, one JSON value per key, like
+the WebSub subscriptions. RUN_STATE_STORE=local keeps them as JSON files
+under STATE_DIR instead (a single host, or the long-running worker).
+Testing Sheets clients keep nothing, so they use local files too.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from shared.sheets_client import SheetsClient
+from shared.utils import get_state_dir
+
+RUN_STATE = "Run State"
+
+
+class FileStateStore:
+    """JSON values by key, one file each in a local directory"""
+
+    def __init__(self, directory: str):
+        """
+        Initialize store
+
+        Args:
+            directory: Directory for the values (created if missing)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Read a value
+
+        Args:
+            key: Value key
+
+        Returns:
+            Stored dict, or None if there is none
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, key: str, value: Dict):
+        """
+        Write a value atomically
+
+        Args:
+            key: Value key
+            value: JSON-serializable dict
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class SheetStateStore:
+    """JSON values by key in a spreadsheet tab (key, value, updated_at), read through on every load"""
+
+    def __init__(self, sheets_client, namespace: str, sheet_name: str = RUN_STATE):
+        """
+        Initialize store
+
+        Args:
+            sheets_client: SheetsClient
+            namespace: Key prefix (e.g. "checkpoints"), so several stores can share the tab
+            sheet_name: Tab (header row 1, one value per row)
+        """
+        self.sheets_client = sheets_client
+        self.namespace = namespace
+        self.sheet_name = sheet_name
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # Shard processes hand their stores back to the coordinator; Sheets clients hold live connections
+        return {"namespace": self.namespace, "sheet_name": self.sheet_name}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(SheetsClient(), state["namespace"], state["sheet_name"])
+
+    def _rows(self) -> List[Tuple[int, List]]:
+        rows = self.sheets_client.read_sheet(f"{self.sheet_name}!A2:C")
+        return [(number, cells) for number, cells in enumerate(rows, start=2) if cells and cells[0]]
+
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Read a value
+
+        Args:
+            key: Value key (within the namespace)
+
+        Returns:
+            Stored dict, or None if there is none
+        """
+        name = f"{self.namespace}/{key}"
+        for _, cells in self._rows():
+            if cells[0] == name and len(cells) > 1 and cells[1]:
+                return json.loads(cells[1])
+        return None
+
+    def save(self, key: str, value: Dict):
+        """
+        Create or replace a value
+
+        Args:
+            key: Value key (within the namespace)
+            value: JSON-serializable dict
+        """
+        name = f"{self.namespace}/{key}"
+        values = [name, json.dumps(value, sort_keys=True), time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())]
+        with self._lock:
+            number = next((n for n, cells in self._rows() if cells[0] == name), None)
+            if number is None:
+                self.sheets_client.append_rows(self.sheet_name, [values])
+            else:
+                self.sheets_client.batch_update([
+                    {"range": f"{self.sheet_name}!A{number}:C{number}", "values": [values]}
+                ])
+
+
+def build_state_store(sheets_client, namespace: str):
+    """
+    Build the run state store selected by RUN_STATE_STORE
+
+    Args:
+        sheets_client: The agent's SheetsClient
+        namespace: Kind of state (also the local directory under STATE_DIR)
+
+    Returns:
+        SheetStateStore or FileStateStore
+    """
+    if os.getenv("RUN_STATE_STORE", "sheets").lower() == "sheets" and not sheets_client.testing:
+        return SheetStateStore(sheets_client, namespace)
+    return FileStateStore(get_state_dir(namespace))
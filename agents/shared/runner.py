@@ -0,0 +1,142 @@
+"""
+Unified runner for agents that share a schedule
+
+Runs several agents' collection phases concurrently against one Sheets
+client, de-duplicates all of their signals against a single read of the
+Automation Queue URL columns (or its local mirror), and commits every new
+row in one append. Around that it follows each agent's own run(): recover
+interrupted writes, sync the gazetteer, collect, then flush sinks and
+profiles and commit checkpoints.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+from shared.checkpoint import Deadline
+from shared.sinks import DedupView, SheetsSink
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedRunner:
+    """Collects from several agents concurrently and writes one batch"""
+
+    def __init__(self, sheets_client, agents: Dict[str, Tuple[object, str]]):
+        """
+        Initialize runner
+
+        Args:
+            sheets_client: SheetsClient shared by every agent
+            agents: Agent name -> (agent instance, collect method name)
+        """
+        self.sheets_client = sheets_client
+        self.agents = agents
+
+    def prepare(self):
+        """Finish batches previous runs left unacknowledged and learn new company names, for every agent"""
+        for agent, _ in self.agents.values():
+            agent.sink.recover()
+            profiles = getattr(agent, "profiles", None)
+            if profiles is not None:
+                profiles.recover()
+            gazetteer = getattr(agent, "gazetteer", None)
+            if gazetteer is not None:
+                gazetteer.sync(self.sheets_client)
+
+    def collect(self, deadline: Optional[Deadline] = None) -> Dict[str, List]:
+        """
+        Run every agent's collection phase concurrently
+
+        Args:
+            deadline: Run deadline shared by every agent
+
+        Returns:
+            Agent name -> signals
+        """
+        with ThreadPoolExecutor(max_workers=len(self.agents), thread_name_prefix="collect") as executor:
+            futures = {
+                name: executor.submit(getattr(agent, method), deadline)
+                for name, (agent, method) in self.agents.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def run(self, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Collect from every agent, then commit all new Sheets rows in one write
+
+        Non-Sheets sinks (local JSONL/columnar) and keyword profiles are
+        written per agent as usual.
+
+        Args:
+            deadline: Run deadline started by the caller (defaults to one starting now)
+
+        Returns:
+            Run summary with per-agent signal and row counts
+        """
+        # Recovery and the gazetteer syncs count against the run's budget too
+        deadline = deadline or Deadline.from_env()
+        start = time.monotonic()
+        self.prepare()
+        collected = self.collect(deadline)
+
+        sheets_sinks = [
+            sink
+            for agent, _ in self.agents.values()
+            for sink in agent.sink.sinks
+            if isinstance(sink, SheetsSink)
+        ]
+        if not sheets_sinks:
+            return self._write(collected, None, None, None, start)
+
+        # One dedup read (or mirror sync) and one append for every agent. Each distinct journal is
+        # locked (and replayed) once; agents writing the same tab share a journal directory.
+        with ExitStack() as stack:
+            journals = {}
+            for sink in sheets_sinks:
+                root = sink.journal.root if sink.journal is not None else None
+                if root not in journals:
+                    journals[root] = stack.enter_context(sink.locked())
+            journal = journals[next(iter(journals))]
+            columns = sorted({sink.dedup_column for sink in sheets_sinks})
+            dedup = sheets_sinks[0].dedup_view(columns) or DedupView(self.sheets_client, columns)
+            return self._write(collected, sheets_sinks[0], dedup, journal, start)
+
+    def _write(self, collected: Dict[str, List], sheets_sink, dedup, journal, start: float) -> Dict:
+        keys, rows = [], []
+        summary: Dict = {}
+        for name, (agent, _) in self.agents.items():
+            signals = collected[name]
+            # Keyword-profile signals go to their own tabs; the rest join the shared batch
+            profiles = getattr(agent, "profiles", None)
+            if profiles is not None:
+                signals = profiles.write(signals, agent.metrics)
+            agent_rows = 0
+            for sink in agent.sink.sinks:
+                if isinstance(sink, SheetsSink):
+                    prepared_keys, prepared = sink.prepare(sink.aggregate(signals, dedup), dedup, journal)
+                    keys.extend(prepared_keys)
+                    rows.extend(prepared)
+                    agent_rows = len(prepared)
+                else:
+                    sink.write(signals)
+            summary[name] = {"signals_found": len(signals), "rows_written": agent_rows}
+            logger.info(f"{name}: {len(signals)} signals, {agent_rows} new rows")
+
+        if rows:
+            sheets_sink.commit(keys, rows, journal)
+            logger.info(f"Wrote {len(rows)} rows to Automation Queue in one batch")
+
+        for agent, _ in self.agents.values():
+            agent.sink.flush()
+            profiles = getattr(agent, "profiles", None)
+            if profiles is not None:
+                profiles.flush()
+            if hasattr(agent, "commit_checkpoint"):
+                agent.commit_checkpoint()
+
+        summary["rows_written"] = len(rows)
+        summary["elapsed_seconds"] = round(time.monotonic() - start, 3)
+        return summary
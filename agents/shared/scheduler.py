@@ -0,0 +1,176 @@
+"""
+Internal interval scheduler for the long-running worker
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from shared.utils import get_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A named callable that runs on a fixed interval"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval_seconds: float, run_immediately: bool = True):
+        """
+        Initialize job
+
+        Args:
+            name: Job name (used in logs and health output)
+            func: Callable to run
+            interval_seconds: Seconds between the start of consecutive runs
+            run_immediately: If True, the first run happens as soon as the scheduler starts
+        """
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.next_run = time.monotonic() + (0 if run_immediately else interval_seconds)
+
+        self.run_count = 0
+        self.error_count = 0
+        self.last_started: Optional[str] = None
+        self.last_finished: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+
+    def run(self):
+        """Run the job once, recording the outcome instead of raising"""
+        self.last_started = get_timestamp()
+        start = time.monotonic()
+        self.next_run = start + self.interval_seconds
+
+        try:
+            self.last_result = self.func()
+            self.last_error = None
+        except Exception as e:
+            self.error_count += 1
+            self.last_error = str(e)
+            logger.error(f"Job {self.name} failed: {e}", exc_info=True)
+        finally:
+            self.run_count += 1
+            self.last_duration = round(time.monotonic() - start, 3)
+            self.last_finished = get_timestamp()
+
+    def status(self) -> Dict:
+        """
+        Get a JSON-serializable status snapshot
+
+        Returns:
+            Status dict
+        """
+        return {
+            "interval_seconds": self.interval_seconds,
+            "run_count": self.run_count,
+            "error_count": self.error_count,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_duration": self.last_duration,
+            "last_result": self.last_result if isinstance(self.last_result, (dict, list, str, int, float)) else None,
+            "last_error": self.last_error,
+            "next_run_in": max(0, round(self.next_run - time.monotonic(), 1)),
+        }
+
+
+class Scheduler:
+    """Runs registered jobs sequentially on their intervals in a background thread"""
+
+    def __init__(self):
+        """Initialize scheduler"""
+        self.jobs: List[Job] = []
+        self.current_job: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_seconds: float,
+        run_immediately: bool = True
+    ) -> Job:
+        """
+        Register a job
+
+        Args:
+            name: Job name
+            func: Callable to run
+            interval_seconds: Seconds between runs
+            run_immediately: Run once as soon as the scheduler starts
+
+        Returns:
+            The registered job
+        """
+        job = Job(name, func, interval_seconds, run_immediately)
+        self.jobs.append(job)
+        logger.info(f"Scheduled {name} every {interval_seconds}s")
+        return job
+
+    def run_pending(self) -> int:
+        """
+        Run every job that is due
+
+        Returns:
+            Number of jobs run
+        """
+        ran = 0
+        for job in sorted(self.jobs, key=lambda j: j.next_run):
+            if self._stop.is_set():
+                break
+            if job.next_run <= time.monotonic():
+                self.current_job = job.name
+                job.run()
+                self.current_job = None
+                ran += 1
+        return ran
+
+    def _loop(self):
+        """Scheduler loop: run due jobs, then sleep until the next one is due"""
+        while not self._stop.is_set():
+            self.run_pending()
+            if not self.jobs:
+                self._stop.wait(1.0)
+                continue
+            delay = min(job.next_run for job in self.jobs) - time.monotonic()
+            self._stop.wait(max(delay, 0.05))
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the scheduler, waiting for the job in progress to finish
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        """
+        Check whether the scheduler thread is alive
+
+        Returns:
+            True if running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict:
+        """
+        Get status for all jobs
+
+        Returns:
+            Dict of job name to status dict
+        """
+        return {job.name: job.status() for job in self.jobs}
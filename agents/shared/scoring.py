@@ -0,0 +1,288 @@
+"""
+Vectorized batch scoring for keyword signals
+
+Builds an items x keywords hit matrix for a whole batch with NumPy string
+operations (one pass per keyword over the batch instead of one Python loop
+per item per keyword), then derives category counts, signal types and
+weighted relevance scores as matrix operations.
+
+Weights come from an optional "weights" section in the keyword JSON files:
+
+    "weights": {
+        "categories": {"solution_seeking": 1.5},
+        "keywords": {"looking for cto": 2.0}
+    }
+
+A keyword's weight is its keyword weight times its category weight (both
+default to 1.0), so files without a "weights" section score exactly as the
+original count-based heuristic.
+
+Hits come from substring containment by default, or from the token-level
+KeywordIndex (stemmed unigrams and phrases) with KEYWORD_MATCHER=token.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.keyword_index import KeywordIndex, get_matcher
+
+# NumPy 2 exposes fast string ufuncs under np.strings; np.char works everywhere
+_np_strings = getattr(np, "strings", np.char)
+
+WEIGHTS_KEY = "weights"
+POINTS_PER_KEYWORD = 2
+MAX_SCORE = 10
+
+
+def keyword_categories(keywords_config: Dict) -> Dict[str, List[str]]:
+    """
+    Get the keyword categories from a keyword config, lowercased
+
+    Args:
+        keywords_config: Parsed keyword JSON (category -> list, plus optional "weights")
+
+    Returns:
+        Dict of category name to lowercased keyword list
+    """
+    return {
+        name: [kw.lower() for kw in values]
+        for name, values in keywords_config.items()
+        if name != WEIGHTS_KEY and isinstance(values, list)
+    }
+
+
+class BatchScores:
+    """Scores for one batch; hits are kept bit-packed (one bit per item/keyword)"""
+
+    def __init__(
+        self,
+        vocabulary: List[str],
+        packed_hits: np.ndarray,
+        category_counts: np.ndarray,
+        scores: np.ndarray,
+        has_regional: np.ndarray,
+        signal_types: List[Optional[str]]
+    ):
+        self.vocabulary = vocabulary
+        self.packed_hits = packed_hits
+        self.category_counts = category_counts
+        self.scores = scores
+        self.has_regional = has_regional
+        self.signal_types = signal_types
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def keyword_counts(self) -> np.ndarray:
+        """
+        Get the number of matched keywords per item
+
+        Returns:
+            Integer array of length N
+        """
+        return self.category_counts.sum(axis=1) if self.category_counts.size else np.zeros(len(self), dtype=int)
+
+    def keywords_for(self, index: int) -> List[str]:
+        """
+        Get the matched keywords for one item, in vocabulary order
+
+        Args:
+            index: Item index within the batch
+
+        Returns:
+            List of matched keywords
+        """
+        row = np.unpackbits(self.packed_hits[index], count=len(self.vocabulary))
+        return [self.vocabulary[k] for k in np.flatnonzero(row)]
+
+
+class BatchScorer:
+    """Scores batches of texts against a keyword vocabulary"""
+
+    def __init__(
+        self,
+        keywords_config: Dict,
+        regional_keywords: Sequence[str] = (),
+        signal_type_rules: Sequence[Tuple[str, Sequence[str]]] = (),
+        default_signal_type: Optional[str] = None,
+        chunk_size: int = 4096,
+        matcher: Optional[str] = None
+    ):
+        """
+        Initialize scorer
+
+        Args:
+            keywords_config: Parsed keyword JSON file
+            regional_keywords: Regional terms; an item matching any gets the regional bonus
+            signal_type_rules: Ordered (signal type, trigger terms) pairs; the first
+                rule with a term contained in any matched keyword wins
+            default_signal_type: Signal type when no rule matches
+            chunk_size: Items per vectorized chunk (bounds temporary string arrays)
+            matcher: "substring" or "token" (defaults to KEYWORD_MATCHER)
+        """
+        categories = keyword_categories(keywords_config)
+        weights = keywords_config.get(WEIGHTS_KEY, {}) or {}
+        category_weights = weights.get("categories", {})
+        keyword_weights = {k.lower(): v for k, v in weights.get("keywords", {}).items()}
+
+        # Columns follow config order, duplicates included, matching the agents' all_keywords
+        self.category_names = list(categories)
+        self.vocabulary: List[str] = []
+        column_categories = []
+        column_weights = []
+        for c, (name, kws) in enumerate(categories.items()):
+            for kw in kws:
+                self.vocabulary.append(kw)
+                column_categories.append(c)
+                column_weights.append(keyword_weights.get(kw, 1.0) * category_weights.get(name, 1.0))
+
+        self.weights = np.asarray(column_weights, dtype=np.float64)
+        self.keyword_weights = dict(zip(self.vocabulary, column_weights))
+
+        # K x C membership matrix
+        self.category_matrix = np.zeros((len(self.vocabulary), len(self.category_names)), dtype=np.int32)
+        if self.vocabulary:
+            self.category_matrix[np.arange(len(self.vocabulary)), column_categories] = 1
+
+        self.regional_keywords = [r.lower() for r in regional_keywords]
+
+        # K x R matrix: does keyword k trigger signal-type rule r
+        self.signal_type_labels = [label for label, _ in signal_type_rules]
+        self.default_signal_type = default_signal_type
+        self.rule_matrix = np.array(
+            [[any(term in kw for term in terms) for _, terms in signal_type_rules] for kw in self.vocabulary],
+            dtype=bool,
+        ).reshape(len(self.vocabulary), len(self.signal_type_labels))
+
+        self.chunk_size = chunk_size
+
+        # Token matcher: inverted indexes over stemmed keywords and regional terms
+        self.matcher = matcher or get_matcher()
+        self.index: Optional[KeywordIndex] = None
+        self.regional_index: Optional[KeywordIndex] = None
+        if self.matcher == "token":
+            self.index = KeywordIndex(self.vocabulary)
+            self.regional_index = KeywordIndex(self.regional_keywords)
+
+    def keyword_score(self, found_keywords: Sequence[str]) -> float:
+        """
+        Weighted base score for a single item's matched keywords
+
+        Args:
+            found_keywords: Keywords matched in the item
+
+        Returns:
+            Weighted points before bonuses and capping
+        """
+        return sum(POINTS_PER_KEYWORD * self.keyword_weights.get(kw, 1.0) for kw in found_keywords)
+
+    @staticmethod
+    def _contains(texts: np.ndarray, terms: Sequence[str]) -> np.ndarray:
+        """
+        Build an N x len(terms) containment matrix
+
+        Args:
+            texts: Lowercased string array
+            terms: Terms to look for
+
+        Returns:
+            Boolean matrix
+        """
+        hits = np.zeros((len(texts), len(terms)), dtype=bool)
+        for j, term in enumerate(terms):
+            hits[:, j] = _np_strings.find(texts, term) >= 0
+        return hits
+
+    def match(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match a batch of texts against the vocabulary and regional terms
+
+        Args:
+            texts: Item texts (title + body)
+
+        Returns:
+            Tuple of (N x K keyword hit matrix, N regional flags)
+        """
+        n = len(texts)
+        k = len(self.vocabulary)
+
+        hits = np.zeros((n, k), dtype=bool)
+        has_regional = np.zeros(n, dtype=bool)
+        if self.index is not None:
+            hits = self.index.hit_matrix(texts)
+            if self.regional_keywords:
+                has_regional = self.regional_index.hit_matrix(texts).any(axis=1)
+        else:
+            for start in range(0, n, self.chunk_size):
+                chunk = _np_strings.lower(np.asarray(texts[start:start + self.chunk_size], dtype=str))
+                stop = start + len(chunk)
+                hits[start:stop] = self._contains(chunk, self.vocabulary)
+                if self.regional_keywords:
+                    has_regional[start:stop] = self._contains(chunk, self.regional_keywords).any(axis=1)
+        return hits, has_regional
+
+    def score(
+        self,
+        texts: Sequence[str],
+        upvotes: Optional[Sequence[int]] = None,
+        regional_bonus: int = 0
+    ) -> BatchScores:
+        """
+        Score a batch of texts
+
+        Args:
+            texts: Item texts (title + body)
+            upvotes: Optional per-item upvote counts; adds min(upvotes // 10, 3)
+            regional_bonus: Points added to items matching a regional keyword
+
+        Returns:
+            BatchScores for the batch
+        """
+        hits, has_regional = self.match(texts)
+        return self.score_hits(hits, has_regional, upvotes, regional_bonus)
+
+    def score_hits(
+        self,
+        hits: np.ndarray,
+        has_regional: np.ndarray,
+        upvotes: Optional[Sequence[int]] = None,
+        regional_bonus: int = 0
+    ) -> BatchScores:
+        """
+        Score a batch from precomputed matches
+
+        Args:
+            hits: N x K keyword hit matrix (columns in vocabulary order)
+            has_regional: N regional flags
+            upvotes: Optional per-item upvote counts; adds min(upvotes // 10, 3)
+            regional_bonus: Points added to items matching a regional keyword
+
+        Returns:
+            BatchScores for the batch
+        """
+        n = len(hits)
+        hit_counts = hits.astype(np.int32)
+        category_counts = hit_counts @ self.category_matrix
+
+        points = POINTS_PER_KEYWORD * (hit_counts @ self.weights)
+        points += np.where(has_regional, regional_bonus, 0)
+        if upvotes is not None:
+            points += np.minimum(np.floor_divide(np.asarray(upvotes, dtype=np.int64), 10), 3)
+        scores = np.minimum(np.rint(points), MAX_SCORE).astype(int)
+
+        signal_types: List[Optional[str]] = [None] * n
+        if self.signal_type_labels or self.default_signal_type:
+            rule_hits = (hit_counts @ self.rule_matrix.astype(np.int32)) > 0
+            first_rule = np.where(rule_hits.any(axis=1), rule_hits.argmax(axis=1), -1)
+            labels = self.signal_type_labels
+            signal_types = [labels[r] if r >= 0 else self.default_signal_type for r in first_rule]
+
+        return BatchScores(
+            self.vocabulary,
+            np.packbits(hits, axis=1),
+            category_counts,
+            scores,
+            has_regional,
+            signal_types,
+        )
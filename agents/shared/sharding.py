@@ -0,0 +1,220 @@
+"""
+Deterministic source sharding and a multi-process shard coordinator
+
+Sources are assigned to shards by a stable hash of their key (feed URL or
+subreddit name), so every process or function instance configured with the
+same SHARD_COUNT agrees on ownership without talking to each other.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """
+    Get the shard that owns a key
+
+    Args:
+        key: Source key (feed URL, subreddit name)
+        num_shards: Total number of shards
+
+    Returns:
+        Shard index in [0, num_shards)
+    """
+    if num_shards <= 1:
+        return 0
+    digest = hashlib.blake2b(key.strip().lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+def select_shard(
+    items: Iterable[Any],
+    shard_index: int,
+    num_shards: int,
+    key: Callable[[Any], str] = str
+) -> List[Any]:
+    """
+    Filter a source list down to the items owned by one shard
+
+    Args:
+        items: Source items
+        shard_index: This shard's index
+        num_shards: Total number of shards
+        key: Function returning the hash key for an item
+
+    Returns:
+        Items owned by the shard, in their original order
+    """
+    if num_shards <= 1:
+        return list(items)
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"shard_index {shard_index} out of range for {num_shards} shards")
+    return [item for item in items if shard_of(key(item), num_shards) == shard_index]
+
+
+def get_shard_config(shard_index: Optional[int] = None, num_shards: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Resolve shard settings, falling back to SHARD_INDEX / SHARD_COUNT env vars
+
+    Args:
+        shard_index: Explicit shard index
+        num_shards: Explicit shard count
+
+    Returns:
+        Tuple of (shard_index, num_shards)
+    """
+    if num_shards is None:
+        num_shards = int(os.getenv("SHARD_COUNT", "1"))
+    if shard_index is None:
+        shard_index = int(os.getenv("SHARD_INDEX", "0"))
+    return shard_index, max(num_shards, 1)
+
+
+def merge_metrics(shard_metrics: List[Dict]) -> Dict:
+    """
+    Merge per-shard metrics
+
+    Numeric counters are summed, except *_seconds values which take the
+    maximum (shards run concurrently, so wall time is the slowest shard).
+
+    Args:
+        shard_metrics: List of metrics dicts
+
+    Returns:
+        Merged metrics dict
+    """
+    merged: Dict[str, Any] = {"shards": len(shard_metrics)}
+    for metrics in shard_metrics:
+        for name, value in metrics.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if name.endswith("_seconds"):
+                merged[name] = max(merged.get(name, 0), value)
+            else:
+                merged[name] = merged.get(name, 0) + value
+    return merged
+
+
+def _run_shard(agent_cls, collect_method: str, shard_index: int, num_shards: int, agent_kwargs: Dict):
+    """
+    Worker process body: build a shard-scoped agent and run its collection phase
+
+    Returns:
+        Tuple of (shard_index, signals, metrics, progress), where progress is the
+        shard's unsaved (last-seen marks, checkpoint), committed by the coordinator
+        once the merged batch is written
+    """
+    start = time.monotonic()
+    agent = agent_cls(shard_index=shard_index, num_shards=num_shards, **agent_kwargs)
+    signals = getattr(agent, collect_method)()
+    metrics = dict(getattr(agent, "metrics", {}))
+    metrics["collect_seconds"] = round(time.monotonic() - start, 3)
+    progress = (getattr(agent, "last_seen", None), getattr(agent, "checkpoint", None))
+    return shard_index, signals, metrics, progress
+
+
+class ShardCoordinator:
+    """Runs an agent's collection phase across N processes and commits one write"""
+
+    def __init__(
+        self,
+        agent_cls,
+        collect_method: str,
+        num_shards: int,
+        **agent_kwargs
+    ):
+        """
+        Initialize coordinator
+
+        Args:
+            agent_cls: Agent class accepting shard_index/num_shards keyword arguments
+            collect_method: Name of the method returning a list of signals
+            num_shards: Number of worker processes
+            **agent_kwargs: Extra keyword arguments for the agent constructor
+        """
+        self.agent_cls = agent_cls
+        self.collect_method = collect_method
+        self.num_shards = max(num_shards, 1)
+        self.agent_kwargs = agent_kwargs
+        self.shard_metrics: List[Dict] = []
+        self.shard_progress: List[Tuple] = []
+
+    def collect(self) -> List:
+        """
+        Run every shard in its own process and merge their signals
+
+        Signals are ordered by shard index and de-duplicated by profile and
+        source URL, so an article seen in two feeds owned by different shards
+        is written once per profile.
+
+        Returns:
+            Merged list of signals
+        """
+        args = [
+            (self.agent_cls, self.collect_method, i, self.num_shards, self.agent_kwargs)
+            for i in range(self.num_shards)
+        ]
+
+        with multiprocessing.get_context().Pool(self.num_shards) as pool:
+            results = pool.starmap(_run_shard, args)
+
+        results.sort(key=lambda r: r[0])
+        self.shard_metrics = [metrics for _, _, metrics, _ in results]
+        self.shard_progress = [progress for _, _, _, progress in results]
+
+        seen = set()
+        signals = []
+        for _, shard_signals, _, _ in results:
+            for signal in shard_signals:
+                key = (signal.profile, signal.source_url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                signals.append(signal)
+
+        return signals
+
+    def run(self) -> Dict:
+        """
+        Collect across shards, then write all new rows through one writer agent
+
+        The writer goes through the same sequence as a single-process run:
+        recover interrupted writes, write, flush buffered sinks, and only then
+        persist each shard's last-seen marks and checkpoint.
+
+        Returns:
+            Run summary with merged metrics
+        """
+        logger.info(f"Running {self.agent_cls.__name__} across {self.num_shards} shards")
+
+        writer = self.agent_cls(shard_index=0, num_shards=1, **self.agent_kwargs)
+        writer.sink.recover()
+        if writer.profiles is not None:
+            writer.profiles.recover()
+
+        signals = self.collect()
+
+        rows_written = writer.write_signals(signals)
+        writer.sink.flush()
+        if writer.profiles is not None:
+            writer.profiles.flush()
+        self.commit_progress()
+
+        metrics = merge_metrics(self.shard_metrics)
+        logger.info(f"Shard metrics: {metrics}")
+
+        return {"signals_found": len(signals), "rows_written": rows_written, "metrics": metrics}
+
+    def commit_progress(self):
+        """Persist every shard's last-seen marks and checkpoint (call once the merged batch is written)"""
+        for (last_seen, checkpoint), metrics in zip(self.shard_progress, self.shard_metrics):
+            if last_seen is not None:
+                last_seen.save()
+            if checkpoint is not None:
+                checkpoint.save(complete=metrics.get("sources_deferred", 0) == 0)
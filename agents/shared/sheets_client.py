@@ -123,6 +123,31 @@ class SheetsClient:
         values = [[str(v) for v in row.values()] for row in data]
         return self.append_row(values, sheet_name)
 
+    def batch_update(
+        self,
+        data: List[Dict]
+    ) -> Dict:
+        """
+        Overwrite several ranges in one request
+
+        Args:
+            data: List of {"range": A1 range, "values": rows}
+
+        Returns:
+            Response from Sheets API
+        """
+        if self.testing:
+            return {"totalUpdatedCells": sum(len(row) for item in data for row in item["values"])}
+
+        body = {'valueInputOption': 'RAW', 'data': data}
+
+        result = self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body=body
+        ).execute()
+
+        return result
+
     def read_sheet(
         self,
         range_name: str = "Sheet1!A:Z"
@@ -0,0 +1,502 @@
+"""
+Output sinks for signals
+
+Agents write through a sink instead of calling the Sheets client directly.
+SheetsSink is the original Automation Queue behaviour; JsonlSink and
+ColumnarSink are bulk local backends. MultiSink fans a batch out to several
+sinks concurrently, each with its own minimum score, so full volume can go
+to local storage while only high-score signals reach Sheets.
+
+Configured with OUTPUT_SINKS (comma-separated: sheets, jsonl, columnar) and
+<NAME>_MIN_SCORE (e.g. SHEETS_MIN_SCORE=6). With QUEUE_MIRROR_ENABLED=true the
+sheets sink checks duplicates against a local mirror of its tab (see
+queue_mirror.py) instead of reading the URL column, and with
+AGGREGATE_BY_COMPANY=true it folds signals into existing company rows (see
+aggregation.py).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from shared.aggregation import CompanyAggregator
+from shared.journal import WriteJournal, idempotency_key
+from shared.queue_mirror import QueueMirror, get_mirror
+from shared.records import AUTOMATION_QUEUE, Signal
+from shared.utils import LogSampler, get_state_dir, get_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    """Base class for signal outputs"""
+
+    name = "sink"
+
+    def __init__(self, min_score: int = 0):
+        """
+        Initialize sink
+
+        Args:
+            min_score: Only signals scoring at least this are written
+        """
+        self.min_score = min_score
+
+    def accepts(self, signal: Signal) -> bool:
+        """
+        Check the sink's routing filter
+
+        Args:
+            signal: Signal
+
+        Returns:
+            True if the signal should be written to this sink
+        """
+        return signal.relevance_score >= self.min_score
+
+    def write(self, signals: List[Signal]) -> int:
+        """
+        Write the accepted subset of a batch
+
+        Args:
+            signals: Signals
+
+        Returns:
+            Number of signals written
+        """
+        return self._write([signal for signal in signals if self.accepts(signal)])
+
+    def _write(self, signals: List[Signal]) -> int:
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist any buffered output"""
+
+    def recover(self):
+        """Complete writes interrupted by a previous run"""
+
+
+class SheetsSink(Sink):
+    """Appends to the Automation Queue tab, skipping URLs already present"""
+
+    name = "sheets"
+
+    def __init__(
+        self,
+        sheets_client,
+        row_builder: Callable[[Signal], List],
+        dedup_column: str,
+        sheet_name: str = AUTOMATION_QUEUE,
+        min_score: int = 0,
+        journal: Optional[WriteJournal] = None,
+        mirror: Optional[QueueMirror] = None,
+        aggregator: Optional[CompanyAggregator] = None
+    ):
+        """
+        Initialize sink
+
+        Args:
+            sheets_client: SheetsClient
+            row_builder: Converts a signal to a row in the agent's layout
+            dedup_column: Column holding the source URL (for duplicate checks)
+            sheet_name: Tab to append to
+            min_score: Only signals scoring at least this are written
+            journal: Write-ahead journal for crash-safe, idempotent appends
+            mirror: Local mirror of the tab for duplicate checks (synced before each write)
+            aggregator: Per-company row upserts (requires the mirror)
+        """
+        super().__init__(min_score)
+        self.sheets_client = sheets_client
+        self.row_builder = row_builder
+        self.dedup_column = dedup_column
+        self.sheet_name = sheet_name
+        self.journal = journal
+        self.mirror = mirror
+        self.aggregator = aggregator
+
+    @contextmanager
+    def locked(self) -> Iterator[Optional[WriteJournal]]:
+        """
+        Hold the journal lock (if journaling) and re-send unacknowledged batches
+
+        Yields:
+            The loaded journal, or None without one
+        """
+        if self.journal is None:
+            yield None
+            return
+        with self.journal.lock() as journal:
+            journal.replay(self.sheets_client)
+            yield journal
+
+    def prepare(
+        self,
+        signals: List[Signal],
+        dedup: Optional["DedupView"] = None,
+        journal: Optional[WriteJournal] = None
+    ) -> Tuple[List[str], List[List]]:
+        """
+        Filter a batch and build rows for the signals not already in the sheet
+
+        Args:
+            signals: Signals
+            dedup: Shared view of URLs already in the sheet (defaults to a
+                check_duplicate read per signal)
+            journal: Loaded journal; keys it has committed are skipped without a read
+
+        Returns:
+            Tuple of (idempotency key per row, rows to append)
+        """
+        keys, rows = [], []
+        batch_keys = set()
+        duplicates = LogSampler(logger)
+        for signal in signals:
+            if not self.accepts(signal):
+                continue
+            key = idempotency_key(signal.source_url)
+            if key in batch_keys or (journal is not None and journal.is_committed(key)):
+                duplicate = True
+            elif dedup is not None:
+                duplicate = not dedup.add(signal.source_url)
+            else:
+                duplicate = self.sheets_client.check_duplicate(self.sheet_name, self.dedup_column, signal.source_url)
+            if duplicate:
+                duplicates.log(f"Skipping duplicate: {signal.source_url}")
+                continue
+            batch_keys.add(key)
+            keys.append(key)
+            rows.append(self.row_builder(signal))
+        duplicates.summary("duplicates skipped")
+        return keys, rows
+
+    def commit(self, keys: List[str], rows: List[List], journal: Optional[WriteJournal] = None) -> int:
+        """
+        Append prepared rows, through the journal when one is held
+
+        Args:
+            keys: Idempotency key per row
+            rows: Rows from prepare()
+            journal: Journal held via locked()
+
+        Returns:
+            Number of rows appended
+        """
+        if not rows:
+            return 0
+        if journal is not None:
+            return journal.commit(self.sheets_client, self.sheet_name, keys, rows)
+        self.sheets_client.append_rows(self.sheet_name, rows)
+        return len(rows)
+
+    def dedup_view(self, columns: Optional[List[str]] = None):
+        """
+        Get a duplicate checker for a write: the synced mirror if there is one, else None
+
+        Args:
+            columns: URL columns to check (defaults to this sink's)
+
+        Returns:
+            MirrorDedupView, or None (prepare() then reads the column per signal)
+        """
+        if self.mirror is None:
+            return None
+        self.mirror.sync(self.sheets_client)
+        return self.mirror.dedup_view(columns or [self.dedup_column])
+
+    def aggregate(self, signals: List[Signal], dedup) -> List[Signal]:
+        """
+        Fold accepted signals into existing company rows (no-op without an aggregator)
+
+        Args:
+            signals: Signals
+            dedup: Duplicate checker of the write
+
+        Returns:
+            Signals left to prepare() and append
+        """
+        if self.aggregator is None:
+            return signals
+        return self.aggregator.apply([signal for signal in signals if self.accepts(signal)], dedup)
+
+    def write(self, signals: List[Signal]) -> int:
+        with self.locked() as journal:
+            dedup = self.dedup_view()
+            keys, rows = self.prepare(self.aggregate(signals, dedup), dedup, journal)
+            return self.commit(keys, rows, journal)
+
+    def recover(self):
+        with self.locked():
+            pass
+
+
+class DedupView:
+    """
+    URLs already present in the sheet, read once and shared across writers
+
+    Reads each URL column a single time; add() then answers duplicate checks
+    in memory and records URLs written during the run.
+    """
+
+    def __init__(self, sheets_client, columns: List[str], sheet_name: str = AUTOMATION_QUEUE):
+        """
+        Initialize view
+
+        Args:
+            sheets_client: SheetsClient
+            columns: Column letters holding source URLs
+            sheet_name: Tab to read
+        """
+        self.urls = set()
+        for column in columns:
+            for row in sheets_client.read_sheet(f"{sheet_name}!{column}:{column}"):
+                if row:
+                    self.urls.add(row[0])
+
+    def add(self, url: str) -> bool:
+        """
+        Record a URL
+
+        Args:
+            url: Source URL
+
+        Returns:
+            True if the URL was new
+        """
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        return True
+
+    def seen(self, url: str) -> bool:
+        """
+        Check a URL without recording it
+
+        Args:
+            url: Source URL
+
+        Returns:
+            True if the URL is in the sheet or was added this run
+        """
+        return url in self.urls
+
+
+class JsonlSink(Sink):
+    """Append-only JSON Lines file, one signal per line"""
+
+    name = "jsonl"
+
+    def __init__(self, path: str, agent_name: str, min_score: int = 0):
+        """
+        Initialize sink
+
+        Args:
+            path: Output file
+            agent_name: Recorded on every line
+            min_score: Only signals scoring at least this are written
+        """
+        super().__init__(min_score)
+        self.path = path
+        self.agent_name = agent_name
+        self._lock = threading.Lock()
+
+    def _write(self, signals: List[Signal]) -> int:
+        if not signals:
+            return 0
+        written_at = get_timestamp()
+        lines = "".join(
+            json.dumps({"agent": self.agent_name, "written_at": written_at, **signal.to_dict()}) + "\n"
+            for signal in signals
+        )
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+        return len(signals)
+
+
+class ColumnarSink(Sink):
+    """
+    Column-chunked files for analytics
+
+    Signals are buffered and written as compressed .npz parts, one array per
+    field, so analytics can load single columns across many runs cheaply
+    (see read_columnar).
+    """
+
+    name = "columnar"
+
+    def __init__(self, directory: str, agent_name: str, batch_size: int = 10000, min_score: int = 0):
+        """
+        Initialize sink
+
+        Args:
+            directory: Output directory for parts
+            agent_name: Part file prefix
+            batch_size: Buffered signals that trigger a part write
+            min_score: Only signals scoring at least this are written
+        """
+        super().__init__(min_score)
+        self.directory = directory
+        self.agent_name = agent_name
+        self.batch_size = batch_size
+        self._buffer: List[Signal] = []
+        self._lock = threading.Lock()
+        self._parts = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, signals: List[Signal]) -> int:
+        with self._lock:
+            self._buffer.extend(signals)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+        return len(signals)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        columns = {
+            name: np.array([getattr(signal, name) for signal in self._buffer])
+            for name in Signal.__slots__
+        }
+        columns["relevance_score"] = columns["relevance_score"].astype(np.int16)
+        columns["written_at"] = np.full(len(self._buffer), get_timestamp())
+
+        self._parts += 1
+        filename = f"{self.agent_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._parts}.npz"
+        path = os.path.join(self.directory, filename)
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(f"{path}.tmp", path)
+        self._buffer = []
+
+
+def read_columnar(directory: str, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Load columns from every part in a columnar sink directory
+
+    Args:
+        directory: ColumnarSink directory
+        columns: Columns to load (default: all)
+
+    Returns:
+        Dict of column name to concatenated array
+    """
+    parts: Dict[str, List[np.ndarray]] = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".npz"):
+            continue
+        with np.load(os.path.join(directory, filename)) as data:
+            for name in columns or data.files:
+                parts.setdefault(name, []).append(data[name])
+    return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+
+class MultiSink:
+    """Writes each batch to several sinks concurrently"""
+
+    def __init__(self, sinks: List[Sink]):
+        """
+        Initialize multi-sink
+
+        Args:
+            sinks: Sinks to fan out to
+        """
+        self.sinks = sinks
+        self._executor = ThreadPoolExecutor(max_workers=max(len(sinks), 1), thread_name_prefix="sink")
+
+    def write(self, signals: List[Signal]) -> Dict[str, int]:
+        """
+        Write a batch to every sink; all sinks are attempted before any error is raised
+
+        Args:
+            signals: Signals
+
+        Returns:
+            Dict of sink name to signals written
+        """
+        if len(self.sinks) == 1:
+            return {self.sinks[0].name: self.sinks[0].write(signals)}
+
+        futures = {sink.name: self._executor.submit(sink.write, signals) for sink in self.sinks}
+
+        results, errors = {}, []
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Sink {name} failed: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
+
+    def flush(self):
+        """Flush every sink"""
+        for sink in self.sinks:
+            sink.flush()
+
+    def recover(self):
+        """Complete writes interrupted by a previous run"""
+        for sink in self.sinks:
+            sink.recover()
+
+
+def build_sinks(
+    agent_name: str,
+    sheets_client,
+    row_builder: Callable[[Signal], List],
+    dedup_column: str,
+    names: Optional[str] = None,
+    sheet_name: str = AUTOMATION_QUEUE
+) -> MultiSink:
+    """
+    Build the configured sinks for an agent
+
+    Args:
+        agent_name: Agent name (file prefixes)
+        sheets_client: SheetsClient for the sheets sink
+        row_builder: Row layout for the sheets sink
+        dedup_column: URL column for the sheets sink
+        names: Comma-separated sink names (defaults to OUTPUT_SINKS or "sheets")
+        sheet_name: Tab for the sheets sink (other tabs get their own journal)
+
+    Returns:
+        MultiSink over the configured sinks
+    """
+    names = names or os.getenv("OUTPUT_SINKS", "sheets")
+
+    def min_score(name):
+        return int(os.getenv(f"{name.upper()}_MIN_SCORE", "0"))
+
+    sinks: List[Sink] = []
+    for name in (n.strip().lower() for n in names.split(",") if n.strip()):
+        if name == SheetsSink.name:
+            journal = None
+            if os.getenv("WRITE_JOURNAL_ENABLED", "true").lower() == "true":
+                tab = [] if sheet_name == AUTOMATION_QUEUE else [re.sub(r"\W+", "_", sheet_name).lower()]
+                journal = WriteJournal(get_state_dir("journal", *tab))
+            # Aggregation looks companies up in the mirror, so it turns the mirror on
+            aggregate = os.getenv("AGGREGATE_BY_COMPANY", "false").lower() == "true"
+            mirror = get_mirror(sheet_name, enabled=True if aggregate else None)
+            sinks.append(SheetsSink(
+                sheets_client, row_builder, dedup_column, sheet_name, min_score=min_score(name), journal=journal,
+                mirror=mirror, aggregator=CompanyAggregator(mirror, sheets_client, sheet_name) if aggregate else None,
+            ))
+        elif name == JsonlSink.name:
+            path = os.path.join(get_state_dir("output"), f"{agent_name}.jsonl")
+            sinks.append(JsonlSink(path, agent_name, min_score=min_score(name)))
+        elif name == ColumnarSink.name:
+            sinks.append(ColumnarSink(get_state_dir("output", "columnar"), agent_name, min_score=min_score(name)))
+        else:
+            raise ValueError(f"Unknown output sink: {name}")
+    return MultiSink(sinks)
@@ -0,0 +1,141 @@
+"""
+Compressed, content-addressed store of raw fetched documents
+
+Every fetched feed document / Reddit listing is stored once under the
+SHA-256 of its bytes (gzip-compressed), and each fetch appends a line to a
+per-day JSONL index recording the source, fetch time, the recency cutoff
+the fetch applied and the signals the agents produced from it. Replay
+(shared.replay) re-analyzes the archive offline under the same cutoffs and
+diffs against those original signals.
+
+Layout:
+    <root>/objects/ab/abcdef....gz
+    <root>/index/YYYY-MM-DD.jsonl
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from shared.records import Signal
+
+
+def summarize_signals(signals: List[Signal]) -> List[Dict]:
+    """
+    Reduce signals to the fields compared by replay diffs
+
+    Args:
+        signals: Signals
+
+    Returns:
+        List of {source_url, relevance_score, signal_type}
+    """
+    return [
+        {
+            "source_url": signal.source_url,
+            "relevance_score": signal.relevance_score,
+            "signal_type": signal.signal_type,
+        }
+        for signal in signals
+    ]
+
+
+class SnapshotStore:
+    """Content-addressed snapshot archive on local disk"""
+
+    def __init__(self, root: str):
+        """
+        Initialize store
+
+        Args:
+            root: Root directory for this agent's snapshots
+        """
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "index"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.gz")
+
+    def put(self, content: bytes) -> str:
+        """
+        Store a document (no-op if identical content is already stored)
+
+        Args:
+            content: Raw document bytes
+
+        Returns:
+            SHA-256 hex digest of the content
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """
+        Load a stored document
+
+        Args:
+            digest: Content digest from put()
+
+        Returns:
+            Raw document bytes
+        """
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read()
+
+    def record(self, digest: str, source: str, signals: List[Signal], fetched_at: Optional[datetime] = None,
+               cutoff: Optional[float] = None):
+        """
+        Append an index entry for one fetch
+
+        Args:
+            digest: Content digest
+            source: Source name (feed name or subreddit)
+            signals: Signals produced from the document
+            fetched_at: Fetch time (defaults to now, UTC)
+            cutoff: Recency cutoff applied to the document (None if it was archived already filtered)
+        """
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        entry = {
+            "hash": digest,
+            "source": source,
+            "fetched_at": fetched_at.isoformat(),
+            "signals": summarize_signals(signals),
+        }
+        if cutoff is not None:
+            entry["cutoff"] = cutoff
+        line = json.dumps(entry)
+        path = os.path.join(self.root, "index", f"{fetched_at.strftime('%Y-%m-%d')}.jsonl")
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+    def iter_index(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate index entries in date order
+
+        Args:
+            since: First day to include (YYYY-MM-DD)
+            until: Last day to include (YYYY-MM-DD)
+
+        Yields:
+            Index entry dicts
+        """
+        index_dir = os.path.join(self.root, "index")
+        for filename in sorted(os.listdir(index_dir)):
+            day = filename[:-len(".jsonl")]
+            if (since and day < since) or (until and day > until):
+                continue
+            with open(os.path.join(index_dir, filename)) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
@@ -2,11 +2,16 @@
 Utility functions shared across agents
 """
 
+import atexit
 import json
 import logging
 import os
-from typing import Dict, Any
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Any, Optional
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
 def load_json_config(filepath: str) -> Dict[str, Any]:
@@ -30,10 +35,61 @@ def load_json_config(filepath: str) -> Dict[str, Any]:
         raise
 
 
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "logger": record.name,
+            "severity": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+# One queue listener per configured logger; handlers do their I/O on the listener thread
+_log_listeners: Dict[str, QueueListener] = {}
+_log_lock = threading.Lock()
+
+
+def _cloud_logging_handler(agent_name: str) -> Optional[logging.Handler]:
+    """
+    Build a Cloud Logging handler (batched by its background transport)
+
+    Args:
+        agent_name: Log name in Cloud Logging
+
+    Returns:
+        Handler, or None if the client could not be created
+    """
+    try:
+        from google.cloud import logging as cloud_logging
+        from google.cloud.logging.handlers import CloudLoggingHandler
+
+        client = cloud_logging.Client()
+        return CloudLoggingHandler(client, name=agent_name)
+    except Exception as e:
+        logging.warning(f"Cloud Logging unavailable, continuing with local logs: {e}")
+        return None
+
+
 def setup_logging(agent_name: str, level: str = None) -> logging.Logger:
     """
     Setup logging configuration
 
+    Idempotent: the logger gets a single QueueHandler the first time it is
+    configured, and all file/console/cloud I/O happens on a background
+    listener thread, so log calls never block on disk or network.
+
+    Environment:
+        LOG_LEVEL: Logging level (default INFO)
+        LOG_FORMAT: "text" (default) or "json"
+        LOG_MAX_BYTES / LOG_BACKUP_COUNT: File rotation (default 10 MB x 5)
+        LOG_TO_CLOUD: "true" to also ship to Google Cloud Logging
+
     Args:
         agent_name: Name of the agent (for log file)
         level: Logging level (defaults to LOG_LEVEL env var or INFO)
@@ -44,30 +100,124 @@ def setup_logging(agent_name: str, level: str = None) -> logging.Logger:
     # Get log level from env or parameter
     log_level = level or os.getenv("LOG_LEVEL", "INFO")
 
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
+    logger = logging.getLogger(agent_name)
+    logger.setLevel(getattr(logging, log_level.upper()))
 
-    # Configure logging format
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    date_format = "%Y-%m-%d %H:%M:%S"
+    with _log_lock:
+        if agent_name in _log_listeners:
+            return logger
 
-    # File handler
-    file_handler = logging.FileHandler(f"logs/{agent_name}.log")
-    file_handler.setFormatter(logging.Formatter(log_format, date_format))
+        # Create logs directory if it doesn't exist
+        os.makedirs("logs", exist_ok=True)
 
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(log_format, date_format))
+        # Configure logging format
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            formatter = JsonFormatter()
+        else:
+            log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            date_format = "%Y-%m-%d %H:%M:%S"
+            formatter = logging.Formatter(log_format, date_format)
 
-    # Setup logger
-    logger = logging.getLogger(agent_name)
-    logger.setLevel(getattr(logging, log_level.upper()))
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+        # File handler (size-based rotation)
+        file_handler = RotatingFileHandler(
+            f"logs/{agent_name}.log",
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+        )
+        file_handler.setFormatter(formatter)
+
+        # Console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        handlers = [file_handler, console_handler]
+
+        # Cloud Logging handler (optional)
+        if os.getenv("LOG_TO_CLOUD", "false").lower() == "true":
+            cloud_handler = _cloud_logging_handler(agent_name)
+            if cloud_handler is not None:
+                handlers.append(cloud_handler)
+
+        log_queue: queue.Queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _log_listeners[agent_name] = listener
+
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
 
+def flush_logging(restart: bool = True):
+    """
+    Drain every logging queue and flush its handlers
+
+    Call at shutdown so no queued records are lost.
+
+    Args:
+        restart: Restart the listeners afterwards so logging keeps working
+    """
+    with _log_lock:
+        for listener in _log_listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # Stream already closed (interpreter teardown)
+                    pass
+            if restart:
+                listener.start()
+
+
+atexit.register(flush_logging, False)
+
+
+class LogSampler:
+    """
+    Logs the first few per-item messages and aggregates the rest
+
+    Keeps per-item logging cost constant as volume grows: after `limit`
+    messages, further ones are only counted and reported by summary().
+    """
+
+    def __init__(self, logger: logging.Logger, limit: int = None, level: int = logging.INFO):
+        """
+        Initialize sampler
+
+        Args:
+            logger: Logger to write to
+            limit: Messages logged verbatim (defaults to LOG_SAMPLE_LIMIT or 10)
+            level: Log level for messages and summary
+        """
+        self.logger = logger
+        self.limit = limit if limit is not None else int(os.getenv("LOG_SAMPLE_LIMIT", "10"))
+        self.level = level
+        self.count = 0
+
+    def log(self, message: str):
+        """
+        Log a per-item message, or just count it once the limit is reached
+
+        Args:
+            message: Message text
+        """
+        self.count += 1
+        if self.count <= self.limit:
+            self.logger.log(self.level, message)
+
+    def summary(self, label: str):
+        """
+        Log how many messages were suppressed
+
+        Args:
+            label: Description of the items (e.g. "signals")
+        """
+        suppressed = self.count - self.limit
+        if suppressed > 0:
+            self.logger.log(self.level, f"... and {suppressed} more {label} ({self.count} total)")
+
+
 def sanitize_text(text: str, max_length: int = 500) -> str:
     """
     Sanitize and truncate text
@@ -122,13 +272,79 @@ def is_production() -> bool:
     return os.getenv("ENVIRONMENT", "development").lower() == "production"
 
 
-def send_alert(subject: str, message: str):
+def get_state_dir(*parts: str) -> str:
+    """
+    Get (and create) a directory for on-disk agent state
+
+    Args:
+        *parts: Optional subdirectory components
+
+    Returns:
+        Path under STATE_DIR (defaults to "state")
+    """
+    path = os.path.join(os.getenv("STATE_DIR", "state"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def column_letter(index: int) -> str:
     """
-    Send alert notification (placeholder for future implementation)
+    Convert a 0-based column index to A1 notation
+
+    Args:
+        index: Column index (0 is "A", 25 is "Z", 26 is "AA")
+
+    Returns:
+        Column letters
+    """
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid"}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so the same article gets the same key across sources
+
+    Lowercases scheme and host, drops the fragment, tracking query
+    parameters and any trailing slash, and sorts the remaining parameters.
+
+    Args:
+        url: Source URL
+
+    Returns:
+        Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def send_alert(subject: str, message: str, key: Optional[str] = None):
+    """
+    Send alert notification without blocking
+
+    Queued for the background dispatcher in shared.alerts, which coalesces
+    and rate limits repeats of the same key before delivering via Slack
+    webhook and/or email.
 
     Args:
         subject: Alert subject
         message: Alert message
+        key: Coalescing key, e.g. one per failing feed (defaults to the subject)
     """
-    # TODO: Implement email/Slack alerts
     logging.warning(f"ALERT: {subject} - {message}")
+
+    # Imported here: shared.alerts depends on this module
+    from shared.alerts import get_dispatcher
+    get_dispatcher().send(subject, message, key)
@@ -0,0 +1,386 @@
+"""
+WebSub (PubSubHubbub) push subscriptions for RSS/Atom feeds
+
+Feeds that advertise a hub (<link rel="hub"> in the document or a Link
+header, or "hub" in the feed's config) are subscribed to on the first poll
+that sees it. From then on the hub POSTs new content to our callback and
+the feed is skipped by polling while its lease is active:
+
+- Subscribing POSTs hub.mode=subscribe with the topic, a callback URL that
+  names the subscription (?subscription=<id>), the subscription's secret
+  and the requested lease. The hub then verifies intent with a GET to the
+  callback, which echoes hub.challenge only for topics we asked for.
+- Each verification records the lease the hub granted. Polling runs renew
+  leases that expire within renew_before_seconds and retry subscriptions
+  the hub never verified. A denied subscription is kept as "denied" and
+  retried after a backoff that doubles with each denial; until then, and
+  whenever a lease lapses, the feed is polled.
+- Pushed content is accepted only with a valid X-Hub-Signature (HMAC of the
+  body with the subscription's secret). Invalid pushes are acknowledged but
+  dropped, as the spec requires.
+
+The polling run and the callback usually run in different instances, so
+subscriptions live in a tab of the spreadsheet both already use
+(SheetSubscriptionStore), read through on every lookup. Secrets are not
+stored: each is an HMAC of the topic under WEBSUB_SECRET, which both sides
+share.
+"""
+
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+import feedparser
+import requests
+
+logger = logging.getLogger(__name__)
+
+WEBSUB_SUBSCRIPTIONS = "WebSub Subscriptions"
+DEFAULT_LEASE_SECONDS = 86400
+SIGNATURE_ALGORITHMS = ("sha1", "sha256", "sha384", "sha512")
+
+# Tab columns, in order; the topic is column A
+SUBSCRIPTION_FIELDS = ("topic", "id", "hub", "feed", "url", "state", "requested_at", "lease_expires",
+                       "denials", "retry_at")
+NUMERIC_FIELDS = {"requested_at", "lease_expires", "denials", "retry_at"}
+
+
+def subscription_id(topic: str) -> str:
+    """
+    Get the callback identifier of a topic
+
+    Args:
+        topic: Topic (feed self) URL
+
+    Returns:
+        Short hex id
+    """
+    return hashlib.sha256(topic.encode("utf-8")).hexdigest()[:16]
+
+
+def discover_hub(content: bytes, links: Optional[Mapping] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find a feed's hub and topic URLs
+
+    Args:
+        content: Raw feed document
+        links: Parsed HTTP Link header (requests' Response.links), checked first
+
+    Returns:
+        Tuple of (hub URL, topic URL), each None if not advertised
+    """
+    links = links or {}
+    hub = links.get("hub", {}).get("url")
+    topic = links.get("self", {}).get("url")
+    for link in feedparser.parse(content).feed.get("links", []):
+        if link.get("rel") == "hub" and not hub:
+            hub = link.get("href")
+        elif link.get("rel") == "self" and not topic:
+            topic = link.get("href")
+    return hub, topic
+
+
+class SheetSubscriptionStore:
+    """Subscriptions by topic in a spreadsheet tab, shared by the polling run and the callback"""
+
+    def __init__(self, sheets_client, sheet_name: str = WEBSUB_SUBSCRIPTIONS):
+        """
+        Initialize store
+
+        Args:
+            sheets_client: SheetsClient
+            sheet_name: Tab (header row 1, one subscription per row)
+        """
+        self.sheets_client = sheets_client
+        self.sheet_name = sheet_name
+        self._lock = threading.Lock()
+
+    def _rows(self) -> List[Tuple[int, Dict]]:
+        rows = []
+        for number, cells in enumerate(self.sheets_client.read_sheet(f"{self.sheet_name}!A2:J"), start=2):
+            if not cells or not cells[0]:
+                continue
+            subscription = dict(zip(SUBSCRIPTION_FIELDS, cells))
+            for field in NUMERIC_FIELDS:
+                try:
+                    subscription[field] = float(subscription.get(field) or 0)
+                except ValueError:
+                    subscription[field] = 0.0
+            rows.append((number, subscription))
+        return rows
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Read every subscription
+
+        Returns:
+            Topic -> subscription dict
+        """
+        return {subscription["topic"]: subscription for _, subscription in self._rows()}
+
+    def get(self, topic: str) -> Optional[Dict]:
+        """Get one topic's subscription (None if there is none)"""
+        return self.load().get(topic)
+
+    def update(self, topic: str, fields: Dict):
+        """
+        Create or change one subscription
+
+        Args:
+            topic: Topic URL
+            fields: Fields to set
+        """
+        with self._lock:
+            rows = self._rows()
+            number, subscription = next(((n, s) for n, s in rows if s["topic"] == topic), (None, {}))
+            subscription = dict(subscription, **fields, topic=topic)
+            values = [subscription.get(field, "") for field in SUBSCRIPTION_FIELDS]
+            if number is None:
+                self.sheets_client.append_rows(self.sheet_name, [values])
+            else:
+                self.sheets_client.batch_update([
+                    {"range": f"{self.sheet_name}!A{number}:J{number}", "values": [values]}
+                ])
+
+
+class WebSubSubscriber:
+    """Subscribes feeds to their hubs and handles the hubs' callbacks"""
+
+    def __init__(
+        self,
+        store: SheetSubscriptionStore,
+        callback_url: str,
+        secret_key: str,
+        session: Optional[requests.Session] = None,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        renew_before_seconds: float = 6 * 3600,
+        pending_retry_seconds: float = 3600,
+        denied_backoff_seconds: float = 86400,
+        max_backoff_seconds: float = 30 * 86400,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize subscriber
+
+        Args:
+            store: Subscription store shared with the callback
+            callback_url: Public URL of the callback endpoint
+            secret_key: Key the per-topic secrets are derived from (WEBSUB_SECRET)
+            session: HTTP session for hub requests (defaults to a new one)
+            lease_seconds: Lease to request (the hub may grant a different one)
+            renew_before_seconds: Renew leases expiring within this many seconds
+            pending_retry_seconds: Re-send subscriptions not verified after this many seconds
+            denied_backoff_seconds: Wait before retrying after a first denial (doubles per denial)
+            max_backoff_seconds: Longest wait between retries of a denied subscription
+            timeout: Hub request timeout in seconds
+        """
+        self.store = store
+        self.callback_url = callback_url
+        self.secret_key = secret_key
+        self.session = session or requests.Session()
+        self.lease_seconds = lease_seconds
+        self.renew_before_seconds = renew_before_seconds
+        self.pending_retry_seconds = pending_retry_seconds
+        self.denied_backoff_seconds = denied_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+
+    def callback_for(self, topic: str) -> str:
+        """Get the callback URL registered for a topic"""
+        separator = "&" if "?" in self.callback_url else "?"
+        return f"{self.callback_url}{separator}{urlencode({'subscription': subscription_id(topic)})}"
+
+    def secret_for(self, topic: str) -> str:
+        """Get the hub.secret of a topic (derived, so both sides agree without storing it)"""
+        return hmac.new(self.secret_key.encode("utf-8"), topic.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def subscribe(self, topic: str, hub: str, feed: Dict) -> bool:
+        """
+        Ask a hub to push a topic to the callback
+
+        Args:
+            topic: Topic URL
+            hub: Hub URL
+            feed: Feed config the topic belongs to (name and url)
+
+        Returns:
+            True if the hub accepted the request (verification follows)
+        """
+        current = self.store.get(topic) or {}
+        # Recorded before asking: the hub may verify before it even responds
+        self.store.update(topic, {
+            "id": subscription_id(topic),
+            "hub": hub,
+            "feed": feed["name"],
+            "url": feed["url"],
+            "state": "active" if current.get("state") == "active" else "pending",
+            "requested_at": time.time(),
+        })
+        try:
+            response = self.session.post(hub, data={
+                "hub.mode": "subscribe",
+                "hub.topic": topic,
+                "hub.callback": self.callback_for(topic),
+                "hub.secret": self.secret_for(topic),
+                "hub.lease_seconds": str(self.lease_seconds),
+            }, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"WebSub subscription to {topic} via {hub} failed: {e}")
+            return False
+        logger.info(f"Requested WebSub subscription to {topic} via {hub}")
+        return True
+
+    def ensure(self, feed: Dict, hub: Optional[str], topic: Optional[str]) -> bool:
+        """
+        Subscribe a polled feed if it has a hub and no subscription yet
+
+        Args:
+            feed: Feed config
+            hub: Discovered hub URL (the config's "hub" wins)
+            topic: Discovered topic URL (defaults to the feed URL)
+
+        Returns:
+            True if a subscription was requested
+        """
+        hub = feed.get("hub") or hub
+        topic = feed.get("topic") or topic or feed["url"]
+        if not hub or self.store.get(topic) is not None:
+            return False
+        return self.subscribe(topic, hub, feed)
+
+    def renew(self, now: Optional[float] = None) -> int:
+        """
+        Re-subscribe leases about to expire, unverified subscriptions and denials past their backoff
+
+        Args:
+            now: Current Unix time (defaults to time.time())
+
+        Returns:
+            Number of subscriptions re-sent
+        """
+        now = time.time() if now is None else now
+        renewed = 0
+        for topic, subscription in self.store.load().items():
+            if subscription["state"] == "active":
+                due = subscription["lease_expires"] - self.renew_before_seconds <= now
+            elif subscription["state"] == "denied":
+                due = subscription["retry_at"] <= now
+            else:
+                due = subscription["requested_at"] + self.pending_retry_seconds <= now
+            if due:
+                feed = {"name": subscription["feed"], "url": subscription["url"]}
+                renewed += self.subscribe(topic, subscription["hub"], feed)
+        return renewed
+
+    def pushed_urls(self, now: Optional[float] = None) -> Set[str]:
+        """
+        Get the feeds currently delivered by push
+
+        Args:
+            now: Current Unix time (defaults to time.time())
+
+        Returns:
+            Feed URLs with an active, unexpired lease (polling skips these)
+        """
+        now = time.time() if now is None else now
+        return {
+            subscription["url"] for subscription in self.store.load().values()
+            if subscription["state"] == "active" and subscription["lease_expires"] > now
+        }
+
+    def verify(self, params: Mapping) -> Tuple[int, str]:
+        """
+        Answer a hub's verification of intent (or denial)
+
+        Args:
+            params: Callback query parameters
+
+        Returns:
+            Tuple of (HTTP status, body): the challenge for a topic we subscribed to, else 404
+        """
+        mode = params.get("hub.mode")
+        topic = params.get("hub.topic", "")
+        subscription = self.store.get(topic)
+        if subscription is None or params.get("subscription") != subscription["id"]:
+            return 404, ""
+
+        if mode == "denied":
+            denials = int(subscription["denials"]) + 1
+            backoff = min(self.denied_backoff_seconds * 2 ** (denials - 1), self.max_backoff_seconds)
+            logger.warning(
+                f"Hub denied WebSub subscription to {topic} ({params.get('hub.reason', '')}); "
+                f"polling it, retrying in {backoff / 3600:.0f}h"
+            )
+            self.store.update(topic, {"state": "denied", "denials": denials, "retry_at": time.time() + backoff})
+            return 200, ""
+        if mode != "subscribe" or "hub.challenge" not in params:
+            return 404, ""
+
+        lease = int(params.get("hub.lease_seconds") or self.lease_seconds)
+        self.store.update(topic, {"state": "active", "lease_expires": time.time() + lease, "denials": 0})
+        logger.info(f"WebSub subscription to {topic} verified (lease {lease}s)")
+        return 200, params["hub.challenge"]
+
+    def receive(self, params: Mapping, headers: Mapping, body: bytes) -> Optional[Dict]:
+        """
+        Authenticate pushed content
+
+        Args:
+            params: Callback query parameters
+            headers: Request headers
+            body: Request body
+
+        Returns:
+            The subscription (with its "topic") if the signature is valid, else None
+        """
+        for topic, subscription in self.store.load().items():
+            if subscription["id"] == params.get("subscription"):
+                break
+        else:
+            return None
+
+        method, _, signature = (headers.get("X-Hub-Signature") or "").partition("=")
+        if method not in SIGNATURE_ALGORITHMS:
+            logger.warning(f"Dropping unsigned WebSub push for {topic}")
+            return None
+        expected = hmac.new(self.secret_for(topic).encode("utf-8"), body, method).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            logger.warning(f"Dropping WebSub push for {topic}: signature mismatch")
+            return None
+        return subscription
+
+    def handle(
+        self,
+        method: str,
+        params: Mapping,
+        headers: Mapping,
+        body: bytes,
+        on_content: Callable[[bytes, Dict], object]
+    ) -> Tuple[int, str]:
+        """
+        Handle one callback request
+
+        Args:
+            method: HTTP method
+            params: Query parameters
+            headers: Request headers
+            body: Request body
+            on_content: Called with (body, subscription) for authenticated pushes
+
+        Returns:
+            Tuple of (HTTP status, body)
+        """
+        if method == "GET":
+            return self.verify(params)
+        if method != "POST":
+            return 405, ""
+        subscription = self.receive(params, headers, body)
+        if subscription is not None:
+            on_content(body, subscription)
+        # Always 2xx: a hub must not learn whether a push was accepted
+        return 202, ""
@@ -0,0 +1,72 @@
+"""
+Load-test the agents against local synthetic feed and Reddit servers
+
+Runs the agents end to end (Sheets in testing mode, state in a temporary
+directory) and prints throughput, per-source latency percentiles, peak RSS
+and API call counts.
+
+Usage:
+    python loadtest.py --feeds 500 --items-per-feed 20 --latency-ms 50 --error-rate 0.02
+    python loadtest.py --agent agent_4 --subreddits 500 --posts 20000 --output loadtest.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add agents to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
+
+from shared.loadtest import LoadProfile, LoadTest  # noqa: E402
+from shared.utils import setup_logging  # noqa: E402
+
+logger = setup_logging("loadtest")
+
+
+def main():
+    """Entry point for load testing"""
+    defaults = LoadProfile()
+    parser = argparse.ArgumentParser(description="Run the agents against synthetic local servers")
+    parser.add_argument("--agent", choices=["agent_3", "agent_4", "both"], default="both")
+    parser.add_argument("--feeds", type=int, default=defaults.feeds)
+    parser.add_argument("--items-per-feed", type=int, default=defaults.items_per_feed)
+    parser.add_argument("--item-bytes", type=int, default=defaults.item_bytes)
+    parser.add_argument("--subreddits", type=int, default=defaults.subreddits)
+    parser.add_argument("--posts", type=int, default=defaults.posts)
+    parser.add_argument("--comments-per-post", type=int, default=defaults.comments_per_post)
+    parser.add_argument("--signal-rate", type=float, default=defaults.signal_rate)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma, help="Log-normal sigma")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--config-dir", default="config")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    profile = LoadProfile(
+        feeds=args.feeds,
+        items_per_feed=args.items_per_feed,
+        item_bytes=args.item_bytes,
+        subreddits=args.subreddits,
+        posts=args.posts,
+        comments_per_post=args.comments_per_post,
+        signal_rate=args.signal_rate,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    agents = ["agent_3", "agent_4"] if args.agent == "both" else [args.agent]
+    report = LoadTest(profile, args.config_dir).run(agents)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+
+    print(json.dumps(report["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,48 @@ from flask import jsonify
 # Add agents to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
 
-from agent_3.agent import TechnicalDebtScanner
-from agent_4.agent import RegionalNewsMonitor
+from agent_3.agent import TechnicalDebtScanner  # noqa: E402
+from agent_4.agent import RegionalNewsMonitor  # noqa: E402
+from shared.alerts import flush_alerts  # noqa: E402
+from shared.checkpoint import Deadline  # noqa: E402
+from shared.runner import UnifiedRunner  # noqa: E402
+from shared.sheets_client import SheetsClient  # noqa: E402
+from shared.utils import send_alert  # noqa: E402
+
+# Built on the first WebSub callback and reused for the instance's lifetime
+_websub_scanner = None
+
+
+def _get_websub_scanner() -> TechnicalDebtScanner:
+    """
+    Get this instance's scanner for WebSub callbacks, building it on first use
+
+    Returns:
+        TechnicalDebtScanner
+    """
+    global _websub_scanner
+    if _websub_scanner is None:
+        _websub_scanner = TechnicalDebtScanner()
+    return _websub_scanner
+
+
+def _shard_args(request) -> dict:
+    """
+    Read optional shard assignment from the request query string
+
+    Lets one scheduler job per shard call the same function with
+    ?shard=<index>&shards=<count>; without them, SHARD_INDEX / SHARD_COUNT apply.
+
+    Args:
+        request: Flask request object
+
+    Returns:
+        Keyword arguments for the agent constructor
+    """
+    args = getattr(request, 'args', None) or {}
+    if 'shards' not in args:
+        return {}
+    return {'shard_index': int(args.get('shard', 0)), 'num_shards': int(args['shards'])}
 
 
 @functions_framework.http
@@ -26,8 +66,10 @@ def agent_3_handler(request):
         JSON response with status
     """
     try:
-        scanner = TechnicalDebtScanner()
-        scanner.run()
+        # Started before the agent is built so setup counts against the function timeout
+        deadline = Deadline.from_env()
+        scanner = TechnicalDebtScanner(**_shard_args(request))
+        scanner.run(deadline)
         
         return jsonify({
             'status': 'success',
@@ -36,11 +78,15 @@ def agent_3_handler(request):
         }), 200
         
     except Exception as e:
+        send_alert('Technical Debt Scanner failed', str(e), key='agent_3:handler')
         return jsonify({
             'status': 'error',
             'message': str(e),
             'agent': 'Technical Debt Scanner'
         }), 500
+    finally:
+        # Deliver queued alerts before the instance can be frozen
+        flush_alerts()
 
 
 @functions_framework.http
@@ -55,8 +101,10 @@ def agent_4_handler(request):
         JSON response with status
     """
     try:
-        monitor = RegionalNewsMonitor()
-        monitor.run()
+        # Started before the agent is built so setup counts against the function timeout
+        deadline = Deadline.from_env()
+        monitor = RegionalNewsMonitor(**_shard_args(request))
+        monitor.run(deadline)
         
         return jsonify({
             'status': 'success',
@@ -65,8 +113,89 @@ def agent_4_handler(request):
         }), 200
         
     except Exception as e:
+        send_alert('Regional News Monitor failed', str(e), key='agent_4:handler')
         return jsonify({
             'status': 'error',
             'message': str(e),
             'agent': 'Regional News Monitor'
         }), 500
+    finally:
+        # Deliver queued alerts before the instance can be frozen
+        flush_alerts()
+
+
+@functions_framework.http
+def websub_handler(request):
+    """
+    Cloud Function entry point for WebSub callbacks to Agent 3
+
+    Deploy at WEBSUB_CALLBACK_URL. Hubs verify subscriptions with a GET
+    (answered with hub.challenge) and push new feed content with a signed
+    POST, which is analyzed and written like a polled feed. The scanner
+    (Sheets client, gazetteer, scorers) is built once per instance.
+
+    Args:
+        request: Flask request object
+
+    Returns:
+        Plain-text response for the hub
+    """
+    try:
+        scanner = _get_websub_scanner()
+        status, body = scanner.handle_websub(request.method, request.args, request.headers, request.get_data())
+        return body, status, {'Content-Type': 'text/plain'}
+
+    except Exception as e:
+        send_alert('WebSub ingestion failed', str(e), key='agent_3:websub')
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'agent': 'Technical Debt Scanner'
+        }), 500
+    finally:
+        # Deliver queued alerts before the instance can be frozen
+        flush_alerts()
+
+
+@functions_framework.http
+def combined_handler(request):
+    """
+    Cloud Function entry point running Agents 3 and 4 together
+
+    Both agents collect concurrently with one shared Sheets client, and all
+    new rows are committed in a single batched write.
+
+    Args:
+        request: Flask request object
+
+    Returns:
+        JSON response with per-agent results
+    """
+    try:
+        # Started before the agents are built so setup counts against the function timeout
+        deadline = Deadline.from_env()
+        sheets_client = SheetsClient()
+        shard_args = _shard_args(request)
+        runner = UnifiedRunner(sheets_client, {
+            'agent_3': (TechnicalDebtScanner(sheets_client=sheets_client, **shard_args), 'process_feeds'),
+            'agent_4': (RegionalNewsMonitor(sheets_client=sheets_client, **shard_args), 'process_subreddits'),
+        })
+        summary = runner.run(deadline)
+
+        return jsonify({
+            'status': 'success',
+            'message': 'Agents 3 and 4 executed successfully',
+            'agent': 'Combined Runner',
+            'results': summary
+        }), 200
+
+    except Exception as e:
+        send_alert('Combined Runner failed', str(e), key='combined:handler')
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'agent': 'Combined Runner'
+        }), 500
+    finally:
+        # Deliver queued alerts before the instance can be frozen
+        flush_alerts()
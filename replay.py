@@ -0,0 +1,64 @@
+"""
+Replay archived snapshots through the current keyword configuration
+
+Runs an agent's analysis over the snapshot store (see SNAPSHOTS_ENABLED)
+with no network access and no Sheets writes, and writes a diff report
+against the signals originally produced.
+
+Usage:
+    python replay.py agent_3 --since 2026-09-01 --until 2026-09-30 --output replay_agent_3.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add agents to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
+
+from agent_3.agent import TechnicalDebtScanner  # noqa: E402
+from agent_4.agent import RegionalNewsMonitor  # noqa: E402
+from shared.replay import Replayer  # noqa: E402
+from shared.utils import get_state_dir, setup_logging  # noqa: E402
+
+logger = setup_logging("replay")
+
+AGENTS = {
+    "agent_3": TechnicalDebtScanner,
+    "agent_4": RegionalNewsMonitor,
+}
+
+
+def main():
+    """Entry point for snapshot replay"""
+    parser = argparse.ArgumentParser(description="Replay snapshots through the current keyword config")
+    parser.add_argument("agent", choices=sorted(AGENTS))
+    parser.add_argument("--since", help="First day to replay (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to replay (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--config-dir", default="config")
+    parser.add_argument("--output", help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    replayer = Replayer(
+        AGENTS[args.agent],
+        get_state_dir("snapshots", args.agent),
+        workers=args.workers,
+        config_dir=args.config_dir,
+    )
+    report = replayer.run(args.since, args.until)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+
+    print(json.dumps({
+        key: len(value) if isinstance(value, list) else value
+        for key, value in report.items()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
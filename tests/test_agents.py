@@ -11,6 +11,7 @@ from unittest.mock import Mock, patch, MagicMock
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
 
 from shared.utils import sanitize_text, get_date, get_timestamp
+from shared.records import FeedEntry, RedditPost, Signal  # noqa: E402
 # NOTE: Do NOT import SheetsClient here - it breaks mocking
 
 
@@ -46,6 +47,34 @@ class TestUtils:
         assert timestamp[4] == '-'
         assert timestamp[10] == ' '
 
+    def test_setup_logging_is_idempotent(self):
+        """Test repeated setup attaches a single queue handler"""
+        from shared.utils import setup_logging
+
+        logger = setup_logging("test_idempotent")
+        setup_logging("test_idempotent")
+        assert len(logger.handlers) == 1
+
+    def test_json_formatter_and_sampler(self):
+        """Test structured output and per-item sampling"""
+        import json
+        import logging
+        from shared.utils import JsonFormatter, LogSampler
+
+        record = logging.LogRecord("agent_3", logging.INFO, __file__, 1, "Found %d", (3,), None)
+        payload = json.loads(JsonFormatter().format(record))
+        assert payload["message"] == "Found 3"
+        assert payload["severity"] == "INFO"
+
+        logger = Mock()
+        sampler = LogSampler(logger, limit=2)
+        for i in range(5):
+            sampler.log(f"item {i}")
+        sampler.summary("signals")
+
+        assert logger.log.call_count == 3
+        assert "3 more signals" in logger.log.call_args[0][1]
+
 
 class TestAgent3:
     """Test Agent 3 functionality"""
@@ -90,6 +119,361 @@ class TestAgent3:
         keywords = scanner.check_keywords(text)
         assert len(keywords) == 0
 
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count'})
+    @patch('shared.sheets_client.SheetsClient')
+    @patch('agents.agent_3.agent.load_json_config')
+    def test_batch_analysis_matches_single(self, mock_config, mock_sheets):
+        """Test vectorized batch scoring agrees with per-entry analysis"""
+        from agents.agent_3.agent import TechnicalDebtScanner
+
+        mock_config.side_effect = [
+            {'rss_feeds': []},
+            {
+                'technical_debt_signals': ['legacy system', 'refactor', 'migration'],
+                'pain_point_signals': ['downtime', 'scaling issues'],
+            }
+        ]
+
+        scanner = TechnicalDebtScanner()
+        entries = [
+            FeedEntry(title=t, summary=s, link=f'https://example.com/{i}', source='Test')
+            for i, (t, s) in enumerate([
+                ('Refactor the Legacy System', 'Migration planned at Acme after downtime'),
+                ('Nothing to see', 'unrelated'),
+                ('Scaling issues', 'and more scaling issues, refactor, migration, downtime, legacy system'),
+            ])
+        ]
+
+        expected = [sig for sig in map(scanner.analyze_entry, entries) if sig]
+        assert scanner.analyze_entries(entries) == expected
+        assert [sig.relevance_score for sig in expected] == [8, 10]
+
+    def test_deadline_defers_and_resumes_feeds(self, tmp_path, monkeypatch):
+        """Test a run stopped by its deadline resumes the remaining feeds next time"""
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.checkpoint import Deadline
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        stops = iter([False, False, True] + [False] * 10)
+        monkeypatch.setattr(Deadline, 'should_stop', lambda self, next_cost=0.0: next(stops))
+
+        fetched = []
+
+        def run_once():
+            scanner = TechnicalDebtScanner(sheets_client=SheetsClient(testing=True), deadline_seconds=300)
+            scanner.fetch_feed = lambda feed: fetched.append(feed['name']) or []
+            scanner.run()
+            return scanner
+
+        first = run_once()
+        # High-priority feeds go first; the third start hits the deadline
+        assert fetched == ['TechCrunch', 'Hacker News']
+        assert first.metrics['sources_deferred'] == 3
+
+        second = run_once()
+        assert fetched[2:] == ['The New Stack', 'GitHub Trending', 'Dev.to']
+        assert second.metrics['sources_deferred'] == 0
+        # Cycle complete: the next run starts from the top again
+        assert second.checkpoint.done == set()
+
+    def test_run_state_survives_a_cold_instance(self, tmp_path, monkeypatch):
+        """Test checkpoints and last-seen marks are kept in the shared Run State tab"""
+        import pickle
+        import re
+        from shared.checkpoint import Checkpoint
+        from shared.recency import LastSeen, RecencyWindow
+        from shared.run_state import FileStateStore, SheetStateStore, build_state_store
+        from shared.sheets_client import SheetsClient
+
+        tab = []
+
+        def batch_update(data):
+            for item in data:
+                number = int(re.fullmatch(r'Run State!A(\d+):C\d+', item['range']).group(1))
+                tab[number - 2] = item['values'][0]
+
+        def instance(directory):
+            # A fresh instance: empty local disk, same spreadsheet
+            monkeypatch.setenv('STATE_DIR', str(tmp_path / directory))
+            sheets = SheetsClient(testing=True)
+            sheets.read_sheet = lambda range_name: [list(row) for row in tab]
+            sheets.append_rows = lambda sheet_name, rows: tab.extend(rows)
+            sheets.batch_update = batch_update
+            return SheetStateStore(sheets, 'checkpoints'), SheetStateStore(sheets, 'recency')
+
+        checkpoints, recency = instance('first')
+        checkpoint = Checkpoint(checkpoints, 'agent_3_shard0of1')
+        checkpoint.mark_done('https://example.com/a')
+        checkpoint.save()
+        last_seen = LastSeen(recency, 'agent_3_shard0of1')
+        window = RecencyWindow(24)
+        assert window.accepts(window.cutoff + 60)
+        last_seen.observe('https://example.com/a', window)
+        last_seen.save()
+
+        checkpoints, recency = instance('second')
+        assert Checkpoint(checkpoints, 'agent_3_shard0of1').done == {'https://example.com/a'}
+        assert LastSeen(recency, 'agent_3_shard0of1').marks == {'https://example.com/a': window.newest}
+        Checkpoint(checkpoints, 'agent_3_shard0of1').save(complete=True)
+        assert [row[0] for row in tab] == ['checkpoints/agent_3_shard0of1', 'recency/agent_3_shard0of1']
+        assert Checkpoint(checkpoints, 'agent_3_shard0of1').done == set()
+
+        # Shards hand their stores back to the coordinator process
+        assert pickle.loads(pickle.dumps(recency)).namespace == 'recency'
+        # Testing clients store nothing, so state stays on local disk
+        assert isinstance(build_state_store(SheetsClient(testing=True), 'recency'), FileStateStore)
+
+    def test_recency_window_stops_at_cutoff_and_last_seen(self, tmp_path, monkeypatch):
+        """Test old entries never reach analysis and seen entries are skipped next run"""
+        import time
+        from email.utils import formatdate
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        now = time.time()
+        items = ''.join(
+            f'<item><title>Post {i}</title><link>https://example.com/{i}</link>'
+            f'<pubDate>{formatdate(now - hours * 3600)}</pubDate></item>'
+            for i, hours in enumerate([1, 5, 72, 2])
+        )
+        content = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+        feed = {'name': 'Test', 'url': 'https://example.com/feed', 'max_age_hours': 24}
+
+        def fetch(feed_config):
+            scanner = TechnicalDebtScanner(sheets_client=SheetsClient(testing=True))
+            scanner.http = Mock()
+            scanner.http.get.return_value.content = content
+            entries = scanner.fetch_feed(feed_config)
+            scanner.commit_checkpoint()
+            return [entry.link for entry in entries]
+
+        # Newest first: iteration stops at the first entry older than 24h
+        assert fetch(feed) == ['https://example.com/0', 'https://example.com/1']
+        # Everything up to the newest entry was seen last run
+        assert fetch(feed) == []
+        # Unordered feeds are filtered instead of cut off
+        unordered = dict(feed, url='https://example.com/ranked', time_ordered=False)
+        assert fetch(unordered)[-1] == 'https://example.com/3'
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count'})
+    def test_enrichment_matches_article_text_and_caches(self, tmp_path, monkeypatch):
+        """Test unmatched teasers are matched on article text, fetched once across runs"""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.enrichment import ArticleEnricher, ContentCache
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        filler = 'This paragraph is long enough to count as article text. '
+        pages = {
+            '/a': f'<html><nav><p>{filler} Refactor your menus</p></nav><article><p>{filler}'
+                  f'Our legacy system caused downtime all year.</p></article></html>',
+            '/b': f'<html><body><p>{filler}</p></body></html>',
+            '/long': f'<html><article><p>{filler * 4000}</p></article></html>',
+        }
+        requested = []
+
+        class ArticleHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requested.append(self.path)
+                body = pages[self.path].encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ArticleHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+        entries = [FeedEntry(f'Teaser {p}', f'{base}{p}', 'Read more', '', 'Test') for p in ('/a', '/b')]
+
+        def run_once():
+            scanner = TechnicalDebtScanner(sheets_client=SheetsClient(testing=True))
+            scanner.enricher = ArticleEnricher(ContentCache(str(tmp_path / 'articles')), max_workers=2)
+            return scanner, scanner.enrich_entries(entries, [])
+
+        try:
+            first, signals = run_once()
+            second, cached = run_once()
+            # An article cut short by the byte budget is dropped, not cached as a partial text
+            partial = ArticleEnricher(ContentCache(str(tmp_path / 'articles')), max_bytes=100_000)
+            assert partial.enrich([f'{base}/long']) == {}
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert [s.source_url for s in signals] == [f'{base}/a']
+        # Only <article> text counts: the nav's "refactor" is ignored
+        assert signals[0].signal_description == 'legacy system, downtime'
+        assert sorted(requested) == ['/a', '/b', '/long']
+        assert second.metrics['enrichment_cache_hits'] == 2
+        assert [s.source_url for s in cached] == [f'{base}/a']
+        assert partial.cache.get(f'{base}/long') is None
+        assert partial.metrics['skipped'] == 1
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'OUTPUT_SINKS': 'jsonl'})
+    def test_websub_subscribes_verifies_and_ingests_pushes(self, tmp_path, monkeypatch):
+        """Test hub feeds are subscribed via a local hub, pushed content is written, the rest still polled"""
+        import hashlib
+        import hmac
+        import json
+        import re
+        import threading
+        import time
+        import requests
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qsl, urlsplit
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.sheets_client import SheetsClient
+        from shared.websub import SheetSubscriptionStore, WebSubSubscriber
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        # The poller and the callback are separate instances sharing only the spreadsheet
+        tab = [['Topic']]
+
+        def batch_update(data):
+            for item in data:
+                number = int(re.fullmatch(r'WebSub Subscriptions!A(\d+):J\d+', item['range']).group(1))
+                tab[number - 1] = list(item['values'][0])
+
+        def build():
+            sheets = SheetsClient(testing=True)
+            sheets.read_sheet = lambda range_name: [list(row) for row in tab[1:]]
+            sheets.append_rows = lambda name, rows: tab.extend(rows)
+            sheets.batch_update = batch_update
+            agent = TechnicalDebtScanner(sheets_client=sheets)
+            agent.websub = WebSubSubscriber(
+                SheetSubscriptionStore(sheets), f'{base}/callback', 'shared-key', renew_before_seconds=60
+            )
+            return agent
+
+        hub_requests, challenges, verified = [], [], threading.Event()
+
+        def feed(links='', items=''):
+            return (f'<?xml version="1.0"?><rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">'
+                    f'<channel><title>T</title>{links}{items}</channel></rss>').encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self, status, body=b''):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/callback':
+                    status, body = callback.handle_websub('GET', dict(parse_qsl(url.query)), self.headers, b'')
+                    return self.respond(status, body.encode())
+                hub_links = (f'<atom:link rel="hub" href="{base}/hub"/>'
+                             f'<atom:link rel="self" href="{base}/pushed"/>')
+                self.respond(200, feed(hub_links if url.path == '/pushed' else ''))
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                if url.path == '/callback':
+                    status, text = callback.handle_websub('POST', dict(parse_qsl(url.query)), self.headers, body)
+                    return self.respond(status, text.encode())
+                # Hub stand-in: accept, then verify intent asynchronously
+                form = dict(parse_qsl(body.decode()))
+                hub_requests.append(form)
+                self.respond(202)
+
+                def verify():
+                    challenge = f'challenge-{len(hub_requests)}'
+                    response = requests.get(form['hub.callback'], params={
+                        'hub.mode': form['hub.mode'], 'hub.topic': form['hub.topic'],
+                        'hub.challenge': challenge, 'hub.lease_seconds': '600',
+                    })
+                    challenges.append(response.text == challenge)
+                    verified.set()
+                threading.Thread(target=verify).start()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+        scanner, callback = build(), build()
+        scanner.sources['rss_feeds'] = [
+            {'name': 'Pushed', 'url': f'{base}/pushed'}, {'name': 'Polled', 'url': f'{base}/polled'}
+        ]
+        polled = []
+        fetch = scanner.fetch_feed
+        scanner.fetch_feed = lambda feed_config: polled.append(feed_config['name']) or fetch(feed_config)
+
+        def publish(items, secret=None):
+            body = feed(items=items)
+            secret = secret or scanner.websub.secret_for(f'{base}/pushed')
+            signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            requests.post(hub_requests[0]['hub.callback'], data=body,
+                          headers={'X-Hub-Signature': f'sha256={signature}'}).raise_for_status()
+
+        try:
+            # First poll discovers the hub; the hub verifies and the lease starts
+            scanner.process_feeds()
+            assert verified.wait(5)
+            assert sorted(polled) == ['Polled', 'Pushed']
+            assert hub_requests[0]['hub.topic'] == f'{base}/pushed'
+            assert challenges == [True]
+
+            # Pushed feeds are no longer polled
+            scanner.process_feeds()
+            assert polled[2:] == ['Polled']
+            assert scanner.metrics['sources_pushed'] == 1
+
+            item = ('<item><title>Acme announced a rewrite</title><link>https://example.com/acme</link>'
+                    '<description>Legacy system downtime</description></item>')
+            publish(item.replace('acme<', 'forged<'), secret='wrong')
+            publish(item)
+
+            # Unknown topics are not confirmed
+            response = requests.get(f'{base}/callback', params={
+                'hub.mode': 'subscribe', 'hub.topic': f'{base}/other', 'hub.challenge': 'x'
+            })
+            assert response.status_code == 404
+
+            # Leases close to expiry are renewed on the next poll
+            verified.clear()
+            scanner.websub.store.update(f'{base}/pushed', {'lease_expires': time.time() + 30})
+            scanner.process_feeds()
+            assert verified.wait(5)
+            assert len(hub_requests) == 2 and challenges == [True, True]
+            assert scanner.websub.store.get(f'{base}/pushed')['lease_expires'] > time.time() + 500
+
+            # A denial sends the feed back to polling without re-subscribing until the backoff passes
+            subscription = scanner.websub.store.get(f'{base}/pushed')
+            response = requests.get(f'{base}/callback', params={
+                'subscription': subscription['id'], 'hub.mode': 'denied', 'hub.topic': f'{base}/pushed'
+            })
+            assert response.status_code == 200
+            scanner.process_feeds()
+            assert sorted(polled[-2:]) == ['Polled', 'Pushed'] and len(hub_requests) == 2
+            assert scanner.websub.store.get(f'{base}/pushed')['retry_at'] > time.time() + 3600
+
+            verified.clear()
+            scanner.websub.store.update(f'{base}/pushed', {'retry_at': time.time() - 1})
+            scanner.process_feeds()
+            assert verified.wait(5)
+            assert len(hub_requests) == 3
+            assert scanner.websub.store.get(f'{base}/pushed')['state'] == 'active'
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        with open(tmp_path / 'output' / 'agent_3.jsonl') as f:
+            rows = [json.loads(line) for line in f]
+        assert [row['source_url'] for row in rows] == ['https://example.com/acme']
+        assert rows[0]['signal_description'] == 'legacy system, downtime'
+
 
 class TestAgent4:
     """Test Agent 4 functionality"""
@@ -132,6 +516,1102 @@ class TestAgent4:
         # Hiring signal
         assert monitor.determine_signal_type(['hiring', 'seeking']) == 'Hiring Expansion'
 
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count'})
+    @patch('shared.sheets_client.SheetsClient')
+    @patch('agents.agent_4.agent.load_json_config')
+    @patch('agents.agent_4.agent.praw.Reddit')
+    def test_batch_analysis_matches_single(self, mock_reddit, mock_config, mock_sheets):
+        """Test vectorized batch scoring agrees with per-post analysis"""
+        from agents.agent_4.agent import RegionalNewsMonitor
+
+        mock_config.side_effect = [
+            {'subreddits': [], 'regional_focus': ['des moines', 'iowa']},
+            {'funding_signals': ['series a'], 'hiring_signals': ['hiring', 'cto']}
+        ]
+
+        monitor = RegionalNewsMonitor()
+
+        def post(title, selftext, score, i):
+            return RedditPost(title, selftext, score, f'/r/x/{i}', 0.0, 'desmoines')
+
+        posts = [
+            post('Des Moines startup closes Series A', 'Now hiring', 45, 0),
+            post('Hiring a CTO', 'Remote only', 100, 1),  # No regional keyword
+            post('Iowa company hiring', '', -15, 2),
+        ]
+
+        expected = [sig for sig in map(monitor.analyze_post, posts) if sig]
+        assert monitor.analyze_posts(posts) == expected
+        assert [sig.signal_type for sig in expected] == ['Funding Announcement', 'Hiring Expansion']
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'REDDIT_LISTING': 'multireddit'})
+    def test_multireddit_listing_pages_by_post_count(self):
+        """Test one paginated multireddit listing replaces per-subreddit calls"""
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs, urlsplit
+        from agents.agent_4.agent import RegionalNewsMonitor
+        from shared.reddit_client import RedditListingClient
+        from shared.sheets_client import SheetsClient
+
+        now = time.time()
+        subreddits = ['desmoines', 'Iowa', 'chicago']
+        # 250 posts in the last day (newest first), then older ones
+        posts = [
+            {
+                'title': 'Des Moines startup raised funding' if i == 7 else f'Post {i}',
+                'selftext': '', 'score': 5, 'permalink': f'/r/x/comments/{i}/',
+                'created_utc': now - 60 * (i + 1) - (0 if i < 250 else 86400),
+                'subreddit': subreddits[i % 3],
+            }
+            for i in range(400)
+        ]
+        paths = []
+
+        class ListingHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                paths.append(url.path)
+                start = int(parse_qs(url.query).get('after', ['0'])[0])
+                page = posts[start:start + 100]
+                after = str(start + 100) if start + 100 < len(posts) else None
+                body = json.dumps({'data': {'after': after, 'children': [{'data': p} for p in page]}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ListingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            listing = RedditListingClient(base_url=f'http://127.0.0.1:{server.server_port}')
+            monitor = RegionalNewsMonitor(sheets_client=SheetsClient(testing=True), listing=listing)
+            monitor.sources['subreddits'] = subreddits
+            signals = monitor.process_subreddits()
+            assert not listing.truncated
+            # A page limit reached before the cutoff is flagged, not taken as the whole window
+            assert len(listing.fetch_new(subreddits, now - 86400, max_pages=2)) == 200
+            assert listing.truncated
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert paths[:3] == ['/r/desmoines+Iowa+chicago/new.json'] * 3
+        assert monitor.metrics['api_requests'] == 3
+        assert monitor.metrics['items_analyzed'] == 250
+        assert [s.source_url for s in signals] == ['https://reddit.com/r/x/comments/7/']
+
+    def test_listing_client_refreshes_expired_token(self):
+        """Test the OAuth token is renewed before expiry and once after a 401"""
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from shared.reddit_client import RedditListingClient
+
+        tokens = []
+        valid = set()
+
+        class RedditHandler(BaseHTTPRequestHandler):
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                tokens.append(f'token-{len(tokens)}')
+                valid.add(tokens[-1])
+                self._send(200, {'access_token': tokens[-1], 'expires_in': 3600})
+
+            def do_GET(self):
+                if self.headers.get('Authorization', '').split()[-1] not in valid:
+                    self._send(401, {'error': 401})
+                else:
+                    self._send(200, {'data': {'after': None, 'children': []}})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), RedditHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            listing = RedditListingClient(
+                base_url=base_url, token_url=f'{base_url}/token', client_id='id', client_secret='secret'
+            )
+            listing.fetch_page(['iowa'])
+            assert tokens == ['token-0']
+
+            # Close to expiry: renewed before the request
+            listing.token_refresh_at = time.monotonic() - 1
+            listing.fetch_page(['iowa'])
+            assert tokens == ['token-0', 'token-1']
+
+            # Expired server-side mid-run: the 401 triggers one re-authentication and a retry
+            valid.clear()
+            assert listing.fetch_page(['iowa']) == {'data': {'after': None, 'children': []}}
+            assert tokens == ['token-0', 'token-1', 'token-2']
+            assert listing.requests_made == 4
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'REDDIT_LISTING': 'multireddit'})
+    def test_multireddit_stops_at_deadline_and_resumes(self, tmp_path, monkeypatch):
+        """Test a multireddit listing cut short by the deadline is re-read next run"""
+        import agents.agent_4.agent as agent_4
+        from shared.checkpoint import Deadline
+        from shared.reddit_client import RedditListingClient
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        monkeypatch.setattr(agent_4, 'MAX_SUBREDDITS_PER_MULTI', 1)
+        # Checked before each page: the second listing starts past the budget
+        expiries = iter([False, True])
+        monkeypatch.setattr(Deadline, 'expired', lambda self: next(expiries, False))
+        fetched = []
+
+        def run_once():
+            listing = RedditListingClient(base_url='http://reddit.invalid')
+            listing.fetch_page = lambda chunk, after: fetched.append(chunk) or {'data': {'children': []}}
+            monitor = agent_4.RegionalNewsMonitor(
+                sheets_client=SheetsClient(testing=True), listing=listing, deadline_seconds=300
+            )
+            monitor.sources['subreddits'] = ['desmoines', 'Iowa']
+            deadline = Deadline(300)
+            monitor.run(deadline)
+            assert monitor.deadline is deadline
+            return monitor
+
+        first = run_once()
+        assert fetched == [['desmoines']]
+        assert first.metrics['sources_deferred'] == 1
+
+        second = run_once()
+        assert fetched[1:] == [['Iowa']]
+        assert second.metrics['sources_deferred'] == 0
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count'})
+    def test_comment_scan_respects_budget_and_priority(self):
+        """Test comment threads are scanned busiest-first within the request budget"""
+        import time
+        from agents.agent_4.agent import RegionalNewsMonitor
+        from shared.sheets_client import SheetsClient
+
+        listing = Mock()
+        listing.fetch_comments.side_effect = lambda permalink, limit, timeout=None: [
+            RedditPost('', "We're hiring a CTO in Des Moines", 3, f'{permalink}c1/', time.time(), 'desmoines')
+        ]
+        monitor = RegionalNewsMonitor(sheets_client=SheetsClient(testing=True), listing=listing)
+        monitor.comment_scan = {'enabled': True, 'max_requests': 2, 'max_comments': 100, 'time_limit_seconds': 10}
+
+        now = time.time()
+        posts = [
+            RedditPost('Quiet thread', '', 1, '/r/desmoines/comments/a/', now - 3600, 'desmoines', 2),
+            RedditPost('Busy thread', '', 50, '/r/desmoines/comments/b/', now - 3600, 'desmoines', 80),
+            RedditPost('No comments', '', 90, '/r/desmoines/comments/c/', now - 3600, 'desmoines', 0),
+            RedditPost('Already matched', '', 99, '/r/desmoines/comments/d/', now - 600, 'desmoines', 500),
+            RedditPost('Medium thread', '', 10, '/r/desmoines/comments/e/', now - 3600, 'desmoines', 20),
+        ]
+        signals = monitor.scan_comments(posts, {'https://reddit.com/r/desmoines/comments/d/'})
+
+        fetched = [call.args[0] for call in listing.fetch_comments.call_args_list]
+        assert fetched == ['/r/desmoines/comments/b/', '/r/desmoines/comments/e/']
+        assert monitor.metrics['comment_requests'] == 2
+        assert [s.source_url for s in signals] == [
+            'https://reddit.com/r/desmoines/comments/b/c1/', 'https://reddit.com/r/desmoines/comments/e/c1/'
+        ]
+
+
+class TestRecords:
+    """Test compact record types"""
+
+    def test_signal_rows_and_pickling(self):
+        """Test row layouts, dict conversion and pickling"""
+        import pickle
+
+        signal = Signal("Acme", "Funding Announcement", "series a", "https://reddit.com/r/x/1",
+                        "Reddit r/x", "2026-01-02", 7, "Title", "Summary")
+
+        row_3 = signal.to_agent_3_row()
+        assert len(row_3) == 11
+        assert row_3[1:6] == ["Agent 3", "Acme", "Funding Announcement", "series a", 7]
+        assert row_3[10] == "https://reddit.com/r/x/1"
+
+        row_4 = signal.to_agent_4_row()
+        assert len(row_4) == 10
+        assert row_4[1:8] == ["Acme", "Funding Announcement", "series a", "https://reddit.com/r/x/1",
+                              "2026-01-02", "Agent 4", "Pending Review"]
+        assert row_4[9] == 7
+
+        assert pickle.loads(pickle.dumps(signal)) == signal
+        assert Signal.from_dict(signal.to_dict()) == signal
+        assert not hasattr(signal, "__dict__")
+
+
+class TestScoring:
+    """Test the vectorized batch scorer"""
+
+    def test_weights_from_keyword_config(self):
+        """Test per-keyword and per-category weights scale the score"""
+        from shared.scoring import BatchScorer
+
+        scorer = BatchScorer({
+            'technical_debt_signals': ['refactor', 'legacy'],
+            'solution_seeking': ['looking for cto'],
+            'weights': {
+                'categories': {'solution_seeking': 2.0},
+                'keywords': {'legacy': 0.5},
+            },
+        })
+
+        scores = scorer.score(['Refactor legacy code', 'Looking for CTO', 'nothing', ''])
+
+        assert list(scores.scores) == [3, 4, 0, 0]
+        assert list(scores.keyword_counts()) == [2, 1, 0, 0]
+        assert scores.category_counts.tolist() == [[2, 0], [0, 1], [0, 0], [0, 0]]
+        assert scores.keywords_for(0) == ['refactor', 'legacy']
+
+    def test_token_matcher_stems_and_respects_word_boundaries(self):
+        """Test the inverted index matches inflections and phrases but not substrings"""
+        from shared.scoring import BatchScorer
+
+        config = {'hiring_signals': ['hiring', 'cto', 'series a'], 'tech': ['refactor', 'migration']}
+        texts = [
+            'Acme hires a CTO after Series A; refactoring migrations underway',
+            'Our director is seeking a new series of talks',
+        ]
+        token = BatchScorer(config, regional_keywords=['des moines'], matcher='token').score(texts)
+        substring = BatchScorer(config, regional_keywords=['des moines'], matcher='substring').score(texts)
+
+        assert token.keywords_for(0) == ['hiring', 'cto', 'series a', 'refactor', 'migration']
+        assert token.keywords_for(1) == []
+        assert substring.keywords_for(1) == ['cto']  # "cto" inside "director"
+        assert not token.has_regional.any()
+
+    def test_bm25_saturates_and_persists(self, tmp_path):
+        """Test repeated mentions saturate and corpus statistics round-trip"""
+        from shared.relevance import RelevanceEngine
+
+        path = str(tmp_path / 'stats.npz')
+        engine = RelevanceEngine(['migration', 'modernization project', 'legacy system'], path=path)
+        for i in range(20):
+            engine.score('weekly newsletter about cooking', [], f'https://example.com/other/{i}')
+
+        boilerplate = engine.score('migration ' * 5 + 'guide', ['migration'], 'https://example.com/a')
+        focused = engine.score(
+            'Our modernization project replaces the legacy system', ['modernization project', 'legacy system'],
+            'https://example.com/b'
+        )
+        assert 0 < boilerplate < focused <= 10
+
+        # Re-observing a known document leaves statistics unchanged
+        assert not engine.observe('https://example.com/a', {0: 1}, 3)
+
+        engine.save()
+        reloaded = RelevanceEngine(['legacy system', 'migration', 'new keyword'], path=path)
+        assert reloaded.doc_count == 22
+        assert reloaded.df.tolist() == [1, 1, 0]
+
+        # Shards loaded from the same file merge their new documents on save (shared ones once)
+        shards = [RelevanceEngine(['migration', 'legacy system'], path=path) for _ in range(2)]
+        for i, shard in enumerate(shards):
+            shard.score('legacy system migration', ['legacy system', 'migration'], f'https://example.com/shard{i}')
+            shard.score('legacy system', ['legacy system'], 'https://example.com/shared')
+        for shard in shards:
+            shard.save()
+        merged = RelevanceEngine(['migration', 'legacy system'], path=path)
+        assert merged.doc_count == 25
+        assert merged.df.tolist() == [3, 4]
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_bm25_counts_like_the_matcher_and_saves_over_an_unreadable_file(self, tmp_path):
+        """Test term frequencies follow the keyword matcher and a failed merge counts documents once"""
+        from shared.relevance import RelevanceEngine
+
+        text = 'the cto asked our director about refactoring the refactored code'
+        assert RelevanceEngine(['cto', 'refactor'], matcher='substring').vector(text, ['cto', 'refactor']) == {
+            0: 4, 1: 2,
+        }
+        assert RelevanceEngine(['cto', 'refactor'], matcher='token').vector(text, ['cto', 'refactor']) == {
+            0: 1, 1: 2,
+        }
+
+        path = tmp_path / 'stats.npz'
+        engine = RelevanceEngine(['migration'], path=str(path))
+        engine.score('migration plan', ['migration'], 'https://example.com/a')
+        engine.score('migration notes', ['migration'])
+        engine.save()
+        path.write_bytes(b'not an npz file')
+
+        # The unreadable file is replaced by the in-memory statistics, without replaying hash-less documents
+        engine.score('migration again', ['migration'])
+        engine.save()
+        reloaded = RelevanceEngine(['migration'], path=str(path))
+        assert reloaded.doc_count == 3
+        assert reloaded.df.tolist() == [3]
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'OUTPUT_SINKS': 'sheets'})
+    def test_profiles_match_in_one_pass_and_route_to_their_tabs(self, tmp_path, monkeypatch):
+        """Test keyword profiles share one match pass and write to their own tabs"""
+        import json
+        import shutil
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.scoring import BatchScorer
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+        config_dir = tmp_path / 'config'
+        shutil.copytree('config', config_dir)
+        (config_dir / 'profiles.json').write_text(json.dumps({'profiles': [
+            {'name': 'fintech', 'keywords': {'fintech': ['payments', 'legacy system']}, 'sheet': 'Fintech Queue'},
+            {'name': 'health', 'keywords': {'health': ['ehr', 'hipaa']}, 'min_score': 4},
+            {'name': 'reddit_only', 'agents': ['agent_4'], 'keywords': {'x': ['payments']}},
+        ]}))
+
+        sheets = SheetsClient(testing=True)
+        sheets.check_duplicate = Mock(return_value=False)
+        sheets.append_rows = Mock()
+        scanner = TechnicalDebtScanner(config_dir=str(config_dir), sheets_client=sheets)
+        assert [p.name for p in scanner.profiles.profiles] == ['fintech', 'health']
+
+        entries = [
+            FeedEntry('Payments startup replaces legacy system', 'https://example.com/1', '', '', 'Test'),
+            FeedEntry('Clinic moves EHR off a monolith', 'https://example.com/2', 'HIPAA audit', '', 'Test'),
+            FeedEntry('Unrelated', 'https://example.com/3', '', '', 'Test'),
+        ]
+        match = Mock(wraps=scanner.profiles.union.match)
+        scanner.profiles.union.match = match
+        with patch.object(BatchScorer, 'match') as per_scorer_match:
+            signals = scanner.analyze_entries(entries)
+        match.assert_called_once()
+        per_scorer_match.assert_not_called()
+
+        assert [(s.profile, s.source_url) for s in signals] == [
+            ('', 'https://example.com/1'), ('fintech', 'https://example.com/1'), ('health', 'https://example.com/2'),
+        ]
+        assert signals[1].signal_description == 'payments, legacy system'
+
+        assert scanner.write_signals(signals) == 1
+        tabs = sorted(call.args[0] for call in sheets.append_rows.call_args_list)
+        assert tabs == ['Automation Queue', 'Fintech Queue', 'health']
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'ANALYSIS_MEMO_ENABLED': 'true'})
+    def test_analysis_memo_skips_unchanged_entries_and_invalidates_by_keyword(self, tmp_path, monkeypatch):
+        """Test memoized analysis is reused and only keyword-affected entries are analyzed again"""
+        import json
+        import shutil
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.scoring import BatchScorer
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+        config_dir = tmp_path / 'config'
+        shutil.copytree('config', config_dir)
+        keywords_path = config_dir / 'agent_3_keywords.json'
+        keywords = json.loads(keywords_path.read_text())
+
+        entries = [
+            FeedEntry('Acme replaces its legacy system', 'https://example.com/1', '', '', 'Test'),
+            FeedEntry('Weekly cooking newsletter', 'https://example.com/2', '', '', 'Test'),
+            FeedEntry('Notes on quantum flux', 'https://example.com/3', '', '', 'Test'),
+        ]
+
+        def run():
+            scanner = TechnicalDebtScanner(config_dir=str(config_dir), sheets_client=Mock())
+            match = Mock(wraps=scanner.scorer.match)
+            with patch.object(BatchScorer, 'match', side_effect=lambda texts: match(texts)):
+                signals = scanner.analyze_entries(entries)
+            scanner.flush()
+            analyzed = [text for call in match.call_args_list for text in call.args[0]]
+            return [(s.source_url, s.relevance_score) for s in signals], analyzed
+
+        first, analyzed = run()
+        assert first == [('https://example.com/1', 2)]
+        assert len(analyzed) == 3
+
+        # Unchanged configuration: nothing is analyzed again
+        assert run() == (first, [])
+
+        # An added keyword re-analyzes only the entries containing it
+        keywords['technical_debt_signals'].append('quantum flux')
+        keywords_path.write_text(json.dumps(keywords))
+        signals, analyzed = run()
+        assert signals == [('https://example.com/1', 2), ('https://example.com/3', 2)]
+        assert analyzed == ['Notes on quantum flux ']
+
+        # A reweighted keyword re-analyzes only the entries that matched it
+        keywords['weights']['keywords'] = {'legacy system': 2.0}
+        keywords_path.write_text(json.dumps(keywords))
+        signals, analyzed = run()
+        assert signals == [('https://example.com/1', 4), ('https://example.com/3', 2)]
+        assert analyzed == ['Acme replaces its legacy system ']
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'ANALYSIS_WORKERS': '2', 'ANALYSIS_MIN_BATCH': '20'})
+    def test_analysis_pool_splits_large_batches_across_workers(self, tmp_path, monkeypatch):
+        """Test large batches are analyzed in worker processes with the same, ordered results"""
+        from agents.agent_3.agent import TechnicalDebtScanner
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+        scanner = TechnicalDebtScanner(sheets_client=Mock())
+        scanner.gazetteer.add_many(['Acme Robotics'])
+        entries = [
+            FeedEntry(
+                f'Acme Robotics post {i} on its legacy system' if i % 3 == 0 else f'Post {i} about cooking',
+                f'https://example.com/{i}', 'Plans a modernization' if i % 5 == 0 else '', '', 'Test'
+            )
+            for i in range(60)
+        ]
+
+        signals = scanner.analyze_entries(entries)
+        assert scanner.analysis._executor is not None
+        scanner.flush()
+        assert scanner.analysis._executor is None
+
+        expected = [signal for signal in map(scanner.analyze_entry, entries) if signal]
+        assert signals == expected
+        assert [s.company_name for s in signals[:2]] == ['Acme Robotics', 'Acme Robotics']
+
+        # Small batches stay in-process
+        assert scanner.analyze_entries(entries[:5]) == expected[:2]
+        assert scanner.analysis._executor is None
+
+
+RSS_TEMPLATE = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test</title>
+{items}
+</channel></rss>"""
+
+
+class TestGazetteer:
+    """Test the company gazetteer"""
+
+    def test_syncs_incrementally_and_finds_longest_names(self, tmp_path):
+        """Test names come from confirmed sheet rows only and match in one pass"""
+        from shared.gazetteer import Gazetteer
+
+        def agent_3(queue_id, company, status):
+            return [queue_id, 'Agent 3', company, '', '', '', status]
+
+        sheets = Mock()
+        sheets.read_sheet.side_effect = [
+            [['Queue ID', 'Agent Source', 'Company Name', 'Signal Type']],
+            [
+                agent_3('Q1', 'Acme', 'Approved'), agent_3('Q2', 'Acme Robotics', 'Contacted'),
+                agent_3('Q3', 'Unknown', 'Approved'), [],
+                # Agent 4 rows hold the company in column B and the signal type under "Company Name"
+                ['2026-01-01', 'Globex', 'Growth Signal', '', '', '', 'Agent 4', 'Approved'],
+                # An extractor's guess awaiting review is not learned yet
+                agent_3('Q7', 'The', 'Pending Review'),
+            ],
+            [agent_3('Q7', 'The', 'Rejected'), agent_3('Q8', 'Square', 'Approved')],
+        ]
+        path = str(tmp_path / 'gazetteer.json')
+        gazetteer = Gazetteer.load(path)
+        gazetteer.add_many(['Principal Financial Group'])
+
+        assert gazetteer.sync(sheets) == 3
+        gazetteer.save()
+
+        reloaded = Gazetteer.load(path)
+        assert reloaded.sync(sheets) == 1
+        assert sheets.read_sheet.call_args_list[1][0][0] == 'Automation Queue!A2:H'
+        # Resumed at the row that was still pending review
+        assert sheets.read_sheet.call_args_list[2][0][0] == 'Automation Queue!A7:H'
+        assert reloaded.find_all('Growth Signal at Globex') == ['Globex']
+        assert not reloaded.add('The') and reloaded.find_all('The new startup') == []
+
+        from shared.utils import column_letter
+        assert [column_letter(i) for i in (0, 25, 26, 51, 702)] == ['A', 'Z', 'AA', 'AZ', 'AAA']
+
+        text = 'Acme Robotics and principal financial group hiring; a square table; Square raised funding'
+        assert reloaded.find_all(text) == ['Acme Robotics', 'Principal Financial Group', 'Square']
+
+
+def make_rss(items):
+    """Build an RSS document from (title, link, description[, pubDate]) tuples"""
+    return RSS_TEMPLATE.format(items="".join(
+        f"<item><title>{t}</title><link>{u}</link><description>{d}</description>"
+        f"{''.join(f'<pubDate>{p}</pubDate>' for p in rest)}</item>"
+        for t, u, d, *rest in items
+    )).encode("utf-8")
+
+
+class TestSnapshots:
+    """Test the snapshot store and offline replay"""
+
+    def test_replay_diffs_keyword_changes(self, tmp_path, monkeypatch):
+        """Test archived feeds replay against an edited keyword file"""
+        import json
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.replay import Replayer
+        from shared.sheets_client import SheetsClient
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+        monkeypatch.setenv('SNAPSHOTS_ENABLED', 'true')
+        monkeypatch.setenv('RELEVANCE_MODEL', 'count')
+
+        config_dir = tmp_path / 'config'
+        config_dir.mkdir()
+        (config_dir / 'agent_3_sources.json').write_text(json.dumps({'rss_feeds': [
+            {'name': 'Feed A', 'url': 'https://a.example.com/rss'},
+            {'name': 'Feed B', 'url': 'https://b.example.com/rss'},
+        ]}))
+        keywords_path = config_dir / 'agent_3_keywords.json'
+        keywords_path.write_text(json.dumps({'technical_debt_signals': ['legacy system']}))
+
+        documents = {
+            'https://a.example.com/rss': make_rss([
+                ('Replacing a legacy system', 'https://a.example.com/1', 'at Acme'),
+                ('Kubernetes migration', 'https://a.example.com/2', 'details'),
+                # Outside the recency window: dropped live, so replay must drop it too
+                ('Old migration notes', 'https://a.example.com/3', 'details', 'Mon, 06 Jan 2020 10:00:00 GMT'),
+            ]),
+            'https://b.example.com/rss': make_rss([('Cooking', 'https://b.example.com/1', 'recipes')]),
+        }
+
+        scanner = TechnicalDebtScanner(str(config_dir), sheets_client=SheetsClient(testing=True))
+        scanner.http.get = lambda url, timeout: Mock(content=documents[url], raise_for_status=Mock())
+        assert len(scanner.process_feeds()) == 1
+
+        # Poll again with unchanged content: one more index line, no new object
+        scanner.process_feeds()
+        store_root = str(tmp_path / 'state' / 'snapshots' / 'agent_3')
+        objects = [f for _, _, files in os.walk(os.path.join(store_root, 'objects')) for f in files]
+        assert len(objects) == 2
+
+        keywords_path.write_text(json.dumps({'technical_debt_signals': ['migration']}))
+        report = Replayer(TechnicalDebtScanner, store_root, workers=2, config_dir=str(config_dir)).run()
+
+        assert report['snapshots'] == 4
+        assert report['documents'] == 2
+        assert [s['source_url'] for s in report['added']] == ['https://a.example.com/2']
+        assert [s['source_url'] for s in report['removed']] == ['https://a.example.com/1']
+
+
+class TestSinks:
+    """Test pluggable output sinks"""
+
+    def test_routes_by_score_across_sinks(self, tmp_path, monkeypatch):
+        """Test local sinks get full volume while Sheets only gets high scores"""
+        import json
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import build_sinks, read_columnar
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        monkeypatch.setenv('SHEETS_MIN_SCORE', '6')
+        sheets = SheetsClient(testing=True)
+        sheets.append_rows = Mock()
+        sink = build_sinks('agent_3', sheets, Signal.to_agent_3_row, 'K', names='sheets,jsonl,columnar')
+
+        signals = [
+            Signal('Acme', 'Technical Debt', '', f'https://example.com/{score}', 'Feed', '2026-01-01', score)
+            for score in (2, 6, 10)
+        ]
+        written = sink.write(signals)
+        sink.flush()
+
+        assert written == {'sheets': 2, 'jsonl': 3, 'columnar': 3}
+        rows = sheets.append_rows.call_args[0][1]
+        assert [row[10] for row in rows] == ['https://example.com/6', 'https://example.com/10']
+
+        with open(tmp_path / 'output' / 'agent_3.jsonl') as f:
+            lines = [json.loads(line) for line in f]
+        assert [line['relevance_score'] for line in lines] == [2, 6, 10]
+
+        columns = read_columnar(str(tmp_path / 'output' / 'columnar'), ['source_url', 'relevance_score'])
+        assert columns['relevance_score'].tolist() == [2, 6, 10]
+
+    def test_unified_runner_writes_one_batch(self, tmp_path, monkeypatch):
+        """Test both agents share one dedup read and one append"""
+        from shared.runner import UnifiedRunner
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import build_sinks
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        sheets = SheetsClient(testing=True)
+        sheets.read_sheet = Mock(return_value=[['https://example.com/old']])
+        sheets.append_rows = Mock()
+
+        def fake_agent(layout, column, urls):
+            agent = Mock()
+            agent.sink = build_sinks('fake', sheets, layout, column, names='sheets')
+            agent.profiles = None
+            agent.collect.return_value = [
+                Signal('Acme', 'Expansion', '', url, 'Feed', '2026-01-01', 5) for url in urls
+            ]
+            return agent
+
+        agent_3 = fake_agent(Signal.to_agent_3_row, 'K', ['https://example.com/1', 'https://example.com/old'])
+        agent_4 = fake_agent(Signal.to_agent_4_row, 'E', ['https://example.com/1', 'https://example.com/2'])
+        runner = UnifiedRunner(sheets, {'agent_3': (agent_3, 'collect'), 'agent_4': (agent_4, 'collect')})
+        result = runner.run()
+
+        assert result['agent_3'] == {'signals_found': 2, 'rows_written': 1}
+        assert result['agent_4'] == {'signals_found': 2, 'rows_written': 1}
+        assert result['rows_written'] == 2
+        assert sheets.read_sheet.call_count == 2  # columns E and K, once each
+        sheets.append_rows.assert_called_once()
+
+    @patch.dict(os.environ, {'WRITE_JOURNAL_ENABLED': 'true'})
+    def test_unified_runner_recovers_syncs_and_flushes_like_a_single_agent(self, tmp_path, monkeypatch):
+        """Test the combined path replays every journal and runs the agents' full sequence"""
+        from shared.checkpoint import Deadline
+        from shared.journal import WriteJournal
+        from shared.runner import UnifiedRunner
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import build_sinks
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path))
+        sheets = SheetsClient(testing=True)
+        sheets.check_duplicate = Mock(return_value=False)
+        sheets.read_sheet = Mock(return_value=[])
+        sheets.append_rows = Mock()
+
+        # Batches a crashed run journaled but never acknowledged: one per tab
+        for tab in ['Automation Queue', 'Fintech Queue']:
+            sink = build_sinks('crashed', sheets, Signal.to_agent_3_row, 'K', names='sheets', sheet_name=tab)
+            with WriteJournal(sink.sinks[0].journal.root).lock() as journal:
+                journal.begin(tab, ['lost'], [[f'{tab} row']])
+
+        calls = []
+
+        def fake_agent(name, layout, column, url):
+            agent = Mock()
+            agent.sink = build_sinks(name, sheets, layout, column, names='sheets')
+            profile_sink = build_sinks(f'{name}_fintech', sheets, layout, column, sheet_name='Fintech Queue')
+            agent.profiles.recover.side_effect = profile_sink.recover
+            agent.profiles.write.side_effect = lambda signals, metrics: signals
+            agent.gazetteer.sync.side_effect = lambda client: calls.append((name, 'sync'))
+            agent.profiles.flush.side_effect = lambda: calls.append((name, 'flush'))
+            agent.commit_checkpoint.side_effect = lambda: calls.append((name, 'checkpoint'))
+
+            def collect(deadline):
+                calls.append((name, 'collect', deadline))
+                return [Signal('Acme', 'Expansion', '', url, 'Feed', '2026-01-01', 5)]
+            agent.collect.side_effect = collect
+            return agent
+
+        agents = {
+            'agent_3': (fake_agent('agent_3', Signal.to_agent_3_row, 'K', 'https://example.com/1'), 'collect'),
+            'agent_4': (fake_agent('agent_4', Signal.to_agent_4_row, 'E', 'https://example.com/2'), 'collect'),
+        }
+        deadline = Deadline(None)
+        result = UnifiedRunner(sheets, agents).run(deadline)
+
+        appended = [call.args for call in sheets.append_rows.call_args_list]
+        assert appended[:2] == [
+            ('Automation Queue', [['Automation Queue row']]), ('Fintech Queue', [['Fintech Queue row']]),
+        ]
+        assert appended[2][0] == 'Automation Queue' and len(appended[2][1]) == 2
+        assert result['rows_written'] == 2
+        assert [call[:2] for call in calls[:2]] == [('agent_3', 'sync'), ('agent_4', 'sync')]
+        assert {call[2] for call in calls if call[1] == 'collect'} == {deadline}
+        assert calls[-4:] == [
+            ('agent_3', 'flush'), ('agent_3', 'checkpoint'), ('agent_4', 'flush'), ('agent_4', 'checkpoint'),
+        ]
+
+    def test_queue_mirror_syncs_incrementally_and_answers_lookups(self, tmp_path):
+        """Test the Automation Queue mirror reads only new rows and dedups locally"""
+        import re
+        from shared.queue_mirror import QueueMirror
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import SheetsSink
+
+        def signal(company, url):
+            return Signal(company, 'Technical Debt', '', url, 'Feed', '2026-01-01', 5)
+
+        sheet = [
+            ['Timestamp', 'Company Name', 'Signal Type', 'Signal Details', 'Source URL', 'Detected Date',
+             'Agent Source', 'Status'],
+            signal('Acme', 'https://example.com/a').to_agent_4_row(),
+            signal('Globex', 'https://example.com/b').to_agent_3_row(),
+        ]
+        reads = []
+
+        def read_sheet(range_name):
+            start = int(re.fullmatch(r'Automation Queue!A(\d+):Z', range_name).group(1))
+            reads.append(len(sheet[start - 1:]))
+            return [list(row) for row in sheet[start - 1:]]
+
+        sheets = SheetsClient(testing=True)
+        sheets.read_sheet = read_sheet
+        sheets.append_rows = Mock(side_effect=lambda tab, rows: sheet.extend(rows))
+        sheets.check_duplicate = Mock()
+        path = str(tmp_path / 'queue.sqlite')
+        mirror = QueueMirror(path)
+        sink = SheetsSink(sheets, Signal.to_agent_3_row, 'K', mirror=mirror)
+
+        assert sink.write([signal('Globex', 'https://example.com/b'), signal('Initech', 'https://example.com/c')]) == 1
+        assert reads == [3]  # First sync reads the whole tab
+        # Only column K counts for Agent 3's sink, as with a column read
+        assert sink.write([signal('Acme', 'https://example.com/a')]) == 1
+        assert reads == [3, 1]  # Then only rows past the last sync
+        sheets.check_duplicate.assert_not_called()
+
+        # A manual edit is picked up by the next full reconcile
+        sheet[2][6] = 'Contacted'
+        reloaded = QueueMirror(path)
+        assert reloaded.sync(sheets) == 1 and reloaded.rows_synced == 5
+        assert reloaded.rows_by_company('GLOBEX')[0]['status'] == 'Pending Review'
+        assert reloaded.sync(sheets, full=True) == 5
+        assert reloaded.rows_by_company('globex')[0]['status'] == 'Contacted'
+        assert [(r['row'], r['agent']) for r in reloaded.rows_by_url('https://example.com/a')] == [
+            (2, 'Agent 4'), (5, 'Agent 3')
+        ]
+        assert [r['company'] for r in reloaded.rows_by_status('Pending Review')] == ['Acme', 'Initech', 'Acme']
+
+    @patch.dict(os.environ, {'OUTPUT_SINKS': 'sheets', 'AGGREGATE_BY_COMPANY': 'true'})
+    def test_aggregation_updates_company_rows_and_appends_new_companies(self, tmp_path, monkeypatch):
+        """Test signals are grouped per company and folded into existing rows with one batchUpdate"""
+        import re
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import build_sinks
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+
+        def signal(company, details, url, score, date='2099-01-05'):
+            return Signal(company, 'Technical Debt', details, url, 'Feed', date, score)
+
+        sheet = [
+            ['Queue ID', 'Agent Source', 'Company Name', 'Signal Type', 'Signal Details', 'Priority Score', 'Status'],
+            signal('Acme, Inc.', 'legacy system', 'https://example.com/a', 4).to_agent_3_row(),
+        ]
+
+        def read_sheet(range_name):
+            start = int(re.fullmatch(r'Automation Queue!A(\d+):Z', range_name).group(1))
+            return [list(row) for row in sheet[start - 1:]]
+
+        def batch_update(data):
+            for item in data:
+                letter, number = re.fullmatch(r'Automation Queue!([A-Z])(\d+)', item['range']).groups()
+                row = sheet[int(number) - 1]
+                row.extend([''] * (ord(letter) - ord('A') + 1 - len(row)))
+                row[ord(letter) - ord('A')] = item['values'][0][0]
+
+        sheets = SheetsClient(testing=True)
+        sheets.read_sheet = read_sheet
+        sheets.batch_update = Mock(side_effect=batch_update)
+        sheets.append_rows = Mock(side_effect=lambda tab, rows: sheet.extend(rows))
+        sink = build_sinks('agent_3', sheets, Signal.to_agent_3_row, 'K').sinks[0]
+
+        assert sink.write([
+            signal('ACME', 'migration, legacy system', 'https://example.com/b', 7),
+            signal('Globex', 'refactor', 'https://example.com/c', 3),
+            signal('Globex Corp', 'downtime', 'https://example.com/d', 6),
+            signal('Unknown', 'refactor', 'https://example.com/e', 5),
+            signal('Acme', 'legacy system', 'https://example.com/a', 9),  # Already in the sheet
+        ]) == 2
+        sheets.batch_update.assert_called_once()
+        acme = sheet[1]
+        # Date Added (H) keeps the first-queued date; Last Seen (L) moves forward
+        assert acme[7] != '2099-01-05'
+        assert (acme[4], acme[5], acme[10], acme[11]) == (
+            'legacy system, migration, also https://example.com/b', 7, 'https://example.com/a', '2099-01-05'
+        )
+        assert [(row[2], row[4], row[5], row[10]) for row in sheet[2:]] == [
+            ('Globex Corp', 'refactor, downtime, also https://example.com/c', 6, 'https://example.com/d'),
+            ('Unknown', 'refactor', 5, 'https://example.com/e'),
+        ]
+
+        # The next run finds the new company row through the mirror's company index
+        assert sink.write([signal('globex', 'scaling issues', 'https://example.com/f', 8)]) == 0
+        assert len(sheet) == 4
+        assert (sheet[2][4], sheet[2][5], sheet[2][10]) == (
+            'refactor, downtime, also https://example.com/c, scaling issues, also https://example.com/f', 8,
+            'https://example.com/d',
+        )
+        assert [sink.mirror.contains_url(f'https://example.com/{page}') for page in 'cdf'] == [True] * 3
+
+    def test_journal_replays_unacknowledged_batch(self, tmp_path):
+        """Test a batch lost mid-append is re-sent once and never re-written"""
+        from shared.journal import WriteJournal
+        from shared.sheets_client import SheetsClient
+        from shared.sinks import SheetsSink
+        from shared.utils import canonical_url
+
+        assert canonical_url('HTTPS://Example.com/a/?utm_source=x&b=2#top') == 'https://example.com/a?b=2'
+
+        sheets = SheetsClient(testing=True)
+        sheets.append_rows = Mock(side_effect=[RuntimeError('killed'), None, None])
+        sheets.check_duplicate = Mock(return_value=False)
+        sink = SheetsSink(sheets, Signal.to_agent_3_row, 'K', journal=WriteJournal(str(tmp_path)))
+        signals = [Signal('Acme', 'Expansion', '', 'https://example.com/1', 'Feed', '2026-01-01', 5)]
+
+        with pytest.raises(RuntimeError):
+            sink.write(signals)
+
+        # Next start: the journaled batch is re-sent without reading the sheet
+        restarted = SheetsSink(sheets, Signal.to_agent_3_row, 'K', journal=WriteJournal(str(tmp_path)))
+        restarted.recover()
+        assert sheets.append_rows.call_count == 2
+
+        # Same article (tracking params differ) is skipped by idempotency key
+        again = [Signal('Acme', 'Expansion', '', 'https://example.com/1?utm_medium=rss', 'Feed', '2026-01-01', 5)]
+        assert restarted.write(again) == 0
+        assert sheets.append_rows.call_count == 2
+        assert sheets.check_duplicate.call_count == 1
+
+
+class TestAlerts:
+    """Test the asynchronous alert dispatcher"""
+
+    def test_coalesces_rate_limits_and_retries_against_local_backends(self, tmp_path):
+        """Test a burst for one key becomes one message per backend, delivered off-thread"""
+        import json
+        import socketserver
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from shared.alerts import AlertDispatcher, AlertState, SmtpBackend, WebhookBackend
+
+        posts, emails = [], []
+
+        class WebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                posts.append(body['text'])
+                # The first delivery attempt fails and must be retried
+                self.send_response(500 if len(posts) == 1 else 200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        class SmtpHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b'220 localhost\r\n')
+                while True:
+                    line = self.rfile.readline().decode().strip()
+                    command = line.split(' ')[0].upper()
+                    if command == 'DATA':
+                        self.wfile.write(b'354 go ahead\r\n')
+                        lines = []
+                        while (data := self.rfile.readline()) not in (b'.\r\n', b''):
+                            lines.append(data.decode())
+                        emails.append(''.join(lines))
+                        self.wfile.write(b'250 queued\r\n')
+                    elif command == 'QUIT' or not line:
+                        self.wfile.write(b'221 bye\r\n')
+                        return
+                    else:
+                        self.wfile.write(b'250 ok\r\n')
+
+        webhook = ThreadingHTTPServer(('127.0.0.1', 0), WebhookHandler)
+        smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SmtpHandler)
+        for server in (webhook, smtp):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        state_path = str(tmp_path / 'alerts.json')
+        backends = [
+            WebhookBackend(f'http://127.0.0.1:{webhook.server_port}/hook'),
+            SmtpBackend('agent@example.com', ['ops@example.com'], host='127.0.0.1',
+                        port=smtp.server_address[1], starttls=False),
+        ]
+        try:
+            dispatcher = AlertDispatcher(backends, coalesce_seconds=30, retry_backoff=0.01,
+                                         state=AlertState(state_path))
+            start = time.monotonic()
+            for i in range(50):
+                dispatcher.send('Feed X failing', f'timeout {i}', key='feed:x')
+            dispatcher.send('Feed Y failing', 'HTTP 404', key='feed:y')
+            assert time.monotonic() - start < 0.5
+            assert dispatcher.flush()
+            assert dispatcher.sent == 2
+
+            # A later run: the rate limit (persisted) holds back feed:x and counts it
+            later = AlertDispatcher(backends, coalesce_seconds=0, state=AlertState(state_path))
+            later.send('Feed X failing', 'timeout again', key='feed:x')
+            assert later.flush()
+            later.close()
+        finally:
+            webhook.shutdown()
+            smtp.shutdown()
+            webhook.server_close()
+            smtp.server_close()
+
+        assert len(posts) == 3  # one failed attempt, then one message per key
+        assert '*Feed X failing*\ntimeout 49' in posts[1] + posts[2]
+        assert any('(50 occurrences)' in text for text in posts)
+        assert len(emails) == 2
+        assert any('Subject: Feed Y failing' in email for email in emails)
+        assert AlertState(state_path).suppressed('feed:x') == 1
+
+
+class TestSharding:
+    """Test deterministic sharding and the shard coordinator"""
+
+    def test_shards_partition_sources(self):
+        """Test every source lands in exactly one shard, deterministically"""
+        from shared.sharding import select_shard, shard_of
+
+        sources = [f"https://feed{i}.example.com/rss" for i in range(20)]
+        shards = [select_shard(sources, i, 4) for i in range(4)]
+
+        assert sorted(sum(shards, [])) == sorted(sources)
+        assert shard_of("https://feed1.example.com/rss", 4) == shard_of("HTTPS://FEED1.example.com/rss ", 4)
+        assert select_shard(sources, 0, 1) == sources
+
+        with pytest.raises(ValueError):
+            select_shard(sources, 4, 4)
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'OUTPUT_SINKS': 'columnar', 'TESTING': 'true'})
+    def test_coordinator_merges_processes(self, tmp_path, monkeypatch):
+        """Test real shard agents collect in separate processes, then one writer writes, flushes and commits"""
+        import json
+        import shutil
+        import threading
+        import time
+        from email.utils import formatdate
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from agents.agent_3.agent import TechnicalDebtScanner
+        from shared.sharding import ShardCoordinator
+        from shared.sinks import read_columnar
+
+        monkeypatch.setenv('STATE_DIR', str(tmp_path / 'state'))
+        published = formatdate(time.time() - 3600)
+
+        class FeedHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                items = ''.join(
+                    f'<item><title>{title}</title><link>{link}</link><description>Legacy system downtime'
+                    f'</description><pubDate>{published}</pubDate></item>'
+                    for title, link in [(f'Post {self.path}', f'https://example.com{self.path}'),
+                                        ('Shared', 'https://example.com/shared')]
+                )
+                body = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+
+        config_dir = tmp_path / 'config'
+        shutil.copytree('config', config_dir)
+        sources = json.loads((config_dir / 'agent_3_sources.json').read_text())
+        sources['rss_feeds'] = [{'name': f'Feed {i}', 'url': f'{base}/feed{i}'} for i in range(6)]
+        (config_dir / 'agent_3_sources.json').write_text(json.dumps(sources))
+
+        try:
+            result = ShardCoordinator(TechnicalDebtScanner, 'process_feeds', 2, config_dir=str(config_dir)).run()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Six feeds plus one article every shard saw, written once
+        assert result['signals_found'] == 7
+        assert result['metrics']['sources_processed'] == 6
+        assert result['metrics']['shards'] == 2
+
+        # The buffered columnar sink was flushed
+        columns = read_columnar(str(tmp_path / 'state' / 'output' / 'columnar'), ['source_url'])
+        assert sorted(columns['source_url'].tolist()) == sorted(
+            [f'https://example.com/feed{i}' for i in range(6)] + ['https://example.com/shared']
+        )
+
+        # Each shard's last-seen marks were committed after the write (ports vary, so shard sizes do too)
+        marks = {}
+        for path in (tmp_path / 'state' / 'recency').glob('agent_3_shard*of2.json'):
+            marks.update(json.loads(path.read_text())['marks'])
+        assert sorted(marks) == sorted(f'{base}/feed{i}' for i in range(6))
+
+
+class TestLoadTest:
+    """Test the synthetic load-test harness"""
+
+    @patch.dict(os.environ, {'RELEVANCE_MODEL': 'count', 'OUTPUT_SINKS': 'sheets'})
+    def test_runs_agents_against_synthetic_servers(self):
+        """Test both agents run end to end and report call counts"""
+        from shared.loadtest import CountingSheetsClient, LoadProfile, LoadTest
+
+        # In-place row updates (per-company aggregation) are Sheets calls too
+        sheets = CountingSheetsClient()
+        sheets.batch_update([{'range': 'Automation Queue!L2', 'values': [['2026-01-01']]}])
+        assert sheets.calls == {'batch_update': 1}
+
+        profile = LoadProfile(
+            feeds=6, items_per_feed=5, subreddits=4, posts=250, comments_per_post=0,
+            signal_rate=0.5, latency_ms=0, latency_sigma=0,
+        )
+        agent_3, agent_4 = LoadTest(profile).run(['agent_3', 'agent_4'])['results']
+
+        assert agent_3['sources'] == 6
+        assert agent_3['items_analyzed'] == 30
+        assert agent_3['api_calls']['feed_requests'] == 6
+        assert agent_3['signals_found'] > 0
+        assert agent_4['items_analyzed'] == 250
+        assert agent_4['api_calls']['reddit_listing_requests'] == 3
+        assert agent_4['latency_ms']['p99'] >= agent_4['latency_ms']['p50']
+        assert agent_4['peak_rss_mb'] > 0
+
+
+class TestWorker:
+    """Test the long-running worker and scheduler"""
+
+    def test_scheduler_runs_and_records_failures(self):
+        """Test jobs run on schedule and failures don't stop the loop"""
+        from shared.scheduler import Scheduler
+
+        calls = []
+
+        def failing():
+            calls.append("fail")
+            raise RuntimeError("boom")
+
+        scheduler = Scheduler()
+        scheduler.add_job("ok", lambda: calls.append("ok") or {"rows_written": 1}, 60)
+        scheduler.add_job("fail", failing, 60)
+
+        assert scheduler.run_pending() == 2
+        assert scheduler.run_pending() == 0  # Not due again yet
+
+        status = scheduler.status()
+        assert status["ok"]["last_result"] == {"rows_written": 1}
+        assert status["fail"]["error_count"] == 1
+        assert status["fail"]["last_error"] == "boom"
+
+    def test_health_endpoint_and_shutdown(self):
+        """Test the worker serves health and flushes agents on shutdown"""
+        import json
+        import time
+        import urllib.request
+        from worker import Worker
+
+        agent = Mock()
+        agent.run.return_value = {"signals_found": 0, "rows_written": 0}
+
+        worker = Worker(agents={"fake": (agent, 3600)})
+        worker.start(port=0)
+        try:
+            port = worker.http_server.server_port
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health") as response:
+                health = json.loads(response.read())
+            assert health["status"] == "ok"
+            assert "fake" in health["jobs"]
+
+            for _ in range(50):
+                if agent.run.called:
+                    break
+                time.sleep(0.05)
+        finally:
+            worker.shutdown(timeout=5)
+
+        agent.run.assert_called_once()
+        agent.flush.assert_called_once()
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
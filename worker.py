@@ -0,0 +1,273 @@
+"""
+Long-running worker entry point for Results CTO agents
+
+Hosts both agents in one process and runs them on an internal schedule,
+so clients, caches and keyword matchers stay resident between polls.
+Intended for VM/container deployments instead of per-invocation Cloud Functions.
+
+Usage:
+    python worker.py
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+# Add agents to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
+
+from agent_3.agent import TechnicalDebtScanner  # noqa: E402
+from agent_4.agent import RegionalNewsMonitor  # noqa: E402
+from shared.alerts import flush_alerts  # noqa: E402
+from shared.scheduler import Scheduler  # noqa: E402
+from shared.utils import flush_logging, load_json_config, setup_logging  # noqa: E402
+
+logger = setup_logging("worker")
+
+
+def _agent_enabled(env_var: str) -> bool:
+    """
+    Check an AGENT_N_ENABLED flag
+
+    Args:
+        env_var: Environment variable name
+
+    Returns:
+        True if enabled
+    """
+    return os.getenv(env_var, "true").lower() == "true"
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Serves GET /health with scheduler and job status, and Agent 3's WebSub callback at /websub"""
+
+    worker = None  # Set by Worker.start_health_server
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") == "/websub":
+            self._websub()
+            return
+        if self.path.rstrip("/") not in ("/health", "/healthz", ""):
+            self.send_error(404)
+            return
+
+        health = self.worker.health()
+        body = json.dumps(health).encode("utf-8")
+
+        self.send_response(200 if health["status"] == "ok" else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip("/") != "/websub":
+            self.send_error(404)
+            return
+        self._websub()
+
+    def _websub(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            status, text = self.worker.handle_websub(self.command, dict(parse_qsl(url.query)), self.headers, body)
+        except Exception as e:
+            logger.error(f"WebSub callback failed: {e}", exc_info=True)
+            status, text = 500, ""
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Health probes are frequent; keep them out of the agent logs
+        pass
+
+
+class Worker:
+    """Hosts both agents and runs them on their configured intervals"""
+
+    def __init__(self, config_dir: str = "config", agents: Optional[Dict] = None):
+        """
+        Initialize worker
+
+        Args:
+            config_dir: Directory containing configuration files
+            agents: Optional dict of name -> (agent, interval_seconds), mainly for testing
+        """
+        self.config_dir = config_dir
+        self.scheduler = Scheduler()
+        self.started_at = time.monotonic()
+        self.http_server: Optional[ThreadingHTTPServer] = None
+        self._stop_requested = threading.Event()
+        self._shutdown = threading.Event()
+
+        self.agents = agents if agents is not None else self._build_agents()
+        # Scheduled runs and WebSub pushes share an agent's sinks and state; one at a time
+        self.agent_locks = {name: threading.Lock() for name in self.agents}
+        for name, (agent, interval) in self.agents.items():
+            self.scheduler.add_job(name, self._locked(name, agent.run), interval)
+
+    def _build_agents(self) -> Dict:
+        """
+        Construct the enabled agents once, with intervals from their source configs
+
+        Returns:
+            Dict of name -> (agent, interval_seconds)
+        """
+        agents = {}
+
+        if _agent_enabled("AGENT_3_ENABLED"):
+            sources = load_json_config(f"{self.config_dir}/agent_3_sources.json")
+            interval = float(os.getenv(
+                "AGENT_3_INTERVAL_MINUTES", sources.get("update_frequency_minutes", 60)
+            )) * 60
+            agents["agent_3"] = (TechnicalDebtScanner(self.config_dir), interval)
+
+        if _agent_enabled("AGENT_4_ENABLED"):
+            sources = load_json_config(f"{self.config_dir}/agent_4_sources.json")
+            interval = float(os.getenv(
+                "AGENT_4_INTERVAL_HOURS", sources.get("check_frequency_hours", 4)
+            )) * 3600
+            agents["agent_4"] = (RegionalNewsMonitor(self.config_dir), interval)
+
+        return agents
+
+    def _locked(self, name: str, func):
+        def run():
+            with self.agent_locks[name]:
+                return func()
+        return run
+
+    def handle_websub(self, method: str, params: Dict, headers, body: bytes):
+        """
+        Handle a WebSub callback for Agent 3
+
+        Args:
+            method: HTTP method
+            params: Query parameters
+            headers: Request headers
+            body: Request body
+
+        Returns:
+            Tuple of (HTTP status, body)
+        """
+        if "agent_3" not in self.agents:
+            return 404, ""
+        agent, _ = self.agents["agent_3"]
+        with self.agent_locks["agent_3"]:
+            return agent.handle_websub(method, params, headers, body)
+
+    def health(self) -> Dict:
+        """
+        Get worker health
+
+        Returns:
+            Health dict (status is "ok" while the scheduler is running)
+        """
+        running = self.scheduler.is_running() and not self._stop_requested.is_set()
+        return {
+            "status": "ok" if running else "stopping",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "current_job": self.scheduler.current_job,
+            "jobs": self.scheduler.status(),
+        }
+
+    def start_health_server(self, port: int, host: str = "0.0.0.0"):
+        """
+        Start the health endpoint in a background thread
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind
+        """
+        handler = type("BoundHealthHandler", (HealthHandler,), {"worker": self})
+        self.http_server = ThreadingHTTPServer((host, port), handler)
+        self.http_server.daemon_threads = True
+        threading.Thread(target=self.http_server.serve_forever, name="health", daemon=True).start()
+        logger.info(f"Health endpoint listening on {host}:{self.http_server.server_port}/health")
+
+    def start(self, port: Optional[int] = None):
+        """
+        Start the scheduler and health endpoint
+
+        Args:
+            port: Health port (defaults to WORKER_HEALTH_PORT, then PORT, then 8080)
+        """
+        if port is None:
+            port = int(os.getenv("WORKER_HEALTH_PORT", os.getenv("PORT", "8080")))
+        self.start_health_server(port)
+        self.scheduler.start()
+        logger.info(f"Worker started with agents: {', '.join(self.agents) or 'none'}")
+
+    def shutdown(self, timeout: float = None):
+        """
+        Stop scheduling, let the running job finish, then flush and close
+
+        Args:
+            timeout: Maximum seconds to wait for the running job
+        """
+        if self._shutdown.is_set():
+            return
+        self._shutdown.set()
+        self._stop_requested.set()
+        logger.info("Worker shutting down")
+
+        self.scheduler.stop(timeout)
+
+        for name, (agent, _) in self.agents.items():
+            flush = getattr(agent, "flush", None)
+            if callable(flush):
+                try:
+                    flush()
+                except Exception as e:
+                    logger.error(f"Error flushing {name}: {e}", exc_info=True)
+
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+
+        flush_alerts()
+        logger.info("Worker stopped")
+        flush_logging()
+
+    def request_stop(self):
+        """Ask the worker to stop; safe to call from a signal handler"""
+        self._stop_requested.set()
+
+    def wait(self):
+        """Block until a stop is requested"""
+        while not self._stop_requested.wait(1.0):
+            pass
+
+
+def main():
+    """Entry point for the long-running worker"""
+    try:
+        worker = Worker()
+    except Exception as e:
+        logger.error(f"Fatal error starting worker: {e}", exc_info=True)
+        sys.exit(1)
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}")
+        worker.request_stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    worker.start()
+    worker.wait()
+    worker.shutdown()
+
+
+if __name__ == "__main__":
+    main()